@@ -0,0 +1,113 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from copy import deepcopy
+from statistics import mean, median
+from types import SimpleNamespace
+
+from Cython import __version__ as cython_version
+
+from hatch_cython.__about__ import __version__
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.types import CallableT, DictT
+
+RESULTS_VERSION = 1
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(run: CallableT[[object], object], repeat: int = 5, setup: CallableT[[], object] = lambda: None) -> dict:
+    """
+    Times `run` repeat times; each run is passed the result of calling `setup`, which
+    is not timed.
+
+    Returns:
+        dict: the number of runs and min / median / mean / max seconds
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return {"runs": repeat, "min": min(times), "median": median(times), "mean": mean(times), "max": max(times)}
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty", "--abbrev=12"],  # noqa: S607
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return out.stdout.strip()
+
+
+def environment() -> dict:
+    return {
+        "revision": git_revision(),
+        "hatch_cython": __version__,
+        "cython": cython_version,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.time(),
+    }
+
+
+def write_results(path: str, suite: str, results: DictT[str, dict], params: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": RESULTS_VERSION,
+                "suite": suite,
+                "environment": environment(),
+                "params": params,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != RESULTS_VERSION:
+        msg = f"{path}: unsupported results version {data.get('version')!r}"
+        raise ValueError(msg)
+    return data
+
+
+@contextmanager
+def project(root: str):
+    """Runs the block from root with root importable, like a hatch build would"""
+    cwd = os.getcwd()
+    os.chdir(root)
+    sys.path.insert(0, root)
+    try:
+        yield
+    finally:
+        sys.path.remove(root)
+        os.chdir(cwd)
+
+
+def new_hook(root: str, options: dict, name: str, target: str = "wheel") -> CythonBuildHook:
+    # parsing consumes parts of the options (e.g. the template index), so each hook gets a copy
+    return CythonBuildHook(
+        root,
+        {"options": deepcopy(options)},
+        {},
+        SimpleNamespace(name=name),
+        directory=root,
+        target_name=target,
+    )
@@ -0,0 +1,52 @@
+"""
+Compares two benchmark result files, e.g. of two commits.
+
+    python -m benchmarks.compare base.json head.json --threshold 0.1
+"""
+
+import argparse
+import sys
+
+from benchmarks.common import load_results
+from hatch_cython.types import DictT, ListT, TupleT
+
+Change = TupleT[str, float, float, float]
+
+
+def changes(base: DictT[str, dict], head: DictT[str, dict]) -> ListT[Change]:
+    """(benchmark, base median, head median, relative change) of benchmarks in both"""
+    found = []
+    for name in sorted(base.keys() & head.keys()):
+        before, after = base[name]["median"], head[name]["median"]
+        found.append((name, before, after, after / before - 1 if before else 0.0))
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown that fails the comparison")
+    parser.add_argument("--min-delta", type=float, default=0.001, help="seconds below which changes are noise")
+    args = parser.parse_args(argv)
+
+    base, head = load_results(args.base), load_results(args.head)
+    print(f"base: {base['environment']['revision']}  head: {head['environment']['revision']}")  # noqa: T201
+    slower = []
+    for name, before, after, change in changes(base["results"], head["results"]):
+        flag = ""
+        if abs(after - before) < args.min_delta:
+            pass
+        elif change > args.threshold:
+            flag = "  slower"
+            slower.append(name)
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:<48} {before * 1000:>12.2f} {after * 1000:>12.2f} ms {change:>+8.1%}{flag}")  # noqa: T201
+    for name in sorted(base["results"].keys() ^ head["results"].keys()):
+        print(f"{name:<48} only in {'base' if name in base['results'] else 'head'}")  # noqa: T201
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
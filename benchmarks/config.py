@@ -0,0 +1,105 @@
+"""
+Times the config layer against generated configs of increasing size.
+
+    python -m benchmarks.config --sizes 10 100 1000
+"""
+
+import argparse
+import os
+from copy import deepcopy
+from types import SimpleNamespace
+
+from benchmarks.common import measure, write_results
+from hatch_cython.config import Config, PlatformArgs, parse_from_dict
+from hatch_cython.config.flags import parse_env_args
+from hatch_cython.types import DictT
+
+PLATFORMS = ("linux", "darwin", "windows", "freebsd")
+ARCHES = ("x86_64", "arm64", "aarch64")
+MARKERS = ("python_version >= '3.8'", "sys_platform == 'linux'", "platform_machine == 'x86_64'")
+
+
+def platform_arg(i: int, flag: str) -> dict:
+    """The i-th of a mix of plain, platform / arch specific and marker guarded args"""
+    arg = {"arg": f"{flag}{i}"}
+    if i % 2:
+        arg["platforms"] = [PLATFORMS[i % len(PLATFORMS)], PLATFORMS[(i + 1) % len(PLATFORMS)]]
+    if i % 3 == 0:
+        arg["arch"] = ARCHES[i % len(ARCHES)]
+    if i % 4 == 0:
+        arg["marker"] = MARKERS[i % len(MARKERS)]
+    return arg
+
+
+def generate_options(size: int) -> dict:
+    """Hook options with `size` compile / link args, env flags, template index items and excludes"""
+    return {
+        "compile_args": [platform_arg(i, "-DBENCH_") for i in range(size)],
+        "extra_link_args": [platform_arg(i, "-Wl,--bench-") for i in range(size)],
+        "env": [
+            {**platform_arg(i, "--bench-"), "env": "CFLAGS" if i == 0 else f"BENCH_{i}", "merges": bool(i % 2)}
+            for i in range(size)
+        ],
+        "files": {
+            "exclude": [
+                {"matches": f"*/excluded_{i}/*", "platforms": [PLATFORMS[i % len(PLATFORMS)]]} for i in range(size)
+            ],
+            "aliases": {f"pkg.mod_{i:05d}": f"pkg.alias_{i}" for i in range(size)},
+        },
+        "templates": {
+            "index": [{"keyword": "global", "matches": "*"}]
+            + [
+                {"keyword": f"kw{i}", "matches": f"templated_{i}.*.in", "platforms": [PLATFORMS[i % len(PLATFORMS)]]}
+                for i in range(size)
+            ],
+            "global": {"supported": ["int"]},
+            **{f"kw{i}": {"supported": ["int", "float"], "index": i} for i in range(size)},
+        },
+        "directives": {"boundscheck": False, "wraparound": False},
+        "define_macros": [[f"BENCH_{i}", str(i)] for i in range(min(size, 50))],
+    }
+
+
+def bench_size(size: int, repeat: int) -> DictT[str, dict]:
+    options = generate_options(size)
+
+    def hook():
+        return SimpleNamespace(config={"options": deepcopy(options)}, app=SimpleNamespace(display_warning=print))
+
+    cfg: Config = parse_from_dict(hook())
+    platform_args = [a for a in cfg.compile_args if isinstance(a, PlatformArgs)]
+    marked = [a for a in platform_args if a.marker]
+    # files that each match one template index item, like the hook's (outfile, template) pairs
+    files = [(f"./src/pkg/templated_{i}.pyx", f"./src/pkg/templated_{i}.pyx.in") for i in range(min(size, 100))]
+    env = options["env"]
+
+    return {
+        "parse_from_dict": measure(parse_from_dict, repeat, setup=hook),
+        "compile_args_for_platform": measure(lambda _: cfg.compile_args_for_platform, repeat),
+        "compile_links_for_platform": measure(lambda _: cfg.compile_links_for_platform, repeat),
+        "applies": measure(lambda _: [a.applies() for a in platform_args], repeat),
+        "check_marker": measure(lambda _: [a.check_marker() for a in marked], repeat),
+        "parse_env_args": measure(parse_env_args, repeat, setup=lambda: {"env": deepcopy(env)}),
+        "templates_find": measure(lambda h: [cfg.templates.find(h, *pair) for pair in files], repeat, setup=hook),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.config", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per benchmark")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "config.json"))
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        for bench, stats in bench_size(size, args.repeat).items():
+            results[f"size-{size}/{bench}"] = stats
+            print(f"size-{size:<8} {bench:<28} {stats['median'] * 1000:>12.3f} ms")  # noqa: T201
+
+    write_results(args.output, "config", results, {k: v for k, v in vars(args).items() if k != "output"})
+    print(f"results written to {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
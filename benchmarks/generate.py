@@ -0,0 +1,197 @@
+"""
+Generates synthetic projects for the scale benchmarks.
+
+    python -m benchmarks.generate ./synthetic --modules 1000 --depth 3 --layout flat
+"""
+
+import argparse
+import os
+import random
+from dataclasses import asdict, dataclass, field
+
+import toml
+
+from hatch_cython.types import ListStr
+
+LAYOUTS = ("src", "flat")
+
+PYX = """\
+cpdef long f_{i}(long a, long b):
+    return a * b + {i}
+"""
+PXD = """\
+cpdef long f_{i}(long a, long b)
+"""
+PY = """\
+def f_{i}(a, b):
+    return a * b + {i}
+"""
+TEMPLATE = """\
+{{{{for typ in supported}}}}
+cpdef {{{{typ}}}} t_{k}_{{{{typ}}}}({{{{typ}}}} a, {{{{typ}}}} b):
+    return a + b
+{{{{endfor}}}}
+"""
+
+
+@dataclass
+class ProjectSpec:
+    modules: int = field(default=100)
+    # package nesting below the top-level package
+    depth: int = field(default=2)
+    layout: str = field(default="src")
+    # share of modules that are plain .py, compiled through `compile_py`
+    py_ratio: float = field(default=0.2)
+    # share of .py modules with an augmenting .pxd
+    pxd_ratio: float = field(default=0.5)
+    templates: int = field(default=0)
+    # exclude rules, each of which matches a directory of files that must be skipped
+    excludes: int = field(default=0)
+    aliases: int = field(default=0)
+    # subpackages per package
+    fanout: int = field(default=4)
+    name: str = field(default="synthetic")
+    seed: int = field(default=0)
+
+    def __post_init__(self):
+        if self.layout not in LAYOUTS:
+            msg = f"layout = {self.layout!r} is invalid. use one of {', '.join(LAYOUTS)}"
+            raise ValueError(msg)
+        for ratio in ("pxd_ratio", "py_ratio"):
+            if not 0 <= getattr(self, ratio) <= 1:
+                msg = f"{ratio} must be between 0 and 1"
+                raise ValueError(msg)
+
+    @property
+    def slug(self) -> str:
+        return f"{self.layout}-{self.modules}m-d{self.depth}"
+
+    @property
+    def package_root(self) -> str:
+        return os.path.join("src", self.name) if self.layout == "src" else self.name
+
+    def packages(self) -> ListStr:
+        """Dotted names of all packages, breadth first"""
+        found, level = [self.name], [self.name]
+        for _ in range(self.depth):
+            level = [f"{parent}.sub{i}" for parent in level for i in range(self.fanout)]
+            found.extend(level)
+        return found
+
+    def module_stem(self, i: int) -> str:
+        # fixed width, so that no module name is a prefix of another (aliases match prefixes)
+        return f"mod_{i:0{len(str(self.modules))}d}"
+
+    def module_name(self, i: int) -> str:
+        # module i lives in package i % len(packages), so the top-level package holds the first
+        packages = self.packages()
+        return f"{packages[i % len(packages)]}.{self.module_stem(i)}"
+
+    def options(self) -> dict:
+        """The hook options of the generated project"""
+        options = {
+            "src": self.name,
+            "compile_py": self.py_ratio > 0,
+            "files": {
+                "exclude": [{"matches": f"*/skip{k}/*"} for k in range(self.excludes)],
+                "aliases": {
+                    self.module_name(i): self.module_name(i).replace(".mod_", ".alias_")
+                    for i in range(min(self.aliases, self.modules))
+                },
+            },
+        }
+        if self.py_ratio > 0:
+            options["files"]["exclude"].append({"matches": "*/__init__.py"})
+        if self.templates:
+            options["templates"] = {
+                "index": [{"keyword": "global", "matches": "*"}]
+                + [{"keyword": f"t{k}", "matches": f"tmpl_{k}.pyx.in"} for k in range(self.templates)],
+                "global": {"supported": ["int"]},
+                **{f"t{k}": {"supported": ["int", "long"]} for k in range(self.templates)},
+            }
+        return options
+
+
+def module_path(root: str, package: str, name: str) -> str:
+    return os.path.join(root, *package.split(".")[1:], name)
+
+
+def generate(spec: ProjectSpec, root: str) -> str:
+    """
+    Writes a project following spec to root: a package tree with `spec.modules`
+    modules spread over its packages, templates, excluded directories and a
+    pyproject.toml that configures the hook.
+
+    Returns:
+        str: root
+    """
+    rng = random.Random(spec.seed)  # noqa: S311
+    packages = spec.packages()
+    pkg_root = os.path.join(root, spec.package_root)
+    for package in packages:
+        directory = module_path(pkg_root, package, "")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "__init__.py"), "w") as f:
+            f.write("")
+
+    for i in range(spec.modules):
+        package = packages[i % len(packages)]
+        stem = module_path(pkg_root, package, spec.module_stem(i))
+        if rng.random() >= spec.py_ratio:
+            with open(f"{stem}.pyx", "w") as f:
+                f.write(PYX.format(i=i))
+            continue
+        with open(f"{stem}.py", "w") as f:
+            f.write(PY.format(i=i))
+        if rng.random() < spec.pxd_ratio:
+            with open(f"{stem}.pxd", "w") as f:
+                f.write(PXD.format(i=i))
+
+    for k in range(spec.templates):
+        package = packages[k % len(packages)]
+        with open(module_path(pkg_root, package, f"tmpl_{k}.pyx.in"), "w") as f:
+            f.write(TEMPLATE.format(k=k))
+
+    for k in range(spec.excludes):
+        skipped = module_path(pkg_root, packages[k % len(packages)], f"skip{k}")
+        os.makedirs(skipped, exist_ok=True)
+        for j in range(10):
+            with open(os.path.join(skipped, f"skipped_{j}.pyx"), "w") as f:
+                f.write(PYX.format(i=j))
+
+    pyproject = {
+        "build-system": {"requires": ["hatchling", "hatch-cython"], "build-backend": "hatchling.build"},
+        "project": {"name": spec.name, "version": "0.1.0"},
+        "tool": {
+            "hatch": {
+                "build": {
+                    "targets": {
+                        "wheel": {
+                            "packages": [spec.package_root.replace(os.sep, "/")],
+                            "hooks": {"cython": {"options": spec.options()}},
+                        }
+                    }
+                }
+            },
+            "hatch-cython-benchmark": {"spec": asdict(spec)},
+        },
+    }
+    with open(os.path.join(root, "pyproject.toml"), "w") as f:
+        toml.dump(pyproject, f)
+    return root
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generate", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("root", help="directory to write the project to")
+    defaults = ProjectSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args(argv))
+    root = args.pop("root")
+    os.makedirs(root, exist_ok=True)
+    generate(ProjectSpec(**args), root)
+
+
+if __name__ == "__main__":
+    main()
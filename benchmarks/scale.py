@@ -0,0 +1,114 @@
+"""
+Times the hook against synthetic projects of increasing size.
+
+    python -m benchmarks.scale --modules 100 1000 10000 --layout src flat
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+from benchmarks.common import measure, new_hook, project, write_results
+from benchmarks.generate import LAYOUTS, ProjectSpec, generate
+from hatch_cython.temp import setup_py
+from hatch_cython.types import DictT
+
+
+def bench_project(spec: ProjectSpec, root: str, options: dict, repeat: int, builds: int) -> DictT[str, dict]:
+    """
+    Times each stage of the hook on the project at root with a fresh hook per run, so
+    that nothing memoized by a previous run is reused.
+    """
+    options = {**spec.options(), **options}
+
+    def fresh():
+        return new_hook(root, options, spec.name)
+
+    def cleaned():
+        hook = fresh()
+        hook.clean([])
+        return fresh()
+
+    results = {}
+    with project(root):
+        results["options"] = measure(lambda _: fresh(), repeat)
+        results["discovery"] = measure(lambda hook: hook.included_files, repeat, setup=fresh)
+        results["grouped_included_files"] = measure(lambda hook: hook.grouped_included_files, repeat, setup=fresh)
+
+        hook = fresh()
+        extensions = hook.grouped_included_files
+        results["setup_py"] = measure(lambda _: setup_py(*extensions, options=hook.options, sdist=False), repeat)
+
+        if builds:
+            results["build"] = measure(
+                lambda hook: hook.initialize("0.1.0", {"artifacts": [], "force_include": {}}),
+                builds,
+                setup=cleaned,
+            )
+        fresh().clean([])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scale", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--modules", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--layout", choices=LAYOUTS, nargs="+", default=["src"])
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--py-ratio", type=float, default=0.2)
+    parser.add_argument("--pxd-ratio", type=float, default=0.5)
+    parser.add_argument("--templates", type=int, default=0)
+    parser.add_argument("--excludes", type=int, default=0)
+    parser.add_argument("--aliases", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument(
+        "--build-max",
+        type=int,
+        default=0,
+        help="run full builds for projects with up to this many modules (default: no full builds)",
+    )
+    parser.add_argument("--build-repeat", type=int, default=1, help="runs per full build")
+    parser.add_argument("--options", type=json.loads, default={}, help="hook options to add, as json")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "scale.json"))
+    parser.add_argument("--keep", action="store_true", help="keep the generated projects")
+    parser.add_argument("--verbose", action="store_true", help="show the hook's output")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        os.environ["HATCH_QUIET"] = "1"
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="hatch-cython-bench-")
+    try:
+        for layout in args.layout:
+            for modules in args.modules:
+                spec = ProjectSpec(
+                    modules=modules,
+                    layout=layout,
+                    depth=args.depth,
+                    fanout=args.fanout,
+                    pxd_ratio=args.pxd_ratio,
+                    py_ratio=args.py_ratio,
+                    templates=args.templates,
+                    excludes=args.excludes,
+                    aliases=args.aliases,
+                )
+                root = generate(spec, os.path.join(workdir, spec.slug))
+                builds = args.build_repeat if modules <= args.build_max else 0
+                for bench, stats in bench_project(spec, root, args.options, args.repeat, builds).items():
+                    results[f"{spec.slug}/{bench}"] = stats
+                    print(f"{spec.slug:<24} {bench:<24} {stats['median'] * 1000:>12.2f} ms")  # noqa: T201
+    finally:
+        if args.keep:
+            print(f"projects kept in {workdir}")  # noqa: T201
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    write_results(args.output, "scale", results, {k: v for k, v in vars(args).items() if k not in ("output", "keep")})
+    print(f"results written to {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import re
+from collections import deque
+
+from hatch_cython.temp import ExtensionArg
+from hatch_cython.types import CallableT, DictT, ListStr, ListT, TupleT, UnionT
+
+# setuptools, before it compiles an extension
+BUILDING = re.compile(r"^building '(?P<module>[^']+)' extension")
+# cythonize, before it translates a source
+CYTHONIZING = re.compile(r"^(?:\[\s*\d+/\d+\] Cythonizing|Compiling) (?P<path>\S+)")
+# compiler and cython diagnostics, which lead with the file they are about
+DIAGNOSTIC = re.compile(r"^(?P<path>[^\s:]+\.(?:pyx|pxd|pxi|py|c|cc|cpp|h|hpp)):\d+")
+ERROR = re.compile(r"(?:^|\s)(?:fatal )?error:|^Error compiling Cython file", re.IGNORECASE)
+
+LINES_PER_MODULE = 200
+TAIL = 500
+
+
+def source_stem(path: str) -> str:
+    path = os.path.normpath(path)
+    if os.path.isabs(path):
+        path = os.path.relpath(path)
+    return os.path.splitext(path)[0]
+
+
+class BuildLog:
+    """
+    Output of a build, consumed line by line. Each line is attributed to the module
+    that produced it: by the file a diagnostic leads with, or else by the module that
+    setuptools / cythonize last announced. Only the last lines of each module, and of
+    the build as a whole, are kept.
+    """
+
+    total: int
+    modules: DictT[str, deque]
+    tail: deque
+    failed: ListStr
+    started: ListStr
+
+    def __init__(
+        self,
+        extensions: ListT[ExtensionArg],
+        on_progress: UnionT[CallableT[[int, int, str], None], None] = None,
+        lines_per_module: int = LINES_PER_MODULE,
+        tail: int = TAIL,
+    ):
+        self.stems = {source_stem(f): ext["name"] for ext in extensions for f in ext["files"]}
+        self.total = len(extensions)
+        self.on_progress = on_progress
+        self.lines_per_module = lines_per_module
+        self.modules = {}
+        self.tail = deque(maxlen=tail)
+        self.failed = []
+        self.started = []
+        self.current = None
+
+    def module_of(self, path: str) -> UnionT[str, None]:
+        return self.stems.get(source_stem(path))
+
+    def attribute(self, line: str) -> UnionT[str, None]:
+        m = BUILDING.match(line)
+        if m:
+            self.current = m.group("module")
+            if self.current not in self.started:
+                self.started.append(self.current)
+                if self.on_progress is not None:
+                    self.on_progress(len(self.started), self.total, self.current)
+            return self.current
+        m = CYTHONIZING.match(line)
+        if m:
+            self.current = self.module_of(m.group("path")) or self.current
+            return self.current
+        m = DIAGNOSTIC.match(line)
+        if m:
+            return self.module_of(m.group("path")) or self.current
+        return self.current
+
+    def feed(self, line: str):
+        line = line.rstrip("\r\n")
+        module = self.attribute(line)
+        self.tail.append(line)
+        if module is None:
+            return
+        if module not in self.modules:
+            self.modules[module] = deque(maxlen=self.lines_per_module)
+        self.modules[module].append(line)
+        if ERROR.search(line) and module not in self.failed:
+            self.failed.append(module)
+
+    def diagnostics(self) -> ListT[TupleT[UnionT[str, None], ListStr]]:
+        """The output of the modules that reported errors, or the last lines of the build"""
+        if self.failed:
+            return [(module, list(self.modules[module])) for module in self.failed]
+        return [(None, list(self.tail))]
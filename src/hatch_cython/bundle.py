@@ -0,0 +1,59 @@
+from hatch_cython.finder import write_finder
+from hatch_cython.render import write_if_changed
+from hatch_cython.temp import ExtensionArg
+from hatch_cython.types import DictT, ListStr, ListT, TupleT
+
+STUB = """#include <Python.h>
+
+/* the library of a bundle is not a module: its modules import by their own names */
+PyMODINIT_FUNC PyInit_{init}(void) {{
+    PyErr_SetString(PyExc_ImportError, "{name} bundles the modules {members}, import them instead");
+    return NULL;
+}}
+"""
+
+LOOKUP = """
+# module -> (package of its bundle, file name of the bundle library)
+BUNDLED = {bundled!r}
+
+
+def locate(fullname):
+    located = BUNDLED.get(fullname)
+    if located is None:
+        return None
+    package, library = located
+    # the bundle's package is imported before any of its submodules
+    return extension_spec(fullname, getattr(sys.modules.get(package), "__path__", None) or [], library)
+"""
+
+
+def check_members(name: str, members: ListT[ExtensionArg]):
+    """Modules of one bundle define their `PyInit_` entry point by their last name, which must be unique"""
+    seen: DictT[str, str] = {}
+    for ext in members:
+        last = ext["name"].rsplit(".", 1)[-1]
+        if last in seen:
+            msg = f"{seen[last]} and {ext['name']} cannot be bundled into {name}, their PyInit_{last} would clash"
+            raise ValueError(msg)
+        seen[last] = ext["name"]
+
+
+def write_stub(path: str, name: str, members: ListT[ExtensionArg]):
+    init = name.rsplit(".", 1)[-1]
+    write_if_changed(path, STUB.format(init=init, name=name, members=", ".join(ext["name"] for ext in members)))
+
+
+def write_loader(directory: str, project: str, bundled: DictT[str, TupleT[str, str]]) -> ListStr:
+    """
+    Writes the finder module of `bundled` and the .pth file that imports it at startup
+    to `directory`. Returns their paths
+    """
+    return write_finder(
+        directory,
+        project,
+        "bundles",
+        finder="BundleFinder",
+        purpose="imports the modules that were built into a shared library\n"
+        "with other modules (a bundle) by their own names.",
+        lookup=LOOKUP.format(bundled=dict(sorted(bundled.items()))),
+    )
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import shutil
+from uuid import uuid4
+
+from hatch_cython.config.cache import default_cache_dir, parse_size
+from hatch_cython.types import ListStr, TupleT, UnionT
+
+OBJECTS = "objects"
+STATS = "stats.json"
+
+
+class ObjectCache:
+    """
+    User level cache of compiled extension modules, shared between projects and
+    builds. Entries are content addressed; least recently used entries are
+    evicted once the cache grows beyond `max_size` bytes.
+    """
+
+    root: str
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, root: str, max_size: UnionT[int, str] = "2GB"):
+        self.root = root
+        self.max_size = parse_size(max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, key: str) -> str:
+        return os.path.join(self.root, OBJECTS, key[:2], key)
+
+    def fetch(self, key: str, dest: str) -> bool:
+        src = self.entry(key)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+            shutil.copyfile(src, dest)
+            shutil.copymode(src, dest)
+            # mtime is the lru clock
+            os.utime(src)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key: str, src: str):
+        dest = self.entry(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # copy then rename so that concurrent builds never observe a partial entry
+        tmp = f"{dest}.{uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(src, tmp)
+            shutil.copymode(src, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def entries(self) -> ListStr:
+        found = []
+        objects = os.path.join(self.root, OBJECTS)
+        if not os.path.isdir(objects):
+            return found
+        for shard in os.scandir(objects):
+            if shard.is_dir():
+                found.extend(e.path for e in os.scandir(shard.path) if e.is_file() and not e.name.endswith(".tmp"))
+        return found
+
+    def size(self) -> int:
+        return sum(os.path.getsize(e) for e in self.entries())
+
+    def prune(self, max_size: UnionT[int, str, None] = None) -> TupleT[int, int]:
+        """Evicts least recently used entries until the cache fits in max_size
+
+        Args:
+            max_size (int | str | None): size limit, defaults to the cache's configured limit
+
+        Returns:
+            tuple[int, int]: number of entries removed, bytes freed
+        """
+        limit = self.max_size if max_size is None else parse_size(max_size)
+        stats = []
+        for e in self.entries():
+            try:
+                st = os.stat(e)
+            except OSError:
+                continue
+            stats.append((st.st_mtime, st.st_size, e))
+        total = sum(s[1] for s in stats)
+        removed = freed = 0
+        for _, size, e in sorted(stats):
+            if total <= limit:
+                break
+            try:
+                os.remove(e)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+            removed += 1
+        return removed, freed
+
+    def clear(self) -> TupleT[int, int]:
+        return self.prune(0)
+
+    def stats(self) -> dict:
+        try:
+            with open(os.path.join(self.root, STATS), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def flush_stats(self):
+        if self.hits == 0 and self.misses == 0:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        stats = self.stats()
+        stats["hits"] = stats.get("hits", 0) + self.hits
+        stats["misses"] = stats.get("misses", 0) + self.misses
+        tmp = os.path.join(self.root, f"{STATS}.{uuid4().hex}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        os.replace(tmp, os.path.join(self.root, STATS))
+        self.hits = self.misses = 0
+
+
+def fmt_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:  # noqa: PLR2004
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def main(argv: UnionT[ListStr, None] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m hatch_cython.cache", description="Manage the compiled object cache"
+    )
+    parser.add_argument("--dir", default=None, help="cache directory (default: the user cache directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="show cache size and hit / miss statistics")
+    prune = sub.add_parser("prune", help="evict least recently used entries")
+    prune.add_argument("--max-size", default="2GB", help="size to prune down to (default: %(default)s)")
+    sub.add_parser("clear", help="remove every cache entry")
+    args = parser.parse_args(argv)
+
+    cache = ObjectCache(args.dir or default_cache_dir())
+    if args.command == "stats":
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = stats["hits"] / lookups if lookups else 0.0
+        print(f"directory: {cache.root}")  # noqa: T201
+        print(f"entries:   {len(cache.entries())}")  # noqa: T201
+        print(f"size:      {fmt_size(cache.size())}")  # noqa: T201
+        print(f"hits:      {stats['hits']}")  # noqa: T201
+        print(f"misses:    {stats['misses']}")  # noqa: T201
+        print(f"hit rate:  {rate:.1%}")  # noqa: T201
+    else:
+        removed, freed = cache.prune(args.max_size) if args.command == "prune" else cache.clear()
+        print(f"removed {removed} entries ({fmt_size(freed)})")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
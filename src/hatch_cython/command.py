@@ -0,0 +1,366 @@
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from tempfile import TemporaryDirectory
+from typing import ClassVar
+
+from setuptools.command.build_ext import build_ext
+from setuptools.errors import ExecError
+
+from hatch_cython.cache import ObjectCache
+from hatch_cython.config.flags import EnvFlags
+from hatch_cython.history import Usage, measured, spawn_measured
+from hatch_cython.tracing import Tracer, now
+from hatch_cython.types import DictT, ListStr, UnionT
+from hatch_cython.utils import digest, ensure_state_dir, file_digest
+
+# setuptools routes its logging to stdout, where the hook reads the build's progress
+log = logging.getLogger(__name__)
+
+_compiler_versions: DictT[str, str] = {}
+
+
+def compiler_version(executable: str) -> str:
+    if executable not in _compiler_versions:
+        try:
+            out = subprocess.run(  # noqa: S603
+                [executable, "--version"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                check=False,
+            ).stdout.decode(errors="replace")
+        except OSError:
+            out = ""
+        _compiler_versions[executable] = out.strip()
+    return _compiler_versions[executable]
+
+
+def strip_line_markers(path: str) -> bytes:
+    # preprocessor line markers carry absolute (temporary) paths, which would make
+    # otherwise identical translation units hash differently between checkouts
+    with open(path, "rb") as f:
+        return b"".join(ln for ln in f if not ln.startswith(b"#"))
+
+
+def cythonize_one(ext, options: dict):
+    """
+    Cythonizes a single extension; runs in a worker process of the scheduler.
+
+    Returns:
+        the cythonized extension (or None), resources used, start timestamp and pid
+    """
+    # imported lazily in the worker process
+    from Cython.Build import cythonize  # noqa: PLC0415
+
+    began = now()
+    with measured(Usage()) as usage:
+        modules = cythonize([ext], **options)
+    return (modules[0] if modules else None), usage, began, os.getpid()
+
+
+def preprocess_options(macros: list, include_dirs: ListStr) -> ListStr:
+    """The -D, -U and -I options of `macros` and `include_dirs`, as setuptools' compilers pass them"""
+    options = []
+    for macro in macros or []:
+        if len(macro) == 1:
+            options.append(f"-U{macro[0]}")
+        elif macro[1] is None:
+            options.append(f"-D{macro[0]}")
+        else:
+            options.append(f"-D{macro[0]}={macro[1]}")
+    return [*options, *(f"-I{directory}" for directory in include_dirs or [])]
+
+
+def run_compiler(cmd: ListStr, env: UnionT[dict, None] = None) -> Usage:
+    """
+    `distutils.spawn.spawn`, returning the resources used by the process.
+
+    Raises:
+        ExecError: the command could not be run or failed
+    """
+    cmd = list(cmd)
+    log.info(subprocess.list2cmdline(cmd))
+    executable = shutil.which(cmd[0])
+    if executable is not None:
+        cmd[0] = executable
+    env = dict(os.environ) if env is None else env
+    if sys.platform == "darwin":
+        target = sysconfig.get_config_var("MACOSX_DEPLOYMENT_TARGET")
+        if target:
+            env.setdefault("MACOSX_DEPLOYMENT_TARGET", str(target))
+    try:
+        code, usage = spawn_measured(cmd, env)
+    except OSError as exc:
+        msg = f"command {cmd[0]!r} failed: {exc.args[-1]}"
+        raise ExecError(msg) from exc
+    if code:
+        msg = f"command {cmd[0]!r} failed with exit code {code}"
+        raise ExecError(msg)
+    return usage
+
+
+def c_size(ext) -> int:
+    return sum(os.path.getsize(s) for s in ext.sources if s.endswith((".c", ".cpp")) and os.path.exists(s))
+
+
+def load_timings(path: str) -> DictT[str, DictT[str, float]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("modules", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def save_timings(path: str, timings: DictT[str, DictT[str, float]]):
+    ensure_state_dir(os.path.dirname(path))
+    merged = {**load_timings(path), **timings}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"modules": dict(sorted(merged.items()))}, f, indent=2)
+
+
+class CythonBuildExt(build_ext):
+    """
+    setuptools `build_ext` used by the generated setup.py whenever a hatch-cython
+    build feature needs to take part in compilation. Options are passed through
+    `configure` as plain python literals so that they survive being written into
+    setup.py.
+    """
+
+    build_options: ClassVar[dict] = {}
+    object_cache: ObjectCache = None
+    tracer: Tracer = Tracer()
+
+    @classmethod
+    def configure(cls, options: dict):
+        return type(cls.__name__, (cls,), {"build_options": options})
+
+    def run(self):
+        cache = self.build_options.get("cache")
+        if cache:
+            self.object_cache = ObjectCache(cache["directory"], cache["max_size"])
+        self.timings = {}
+        # per module resource records, see `hatch_cython.history`
+        self.resources = {}
+        self.tracer = Tracer(enabled=bool(self.build_options.get("trace")))
+        # the module being built by the current thread, for spans of compiler calls
+        self.current = threading.local()
+        try:
+            super().run()
+        finally:
+            if self.tracer.enabled:
+                self.tracer.save_events(self.build_options["trace"])
+            if self.resources and self.build_options.get("resources"):
+                with open(self.build_options["resources"], "w", encoding="utf-8") as f:
+                    json.dump(self.resources, f)
+            if self.timings and self.build_options.get("timings"):
+                save_timings(self.build_options["timings"], self.timings)
+            if self.object_cache is not None:
+                log.info(f"object cache: {self.object_cache.hits} hits, {self.object_cache.misses} misses")
+                self.object_cache.flush_stats()
+                removed, _ = self.object_cache.prune()
+                if removed:
+                    log.info(f"object cache: evicted {removed} entries")
+
+    def compiler_identity(self) -> ListStr:
+        executables = [
+            " ".join(getattr(self.compiler, attr, None) or [])
+            for attr in ("compiler_so", "compiler_cxx", "linker_so", "linker_so_cxx")
+        ]
+        first = getattr(self.compiler, "compiler_so", None)
+        version = compiler_version(first[0]) if first else type(self.compiler).__name__
+        return [*executables, version]
+
+    def translation_unit(self, ext, source: str, temp: str) -> bytes:
+        driver = getattr(self.compiler, "compiler_so", None)
+        if driver:
+            # run the compiler driver with -E rather than `compiler.preprocess`, as a
+            # user provided CPP is not guaranteed to only preprocess
+            out = os.path.join(temp, os.path.basename(source) + ".i")
+            args = [
+                *driver,
+                *preprocess_options(ext.define_macros, ext.include_dirs),
+                *(ext.extra_compile_args or []),
+                "-E",
+                source,
+                "-o",
+                out,
+            ]
+            proc = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)  # noqa: S603
+            if proc.returncode == 0 and os.path.exists(out):
+                return strip_line_markers(out)
+        # compilers without a usable preprocessor fall back to the raw source
+        return file_digest(source).encode()
+
+    def cache_key(self, ext) -> str:
+        parts = [
+            ext.name,
+            self.get_ext_filename(ext.name),
+            # in the order given: later flags override earlier ones, and some take the next one as value
+            repr(ext.extra_compile_args or []),
+            repr(ext.extra_link_args or []),
+            repr(ext.define_macros),
+            repr(ext.include_dirs),
+            repr(ext.libraries),
+            repr(ext.library_dirs),
+            repr(ext.language),
+            *(f"{k}={os.environ.get(k, '')}" for k in sorted(EnvFlags.__known__) if k != "PATH"),
+            *self.compiler_identity(),
+        ]
+        with TemporaryDirectory() as temp:
+            for source in sorted(ext.sources):
+                parts.extend((os.path.basename(source), self.translation_unit(ext, source, temp)))
+        return digest(*parts)
+
+    def build_extension(self, ext):
+        self.current.name = ext.name
+        if self.object_cache is None:
+            return super().build_extension(ext)
+
+        ext_path = self.get_ext_fullpath(ext.name)
+        with self.tracer.span("cache lookup", "build", module=ext.name):
+            key = self.cache_key(ext)
+            hit = self.object_cache.fetch(key, ext_path)
+        if hit:
+            log.info(f"object cache hit for '{ext.name}'")
+            return None
+        super().build_extension(ext)
+        self.object_cache.store(key, ext_path)
+        return None
+
+    def expected_duration(self, ext, history: DictT[str, DictT[str, float]], default: float) -> float:
+        known = history.get(ext.name)
+        if not known:
+            return default
+        return known.get("cythonize", 0.0) + known.get("compile", 0.0)
+
+    def trace_compiler(self):
+        """
+        Wraps the compiler's compile and link steps in spans attributed to the module
+        that the calling thread is building.
+        """
+        for method, stage in (("compile", "compile"), ("link_shared_object", "link")):
+            original = getattr(self.compiler, method)
+
+            def traced(*args, _original=original, _stage=stage, **kwargs):
+                with self.tracer.span(_stage, "build", module=getattr(self.current, "name", None)):
+                    return _original(*args, **kwargs)
+
+            setattr(self.compiler, method, traced)
+
+    def measure_compiler(self):
+        """
+        Runs the compiler's commands through `run_compiler`, so that the CPU time and
+        peak memory of each compiler and linker process count towards the module that
+        the calling thread is building.
+        """
+        original = self.compiler.spawn
+
+        def spawn(cmd, **kwargs):
+            usage = getattr(self.current, "usage", None)
+            if usage is None or self.compiler.dry_run or set(kwargs) - {"env"}:
+                return original(cmd, **kwargs)
+            usage.add(run_compiler(cmd, kwargs.get("env")))
+            return None
+
+        self.compiler.spawn = spawn
+
+    def build_extensions(self):
+        if self.tracer.enabled:
+            self.trace_compiler()
+        if self.build_options.get("resources") and hasattr(os, "wait4"):
+            self.measure_compiler()
+        workers = self.build_options.get("workers")
+        if workers:
+            self.check_extensions_list(self.extensions)
+            self.build_scheduled(workers)
+        elif "cythonize" in self.build_options:
+            self.check_extensions_list(self.extensions)
+            self.build_serial()
+        else:
+            super().build_extensions()
+
+    def compile_one(self, ext):
+        start = time.perf_counter()
+        # wall time is that of the whole step, the compiler processes add CPU and memory
+        self.current.usage = usage = Usage()
+        try:
+            with self.tracer.span(ext.name, "module"), self._filter_build_errors(ext):
+                self.build_extension(ext)
+        finally:
+            self.current.usage = None
+        usage.wall = time.perf_counter() - start
+        if ext.name in self.resources:
+            self.resources[ext.name]["compile"] = usage.asdict()
+        return usage.wall
+
+    def cythonized(self, ext, result) -> bool:
+        """
+        Applies the result of `cythonize_one` to the original extension object, which
+        setuptools has attached its own state to during finalize_options.
+
+        Returns:
+            bool: whether there is anything to compile
+        """
+        module, usage, began, pid = result
+        self.timings.setdefault(ext.name, {})["cythonize"] = usage.wall
+        self.tracer.complete("cythonize", began, int(usage.wall * 1e6), "build", pid=pid, module=ext.name)
+        if module is None:
+            return False
+        for attr, value in vars(module).items():
+            if not attr.startswith("_"):
+                setattr(ext, attr, value)
+        if self.build_options.get("resources"):
+            self.resources[ext.name] = {"cythonize": usage.asdict(), "c_size": c_size(ext)}
+        return True
+
+    def build_serial(self):
+        """
+        Cythonizes and compiles one extension after the other, used when the command
+        cythonizes per module (e.g. to trace each one) without a worker pool.
+        """
+        options = self.build_options.get("cythonize", {})
+        for ext in self.extensions:
+            if self.cythonized(ext, cythonize_one(ext, options)):
+                self.timings[ext.name]["compile"] = self.compile_one(ext)
+
+    def build_scheduled(self, workers: int):
+        """
+        Cythonizes extensions in a process pool and compiles each one in a thread
+        pool as soon as its C source is generated, so that compilation of one
+        module overlaps with the cythonization of others. Modules that took the
+        longest in previous builds are scheduled first to shorten the critical path;
+        modules without history are assumed to be the slowest.
+        """
+        history = load_timings(self.build_options.get("timings") or "")
+        default = max((self.expected_duration(e, history, 0.0) for e in self.extensions), default=0.0)
+        order = sorted(self.extensions, key=lambda e: -self.expected_duration(e, history, default))
+        options = self.build_options.get("cythonize", {})
+        total = len(order)
+
+        with ProcessPoolExecutor(max_workers=workers) as cythonizing:
+            with ThreadPoolExecutor(max_workers=workers) as compiling:
+                pending = {cythonizing.submit(cythonize_one, ext, options): ("cythonize", ext) for ext in order}
+                compiled = 0
+                try:
+                    while pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            stage, ext = pending.pop(fut)
+                            if stage == "cythonize":
+                                if self.cythonized(ext, fut.result()):
+                                    pending[compiling.submit(self.compile_one, ext)] = ("compile", ext)
+                            else:
+                                self.timings[ext.name]["compile"] = fut.result()
+                                compiled += 1
+                                log.info(f"[{compiled}/{total}] built '{ext.name}'")
+                except BaseException:
+                    for fut in pending:
+                        fut.cancel()
+                    raise
@@ -0,0 +1,77 @@
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+
+from hatch_cython.types import UnionT
+
+CACHE_ENV = "HATCH_CYTHON_CACHE_DIR"
+UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 1 << 10,
+    "kb": 1 << 10,
+    "m": 1 << 20,
+    "mb": 1 << 20,
+    "g": 1 << 30,
+    "gb": 1 << 30,
+    "t": 1 << 40,
+    "tb": 1 << 40,
+}
+
+
+def parse_size(size: UnionT[int, str]) -> int:
+    """Parses a human readable size into bytes
+
+    Args:
+        size (int | str): bytes, or a string such as "512MB" / "2 GB"
+
+    Raises:
+        ValueError: the size cannot be parsed
+
+    Returns:
+        int: size in bytes
+    """
+    if isinstance(size, int):
+        return size
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", str(size))
+    if m is None or m.group(2).lower() not in UNITS:
+        msg = f"'{size}' is not a valid size, use bytes or a string such as '512MB' or '2GB'"
+        raise ValueError(msg)
+    return int(float(m.group(1)) * UNITS[m.group(2).lower()])
+
+
+def default_cache_dir() -> str:
+    override = os.environ.get(CACHE_ENV)
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~\\AppData\\Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(base, "hatch-cython")
+
+
+@dataclass
+class CacheArgs:
+    enabled: bool = field(default=False)
+    directory: UnionT[str, None] = field(default=None)
+    max_size: UnionT[int, str] = field(default="2GB")
+
+    def __post_init__(self):
+        self.max_size = parse_size(self.max_size)
+
+    @property
+    def path(self) -> str:
+        return os.path.expanduser(self.directory) if self.directory else default_cache_dir()
+
+
+def parse_cache_args(val: UnionT[bool, dict]) -> CacheArgs:
+    if isinstance(val, bool):
+        return CacheArgs(enabled=val)
+    if isinstance(val, dict):
+        return CacheArgs(**{"enabled": True, **val})
+    msg = f"cache = {val!r} ({type(val)}) is invalid. use 'cache = true' or 'cache = {{ max_size = \"2GB\" }}'"
+    raise ValueError(msg)
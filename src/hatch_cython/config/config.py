@@ -1,21 +1,49 @@
+import json
 import os
+import sys
 from collections.abc import Generator
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from importlib import import_module
 from os import path
 
+from Cython import __version__ as __cythonversion__
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
 
 from hatch_cython.config.autoimport import Autoimport
+from hatch_cython.config.cache import CacheArgs, parse_cache_args
 from hatch_cython.config.defaults import brew_path, get_default_compile, get_default_link
 from hatch_cython.config.files import FileArgs
 from hatch_cython.config.flags import EnvFlags, parse_env_args
+from hatch_cython.config.heuristics import HeuristicArgs, parse_heuristic_args
+from hatch_cython.config.history import HistoryArgs, parse_history_args
+from hatch_cython.config.imports import ImportBenchArgs, parse_import_bench_args
 from hatch_cython.config.includes import parse_includes
+from hatch_cython.config.lto import LtoArgs, parse_lto_args
 from hatch_cython.config.macros import DefineMacros, parse_macros
+from hatch_cython.config.multiversion import MultiversionArgs, parse_multiversion_args
+from hatch_cython.config.pgo import PgoArgs, parse_pgo_args
 from hatch_cython.config.platform import ListedArgs, PlatformArgs, parse_platform_args
+from hatch_cython.config.selection import SelectArgs, parse_select_args
 from hatch_cython.config.templates import Templates, parse_template_kwds
-from hatch_cython.constants import DIRECTIVES, EXIST_TRIM, INCLUDE, LTPY311, MUST_UNIQUE
+from hatch_cython.constants import (
+    DEPFILE_FLAG,
+    DIRECTIVES,
+    DRIVERS,
+    EXIST_TRIM,
+    INCLUDE,
+    LTO_ENV,
+    LTPY311,
+    MUST_UNIQUE,
+    PROFILE,
+    PROFILE_DIRECTIVES,
+    PROFILE_MACROS,
+    RELEASE,
+    SUBPROCESS,
+    VARIANT_ENV,
+    VARIANTS,
+)
 from hatch_cython.types import CallableT, ListStr, UnionT
+from hatch_cython.utils import aarch, digest, plat
 
 # fields tracked by this plugin
 __known__ = frozenset(
@@ -34,6 +62,21 @@ __known__ = frozenset(
         "compiled_sdist",
         "extra_link_args",
         "cythonize_kwargs",
+        "incremental",
+        "cache",
+        "workers",
+        "driver",
+        "trace",
+        "profile_hook",
+        "history",
+        "variant",
+        "pgo",
+        "lto",
+        "shared_utility",
+        "import_bench",
+        "select",
+        "heuristics",
+        "multiversion",
     )
 )
 
@@ -55,6 +98,30 @@ def parse_from_dict(cls: BuildHookInterface):
             elif key == "templates":
                 val: dict
                 parsed: Templates = parse_template_kwds(val)
+            elif key == "cache":
+                val: dict
+                parsed: CacheArgs = parse_cache_args(val)
+            elif key == "history":
+                val: dict
+                parsed: HistoryArgs = parse_history_args(val)
+            elif key == "pgo":
+                val: dict
+                parsed: PgoArgs = parse_pgo_args(val)
+            elif key == "multiversion":
+                val: any
+                parsed: MultiversionArgs = parse_multiversion_args(val)
+            elif key == "heuristics":
+                val: any
+                parsed: HeuristicArgs = parse_heuristic_args(val)
+            elif key == "select":
+                val: any
+                parsed: SelectArgs = parse_select_args(val)
+            elif key == "import_bench":
+                val: dict
+                parsed: ImportBenchArgs = parse_import_bench_args(val)
+            elif key == "lto":
+                val: any
+                parsed: LtoArgs = parse_lto_args(val)
             else:
                 val: any
                 parsed: any = val
@@ -62,10 +129,18 @@ def parse_from_dict(cls: BuildHookInterface):
             passed.pop(key)
             continue
 
+    if os.environ.get(VARIANT_ENV):
+        kwargs["variant"] = os.environ[VARIANT_ENV]
+    if os.environ.get(LTO_ENV):
+        kwargs["lto"] = replace(kwargs.get("lto") or LtoArgs(), mode=os.environ[LTO_ENV])
+
     compile_args = parse_platform_args(kwargs, "compile_args", get_default_compile)
     link_args = parse_platform_args(kwargs, "extra_link_args", get_default_link)
     envflags = parse_env_args(kwargs)
     cfg = Config(**kwargs, compile_args=compile_args, extra_link_args=link_args, envflags=envflags)
+    if cfg.incremental:
+        # have gcc / clang report the headers each extension includes
+        cfg.compile_args.append(PlatformArgs(arg=DEPFILE_FLAG, platforms=["linux", "darwin", "freebsd"]))
 
     for maybe_dep, spec in passed.copy().items():
         is_include = maybe_dep.startswith(INCLUDE)
@@ -150,9 +225,52 @@ class Config:
     envflags: EnvFlags = field(default_factory=EnvFlags)
     compile_py: bool = field(default=True)
     templates: Templates = field(default_factory=Templates)
+    incremental: bool = field(default=False)
+    cache: CacheArgs = field(default_factory=CacheArgs)
+    workers: UnionT[int, str, None] = field(default=None)
+    driver: str = field(default=SUBPROCESS)
+    trace: UnionT[bool, str] = field(default=False)
+    profile_hook: UnionT[bool, str] = field(default=False)
+    history: HistoryArgs = field(default_factory=HistoryArgs)
+    variant: str = field(default=RELEASE)
+    pgo: PgoArgs = field(default_factory=PgoArgs)
+    lto: UnionT[LtoArgs, None] = field(default=None)
+    shared_utility: UnionT[bool, str] = field(default=False)
+    import_bench: ImportBenchArgs = field(default_factory=ImportBenchArgs)
+    select: SelectArgs = field(default_factory=SelectArgs)
+    heuristics: HeuristicArgs = field(default_factory=HeuristicArgs)
+    multiversion: MultiversionArgs = field(default_factory=MultiversionArgs)
 
     def __post_init__(self):
         self.directives = {**DIRECTIVES, **self.directives}
+        # validate eagerly so misconfiguration surfaces before the build starts
+        _ = self.worker_count
+        if self.driver not in DRIVERS:
+            msg = f"driver = {self.driver!r} is invalid. use one of {', '.join(map(repr, DRIVERS))}"
+            raise ValueError(msg)
+        if self.variant not in VARIANTS:
+            msg = f"variant = {self.variant!r} is invalid. use one of {', '.join(map(repr, VARIANTS))}"
+            raise ValueError(msg)
+        if not isinstance(self.shared_utility, bool) and not (
+            isinstance(self.shared_utility, str) and all(map(str.isidentifier, self.shared_utility.split(".")))
+        ):
+            msg = f"shared_utility = {self.shared_utility!r} is invalid. use true or a module name, e.g. 'mypkg._util'"
+            raise ValueError(msg)
+        if self.variant == PROFILE:
+            self.directives = {**self.directives, **PROFILE_DIRECTIVES}
+            defined = {name for name, _ in PROFILE_MACROS}
+            self.define_macros = [m for m in self.define_macros if m[0] not in defined] + list(PROFILE_MACROS)
+
+    @property
+    def worker_count(self) -> UnionT[int, None]:
+        if self.workers is None:
+            return None
+        if self.workers == "auto":
+            return os.cpu_count() or 1
+        if isinstance(self.workers, int) and not isinstance(self.workers, bool) and self.workers > 0:
+            return self.workers
+        msg = f"workers = {self.workers!r} is invalid. use a positive integer or 'auto'"
+        raise ValueError(msg)
 
     @property
     def compile_args_for_platform(self):
@@ -259,7 +377,8 @@ class Config:
 
         # side effect
         list(map(flush, args.values()))
-        return list({*flat})
+        # drop duplicates but keep the order, and the last of repeated flags, as that one wins
+        return list(reversed(dict.fromkeys(reversed(flat))))
 
     def asdict(self):
         d = asdict(self)
@@ -267,6 +386,38 @@ class Config:
         d["templates"] = self.templates.asdict()
         return d
 
+    def resolved_flags(self) -> dict:
+        """
+        Every resolved option that changes the compiled output of an extension,
+        independent of its sources.
+        """
+        return {
+            # order matters: the last of conflicting flags wins
+            "compile_args": list(self.compile_args_for_platform),
+            "extra_link_args": list(self.compile_links_for_platform),
+            "directives": self.directives,
+            "define_macros": self.define_macros,
+            "includes": self.includes,
+            "libraries": self.libraries,
+            "library_dirs": self.library_dirs,
+            "compile_kwargs": self.compile_kwargs,
+            "cythonize_kwargs": self.cythonize_kwargs,
+            "env": {k: self.envflags.env.get(k) for k in sorted(EnvFlags.__known__) if k != "PATH"},
+            "pgo": asdict(self.pgo) if self.pgo.enabled else None,
+            "shared_utility": self.shared_utility,
+            "lto": [self.lto.mode, self.lto.compiler] if self.lto is not None and self.lto.enabled else None,
+            "multiversion": asdict(self.multiversion) if self.multiversion.enabled else None,
+        }
+
+    def fingerprint(self) -> str:
+        return digest(
+            json.dumps(self.resolved_flags(), sort_keys=True, default=repr),
+            __cythonversion__,
+            sys.version,
+            plat(),
+            aarch(),
+        )
+
     def validate_include_opts(self):
         for opt in self.includes:
             if not path.exists(opt):
@@ -1,9 +1,8 @@
-import re
 from dataclasses import dataclass, field
 
 from hatch_cython.config.platform import PlatformBase
-from hatch_cython.types import DictT, ListT, UnionT
-from hatch_cython.utils import parse_user_glob
+from hatch_cython.types import DictT, ListStr, ListT, UnionT
+from hatch_cython.utils import GlobMatcher, parse_user_glob
 
 
 @dataclass
@@ -21,12 +20,19 @@ class FileArgs:
     targets: ListT[UnionT[str, OptInclude]] = field(default_factory=list)
     exclude: ListT[UnionT[str, OptExclude]] = field(default_factory=list)
     aliases: DictT[str, str] = field(default_factory=dict)
+    # packages whose extensions are built into one shared library each
+    bundle: ListStr = field(default_factory=list)
 
     def __post_init__(self):
+        for package in self.bundle:
+            if not isinstance(package, str) or not all(map(str.isidentifier, package.split("."))):
+                msg = f"files.bundle = {package!r} is invalid. use a package name, e.g. 'mypkg.parsers'"
+                raise ValueError(msg)
         rep = {}
         for k, v in self.aliases.items():
             rep[parse_user_glob(k)] = v
         self.aliases = rep
+        self.alias_matcher = GlobMatcher(list(self.aliases.keys()))
         self.exclude = [
             *[OptExclude(**d) for d in self.exclude if isinstance(d, dict)],
             *[OptExclude(matches=s) for s in self.exclude if isinstance(s, str)],
@@ -41,11 +47,7 @@ class FileArgs:
         return len(self.targets) > 0
 
     def matches_alias(self, other: str) -> UnionT[str, None]:
-        matched = [re.match(v, other) for v in self.aliases.keys()]
-        if any(matched):
-            first = 0
-            for ok in matched:
-                if ok:
-                    break
-                first += 1
-            return self.aliases[list(self.aliases.keys())[first]]
+        first = self.alias_matcher.match(other)
+        if first is not None:
+            return self.aliases[self.alias_matcher.patterns[first]]
+        return None
@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+
+from hatch_cython.types import UnionT
+
+
+@dataclass
+class HeuristicArgs:
+    enabled: bool = field(default=False)
+    # score below which a module is skipped, see `hatch_cython.heuristics.ModuleScore`
+    min_score: float = field(default=0.25)
+    # statements in functions and methods below which a module is skipped
+    min_statements: int = field(default=5)
+
+    def __post_init__(self):
+        if isinstance(self.min_score, bool) or not isinstance(self.min_score, (int, float)):
+            msg = f"heuristics.min_score = {self.min_score!r} is invalid. use a number, e.g. 0.25"
+            raise ValueError(msg)
+        if isinstance(self.min_statements, bool) or not isinstance(self.min_statements, int) or self.min_statements < 0:
+            msg = f"heuristics.min_statements = {self.min_statements!r} is invalid. use a non-negative integer"
+            raise ValueError(msg)
+
+
+def parse_heuristic_args(val: UnionT[bool, dict]) -> HeuristicArgs:
+    if isinstance(val, bool):
+        return HeuristicArgs(enabled=val)
+    if isinstance(val, dict):
+        return HeuristicArgs(**{"enabled": True, **val})
+    msg = f"heuristics = {val!r} ({type(val)}) is invalid. use 'heuristics = true' or '{{ min_score = 0.5 }}'"
+    raise ValueError(msg)
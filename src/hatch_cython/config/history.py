@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+
+from hatch_cython.types import UnionT
+
+
+@dataclass
+class HistoryArgs:
+    enabled: bool = field(default=False)
+    # relative growth of a module's build time or peak memory that is reported
+    threshold: float = field(default=0.25)
+    # number of builds kept in the history file
+    keep: int = field(default=20)
+
+    def __post_init__(self):
+        if isinstance(self.threshold, bool) or not isinstance(self.threshold, (int, float)) or self.threshold < 0:
+            msg = f"history.threshold = {self.threshold!r} is invalid. use a non-negative number, e.g. 0.25 for 25%"
+            raise ValueError(msg)
+        if isinstance(self.keep, bool) or not isinstance(self.keep, int) or self.keep < 1:
+            msg = f"history.keep = {self.keep!r} is invalid. use a positive integer"
+            raise ValueError(msg)
+
+
+def parse_history_args(val: UnionT[bool, dict]) -> HistoryArgs:
+    if isinstance(val, bool):
+        return HistoryArgs(enabled=val)
+    if isinstance(val, dict):
+        return HistoryArgs(**{"enabled": True, **val})
+    msg = f"history = {val!r} ({type(val)}) is invalid. use 'history = true' or 'history = {{ threshold = 0.25 }}'"
+    raise ValueError(msg)
@@ -0,0 +1,33 @@
+from dataclasses import dataclass, field
+
+from hatch_cython.types import UnionT
+
+
+@dataclass
+class ImportBenchArgs:
+    enabled: bool = field(default=False)
+    # fresh interpreters each module is imported in: the first is the cold import, the median of the rest the warm one
+    runs: int = field(default=5)
+    # relative growth of a module's warm import time over the last build that is a regression
+    threshold: float = field(default=0.25)
+    # fail the build on regressions, rather than warn
+    fail: bool = field(default=True)
+
+    def __post_init__(self):
+        if isinstance(self.runs, bool) or not isinstance(self.runs, int) or self.runs < 2:  # noqa: PLR2004
+            msg = f"import_bench.runs = {self.runs!r} is invalid. use an integer of at least 2"
+            raise ValueError(msg)
+        if isinstance(self.threshold, bool) or not isinstance(self.threshold, (int, float)) or self.threshold < 0:
+            msg = f"import_bench.threshold = {self.threshold!r} is invalid. use a non-negative number, e.g. 0.25"
+            raise ValueError(msg)
+
+
+def parse_import_bench_args(val: UnionT[bool, dict]) -> ImportBenchArgs:
+    if isinstance(val, bool):
+        return ImportBenchArgs(enabled=val)
+    if isinstance(val, dict):
+        return ImportBenchArgs(**{"enabled": True, **val})
+    msg = (
+        f"import_bench = {val!r} ({type(val)}) is invalid. use 'import_bench = true' or 'import_bench = {{ runs = 5 }}'"
+    )
+    raise ValueError(msg)
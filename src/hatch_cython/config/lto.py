@@ -0,0 +1,57 @@
+import shlex
+from dataclasses import dataclass, field
+
+from hatch_cython.types import ListStr, UnionT
+
+OFF = "off"
+THIN = "thin"
+FULL = "full"
+MODES = (OFF, THIN, FULL)
+COMPILERS = ("auto", "gcc", "clang")
+
+
+@dataclass
+class LtoArgs:
+    # "thin" or "full" link-time optimization, or "off" to build without it but still report sizes
+    mode: str = field(default=FULL)
+    # the compiler's family, which decides the flags and tools. "auto" asks the compiler
+    compiler: str = field(default="auto")
+    # command timed after the build, e.g. "python -m mypkg.bench"
+    benchmark: UnionT[str, ListStr, None] = field(default=None)
+    # runs of the benchmark, of which the fastest is reported
+    repeat: int = field(default=3)
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            msg = f"lto.mode = {self.mode!r} is invalid. use one of {', '.join(map(repr, MODES))}"
+            raise ValueError(msg)
+        if self.compiler not in COMPILERS:
+            msg = f"lto.compiler = {self.compiler!r} is invalid. use one of {', '.join(map(repr, COMPILERS))}"
+            raise ValueError(msg)
+        if self.benchmark is not None and not isinstance(self.benchmark, (str, list)):
+            msg = f"lto.benchmark = {self.benchmark!r} is invalid. use a command string or a list of arguments"
+            raise ValueError(msg)
+        if isinstance(self.repeat, bool) or not isinstance(self.repeat, int) or self.repeat < 1:
+            msg = f"lto.repeat = {self.repeat!r} is invalid. use a positive integer"
+            raise ValueError(msg)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != OFF
+
+    @property
+    def command(self) -> UnionT[ListStr, None]:
+        if self.benchmark is None:
+            return None
+        return shlex.split(self.benchmark) if isinstance(self.benchmark, str) else list(self.benchmark)
+
+
+def parse_lto_args(val: UnionT[bool, str, dict]) -> LtoArgs:
+    if isinstance(val, bool):
+        return LtoArgs(mode=FULL if val else OFF)
+    if isinstance(val, str):
+        return LtoArgs(mode=val)
+    if isinstance(val, dict):
+        return LtoArgs(**val)
+    msg = f"lto = {val!r} ({type(val)}) is invalid. use 'lto = \"thin\"' or 'lto = {{ mode = \"full\" }}'"
+    raise ValueError(msg)
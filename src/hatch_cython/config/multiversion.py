@@ -0,0 +1,42 @@
+from dataclasses import dataclass, field
+
+from hatch_cython.types import ListStr, UnionT
+
+# x86-64 microarchitecture levels, from the oldest
+LEVELS = ("x86-64-v2", "x86-64-v3", "x86-64-v4")
+
+
+@dataclass
+class MultiversionArgs:
+    # levels each extension is built for, besides its baseline build
+    levels: ListStr = field(default_factory=list)
+    # the level the regular build targets. None builds it for any x86-64 CPU
+    baseline: UnionT[str, None] = field(default=None)
+
+    def __post_init__(self):
+        if not isinstance(self.levels, list) or any(level not in LEVELS for level in self.levels):
+            msg = f"multiversion.levels = {self.levels!r} is invalid. use any of {', '.join(map(repr, LEVELS))}"
+            raise ValueError(msg)
+        if self.baseline is not None and self.baseline not in LEVELS:
+            msg = f"multiversion.baseline = {self.baseline!r} is invalid. use one of {', '.join(map(repr, LEVELS))}"
+            raise ValueError(msg)
+        # variants at or below the baseline would never be loaded
+        self.levels = [level for level in LEVELS if level in self.levels and level not in self.covered]
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.levels) != 0 or self.baseline is not None
+
+    @property
+    def covered(self) -> ListStr:
+        """The levels the baseline build runs on"""
+        return list(LEVELS[: LEVELS.index(self.baseline) + 1]) if self.baseline is not None else []
+
+
+def parse_multiversion_args(val: UnionT[ListStr, dict]) -> MultiversionArgs:
+    if isinstance(val, list):
+        return MultiversionArgs(levels=val)
+    if isinstance(val, dict):
+        return MultiversionArgs(**val)
+    msg = f"multiversion = {val!r} ({type(val)}) is invalid. use 'multiversion = [\"x86-64-v3\", \"x86-64-v4\"]'"
+    raise ValueError(msg)
@@ -0,0 +1,39 @@
+import shlex
+from dataclasses import dataclass, field
+
+from hatch_cython.types import ListStr, UnionT
+
+COMPILERS = ("auto", "gcc", "clang")
+
+
+@dataclass
+class PgoArgs:
+    enabled: bool = field(default=False)
+    # command run against the instrumented build, e.g. "python -m mypkg.bench"
+    train: UnionT[str, ListStr, None] = field(default=None)
+    # the compiler's family, which decides the flags. "auto" asks the compiler
+    compiler: str = field(default="auto")
+
+    def __post_init__(self):
+        if self.enabled and not self.train:
+            msg = "pgo.train is required. use e.g. 'pgo = { train = \"python -m mypkg.bench\" }'"
+            raise ValueError(msg)
+        if self.train is not None and not isinstance(self.train, (str, list)):
+            msg = f"pgo.train = {self.train!r} is invalid. use a command string or a list of arguments"
+            raise ValueError(msg)
+        if self.compiler not in COMPILERS:
+            msg = f"pgo.compiler = {self.compiler!r} is invalid. use one of {', '.join(map(repr, COMPILERS))}"
+            raise ValueError(msg)
+
+    @property
+    def command(self) -> ListStr:
+        return shlex.split(self.train) if isinstance(self.train, str) else list(self.train)
+
+
+def parse_pgo_args(val: UnionT[bool, dict]) -> PgoArgs:
+    if isinstance(val, bool):
+        return PgoArgs(enabled=val)
+    if isinstance(val, dict):
+        return PgoArgs(**{"enabled": True, **val})
+    msg = f"pgo = {val!r} ({type(val)}) is invalid. use 'pgo = {{ train = \"python -m mypkg.bench\" }}'"
+    raise ValueError(msg)
@@ -0,0 +1,37 @@
+from dataclasses import dataclass, field
+
+from hatch_cython.types import ListStr, UnionT
+
+
+@dataclass
+class SelectArgs:
+    # cProfile .pstats files or hotness .json files, or globs of them, relative to the project root
+    profiles: ListStr = field(default_factory=list)
+    # share of the profiled time in the project's modules above which a .py module is compiled
+    threshold: float = field(default=0.01)
+
+    def __post_init__(self):
+        if not isinstance(self.profiles, list) or not all(isinstance(p, str) for p in self.profiles):
+            msg = f"select.profiles = {self.profiles!r} is invalid. use a list of .pstats or .json paths"
+            raise ValueError(msg)
+        if isinstance(self.threshold, bool) or not isinstance(self.threshold, (int, float)):
+            msg = f"select.threshold = {self.threshold!r} is invalid. use a number, e.g. 0.01 for 1%"
+            raise ValueError(msg)
+        if not 0 <= self.threshold < 1:
+            msg = f"select.threshold = {self.threshold!r} is invalid. use a share of at least 0 and below 1"
+            raise ValueError(msg)
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.profiles) != 0
+
+
+def parse_select_args(val: UnionT[str, ListStr, dict]) -> SelectArgs:
+    if isinstance(val, str):
+        return SelectArgs(profiles=[val])
+    if isinstance(val, list):
+        return SelectArgs(profiles=val)
+    if isinstance(val, dict):
+        return SelectArgs(**val)
+    msg = f"select = {val!r} ({type(val)}) is invalid. use 'select = {{ profiles = [\"profile.pstats\"] }}'"
+    raise ValueError(msg)
@@ -1,13 +1,15 @@
+import os
 import re
 from dataclasses import asdict, dataclass, field
+from itertools import product
 from textwrap import dedent
 
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
 
 from hatch_cython.config.platform import PlatformBase
 from hatch_cython.constants import NORM_GLOB
-from hatch_cython.types import ListStr, ListT, UnionT
-from hatch_cython.utils import parse_user_glob
+from hatch_cython.types import DictT, ListStr, ListT, TupleT, UnionT
+from hatch_cython.utils import GlobMatcher, parse_user_glob
 
 
 def idx_search_mod(s: str):
@@ -17,25 +19,66 @@ def idx_search_mod(s: str):
     return s.replace("./", "")
 
 
+def warn_no_kwargs(cls: BuildHookInterface, keyword: str):
+    msg = (
+        f"'{keyword}' is defined but returns no "
+        "kwargs. To define kwargs, put "
+        f"'{keyword} = {{ abc = 1, ... }}' in your"
+        "pyproject.toml / hatch.toml"
+    )
+    cls.app.display_warning(msg)
+
+
+def matrix_suffix(value) -> str:
+    return re.sub(r"\W+", "_", str(value)).strip("_")
+
+
+def expand_matrix(outfile: str, kwds: dict, matrix: DictT[str, list]) -> ListT[TupleT[str, dict]]:
+    """
+    One (output, kwds) pair per combination of the matrix values, e.g. kernel.pyx with
+    matrix { dtype = ["int", "float"] } expands to kernel_int.pyx and kernel_float.pyx.
+    """
+    if not matrix:
+        return [(outfile, kwds)]
+    root, ext = os.path.splitext(outfile)
+    axes = ([(axis, value) for value in values] for axis, values in matrix.items())
+    expanded = []
+    seen = {}
+    for combination in product(*axes):
+        suffix = "_".join(matrix_suffix(value) for _, value in combination)
+        name = f"{root}_{suffix}{ext}"
+        values = dict(combination)
+        if name in seen:
+            msg = f"matrix values {seen[name]!r} and {values!r} both expand to '{name}'. use distinct values"
+            raise ValueError(msg)
+        seen[name] = values
+        expanded.append((name, {**kwds, **values}))
+    return expanded
+
+
 @dataclass
 class IndexItem(PlatformBase):
     keyword: str = "*"
     matches: UnionT[str, ListStr] = field(default_factory=list)
+    # expands each matching template into one output per combination of these values
+    matrix: DictT[str, list] = field(default_factory=dict)
 
     def __post_init__(self):
+        for axis, values in self.matrix.items():
+            if not isinstance(values, list) or not values:
+                msg = f"matrix '{axis} = {values!r}' is invalid. matrix values must be non-empty lists"
+                raise ValueError(msg)
         matches = self.matches
         if isinstance(matches, str):
             matches = [matches]
         for i in range(len(matches)):
             matches[i] = parse_user_glob(matches[i], r"([^.]*)", idx_search_mod)
         self.matches = sorted(matches, key=lambda it: -1 if it == NORM_GLOB else 1)
+        self.matcher = GlobMatcher(self.matches)
 
     def file_match(self, file: str) -> bool:
-        for patt in self.matches:
-            # we take the local part out since we match on extensions
-            if re.match(patt, file.replace("./", "")):
-                return True
-        return False
+        # we take the local part out since we match on extensions
+        return self.matcher.matches(file.replace("./", ""))
 
 
 class Templates:  # noqa: PLW1641
@@ -77,18 +120,40 @@ class Templates:  # noqa: PLW1641
                 if can.file_match(file) and can.applies():
                     add = self.kwargs.get(can.keyword)
                     if add is None:
-                        msg = (
-                            f"'{can.keyword}' is defined but returns no "
-                            "kwargs. To define kwargs, put "
-                            f"'{can.keyword} = {{ abc = 1, ... }}' in your"
-                            "pyproject.toml / hatch.toml"
-                        )
-                        cls.app.display_warning(msg)
+                        warn_no_kwargs(cls, can.keyword)
                     else:
                         kwds = {**kwds, **add}
         # raise ValueError(kwds, files, self.index)
         return kwds
 
+    def resolve(self, cls: BuildHookInterface, templates: ListStr) -> DictT[str, ListT[TupleT[str, dict]]]:
+        """
+        The outputs of each template (`*.in`) with their keywords, as `find(cls, output, template)`
+        returns them, checking each index item's platform / marker once rather than once per file.
+        A template matched by an item with a `matrix` has one output per combination of its values.
+        """
+        items = [can for can in self.index if can.applies()]
+        missing = []
+        resolved = {}
+        for template in templates:
+            files = (template[:-3], template)
+            kwds = {}
+            matrix = {}
+            for can in items:
+                if not any(can.file_match(file) for file in files):
+                    continue
+                matrix = {**matrix, **can.matrix}
+                add = self.kwargs.get(can.keyword)
+                if add is None:
+                    if can.keyword not in missing and not can.matrix:
+                        missing.append(can.keyword)
+                else:
+                    kwds = {**kwds, **add}
+            resolved[template] = expand_matrix(template[:-3], kwds, matrix)
+        for keyword in missing:
+            warn_no_kwargs(cls, keyword)
+        return resolved
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Templates):
             return False
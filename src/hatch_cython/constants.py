@@ -13,6 +13,40 @@ DIRECTIVES = {
 LTPY311 = "python_version < '3.11'"
 MUST_UNIQUE = ["-O", "-arch", "-march"]
 POSIX_CORE: ListT[CorePlatforms] = ["darwin", "linux"]
+STATE_DIR = ".hatch_cython"
+MANIFEST = "manifest.json"
+DEPGRAPH = "depgraph.json"
+TIMINGS = "timings.json"
+HISTORY = "history.json"
+PLAN = "plan.json"
+PGO_DIR = "pgo"
+PGO_BUILD = "pgo-build"
+LTO = "lto.json"
+IMPORTS = "imports.json"
+IMPORTS_PYCACHE = "imports-pycache"
+RENDERS = "renders.json"
+TRACE = "trace.json"
+HOOK_PROFILE = "hook.pstats"
+DEPFILE_FLAG = "-MMD"
+SUBPROCESS = "subprocess"
+INPROCESS = "inprocess"
+DRIVERS = (SUBPROCESS, INPROCESS)
+RELEASE = "release"
+PROFILE = "profile"
+VARIANTS = (RELEASE, PROFILE)
+VARIANT_ENV = "HATCH_CYTHON_VARIANT"
+LTO_ENV = "HATCH_CYTHON_LTO"
+# module name of the shared Cython utility code, in the package of the extensions
+SHARED_UTILITY = "_cyutility"
+# module name of the library a bundled package is built into
+BUNDLE = "_bundle"
+BUNDLES_DIR = "bundles"
+MULTIVERSION_DIR = "multiversion"
+ISA_ENV = "HATCH_CYTHON_ISA"
+# profile builds: cProfile / settrace hooks in every function, and line events even without the GIL
+PROFILE_DIRECTIVES = {"profile": True, "linetrace": True}
+PROFILE_MACROS = [("CYTHON_TRACE", "1"), ("CYTHON_TRACE_NOGIL", "1"), ("CYTHON_USE_SYS_MONITORING", "0")]
+PROFILE_MARKER = "HATCH_CYTHON_PROFILE_BUILD"
 
 precompiled_extensions: Set[str] = {
     # py is left out as we have it optional / runtime value
@@ -0,0 +1,173 @@
+import json
+import os
+import re
+
+from hatch_cython.types import DictT, ListStr, Set, UnionT
+from hatch_cython.utils import ensure_state_dir
+
+DEPGRAPH_VERSION = 1
+
+CIMPORT_FROM = re.compile(r"^[ \t]*from[ \t]+(\.*[\w.]*)[ \t]+cimport[ \t]+([^#\n]+)", re.MULTILINE)
+CIMPORT = re.compile(r"^[ \t]*cimport[ \t]+([^#\n]+)", re.MULTILINE)
+INCLUDE = re.compile(r"""^[ \t]*include[ \t]+["']([^"']+)["']""", re.MULTILINE)
+EXTERN = re.compile(r"""^[ \t]*cdef[ \t]+extern[ \t]+from[ \t]+["']([^"'*]+)["']""", re.MULTILINE)
+
+
+def norm(path: str) -> str:
+    return os.path.normpath(path).replace("\\", "/")
+
+
+def parse_makefile_deps(text: str) -> ListStr:
+    """Parses compiler generated (-MMD) make rules into the list of prerequisites
+
+    Args:
+        text (str): contents of a .d file
+
+    Returns:
+        ListStr: prerequisites, in order, the first being the compiled source
+    """
+    text = text.replace("\\\r\n", " ").replace("\\\n", " ")
+    deps = []
+    for line in text.splitlines():
+        # phony targets produced by -MP have no prerequisites
+        target, sep, rest = line.partition(": ")
+        if not sep or target.strip() == "":
+            continue
+        # escaped spaces in paths
+        tokens = re.split(r"(?<!\\) +", rest.strip())
+        deps.extend(t.replace("\\ ", " ") for t in tokens if t)
+    return deps
+
+
+class DependencyGraph:
+    """
+    File level dependency graph of cython sources: cimported .pxd files,
+    included .pxi files, extern headers and compiler reported C headers.
+    """
+
+    search_paths: ListStr
+    files: DictT[str, Set[str]]
+    headers: DictT[str, Set[str]]
+
+    def __init__(self, search_paths: ListStr, headers: DictT[str, Set[str]] = None):
+        if headers is None:
+            headers = {}
+        self.search_paths = [norm(p) for p in search_paths]
+        self.files = {}
+        self.headers = headers
+
+    @classmethod
+    def load(cls, path: str, search_paths: ListStr) -> "DependencyGraph":
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(search_paths)
+        if data.get("version") != DEPGRAPH_VERSION:
+            return cls(search_paths)
+        return cls(search_paths, {k: set(v) for k, v in data.get("headers", {}).items()})
+
+    def save(self, path: str):
+        ensure_state_dir(os.path.dirname(path))
+        data = {
+            "version": DEPGRAPH_VERSION,
+            "files": {k: sorted(v) for k, v in sorted(self.files.items())},
+            "headers": {k: sorted(v) for k, v in sorted(self.headers.items())},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def find(self, relative: str, *local: str):
+        for base in (*local, *self.search_paths):
+            candidate = norm(os.path.join(base, relative))
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def module_dir(self, source: str) -> str:
+        return os.path.dirname(norm(source))
+
+    def package_of(self, source: str) -> ListStr:
+        here = self.module_dir(source)
+        for base in self.search_paths:
+            if here == base or here.startswith(base + "/") or (base == "." and not os.path.isabs(here)):
+                rel = os.path.relpath(here, base)
+                return [] if rel == "." else rel.replace("\\", "/").split("/")
+        return []
+
+    def resolve_cimport(self, source: str, module: str, name: UnionT[str, None] = None):
+        level = len(module) - len(module.lstrip("."))
+        parts = [p for p in module.lstrip(".").split(".") if p]
+        if level:
+            pkg = self.package_of(source)
+            base = pkg[: len(pkg) - (level - 1)] if level > 1 else pkg
+            parts = [*base, *parts]
+        found = []
+        if name is not None:
+            # `from a cimport b` imports either the module a.b or the name b from a
+            sub = self.find("/".join([*parts, name]) + ".pxd")
+            if sub:
+                found.append(sub)
+        if parts:
+            pxd = self.find("/".join(parts) + ".pxd") or self.find("/".join([*parts, "__init__.pxd"]))
+            if pxd:
+                found.append(pxd)
+        return found
+
+    def direct(self, source: str) -> Set[str]:
+        source = norm(source)
+        deps = set()
+        root, _ = os.path.splitext(source)
+        sibling = root + ".pxd"
+        if sibling != source and os.path.isfile(sibling):
+            deps.add(sibling)
+        try:
+            with open(source, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return deps
+        here = self.module_dir(source)
+        for m in CIMPORT_FROM.finditer(text):
+            names = [n.strip().split(" ")[0] for n in m.group(2).strip("()").split(",")]
+            for name in names:
+                deps.update(self.resolve_cimport(source, m.group(1), name or None))
+        for m in CIMPORT.finditer(text):
+            for name in m.group(1).split(","):
+                deps.update(self.resolve_cimport(source, name.strip().split(" ")[0]))
+        for m in INCLUDE.finditer(text):
+            found = self.find(m.group(1), here)
+            if found:
+                deps.add(found)
+        for m in EXTERN.finditer(text):
+            found = self.find(m.group(1), here)
+            if found:
+                deps.add(found)
+        deps.discard(source)
+        return deps
+
+    def scan(self, sources: ListStr):
+        pending = [norm(s) for s in sources]
+        while pending:
+            current = pending.pop()
+            if current in self.files:
+                continue
+            deps = self.direct(current) if current.endswith((".pyx", ".pxd", ".pxi", ".py")) else set()
+            self.files[current] = deps
+            pending.extend(d for d in deps if d not in self.files)
+
+    def closure(self, sources: ListStr, module: UnionT[str, None] = None) -> ListStr:
+        self.scan(sources)
+        seen = set()
+        pending = [norm(s) for s in sources]
+        if module is not None:
+            pending.extend(self.headers.get(module, ()))
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            pending.extend(self.files.get(current, ()))
+        return sorted(seen)
+
+    def record_headers(self, module: str, headers: ListStr):
+        self.headers[module] = {norm(h) for h in headers}
@@ -0,0 +1,101 @@
+import os
+import re
+
+from hatch_cython.types import CallableT, DictT, ListStr, UnionT
+
+# constructs that make a match depend on what follows the matched text
+OPEN_ENDED = re.compile(r"\$|\\[ZbB]|\(\?[=!]")
+
+
+def prunable(pattern: str) -> bool:
+    """
+    Whether a (parsed) exclude pattern that matches a directory prefix also matches
+    everything below that directory. Patterns are applied with `re.match`, which only
+    anchors the start, so this holds unless the pattern inspects what follows its match.
+    """
+    return OPEN_ENDED.search(pattern) is None
+
+
+def suffixes(name: str) -> ListStr:
+    """
+    Index keys of a file name: its last extension, plus the last two for templates
+    (`.pyx.in`), matching how `constants` spells extensions.
+    """
+    root, last = os.path.splitext(name)
+    keys = [last]
+    if last == ".in":
+        _, inner = os.path.splitext(root)
+        if inner:
+            keys.append(inner + last)
+    return keys
+
+
+class FileIndex:
+    """
+    Files below a project directory, collected in a single `os.scandir` walk and keyed by
+    extension. Follows the conventions of `glob(recursive=True)`: hidden files and
+    directories are skipped and paths are joined onto `root` as given. Directories for
+    which `prune` returns true are not descended into.
+    """
+
+    root: str
+    prune: UnionT[CallableT[[str], bool], None]
+
+    def __init__(self, root: str, prune: UnionT[CallableT[[str], bool], None] = None):
+        self.root = root
+        self.prune = prune
+        self._files = None
+
+    def invalidate(self):
+        self._files = None
+
+    @property
+    def files(self) -> DictT[str, ListStr]:
+        if self._files is None:
+            self._files = self.scan()
+        return self._files
+
+    def scan(self) -> DictT[str, ListStr]:
+        found: DictT[str, ListStr] = {}
+        seen = set()
+        pending = [self.root]
+        while pending:
+            current = pending.pop()
+            try:
+                real = os.path.realpath(current)
+                # symlinked directories are followed, but only once
+                if real in seen:
+                    continue
+                seen.add(real)
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                path = os.path.join(current, entry.name)
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    if self.prune is None or not self.prune(path + "/"):
+                        pending.append(path)
+                    continue
+                for key in suffixes(entry.name):
+                    found.setdefault(key, []).append(path)
+        return found
+
+    def all_files(self) -> ListStr:
+        return sorted({f for files in self.files.values() for f in files})
+
+    def with_extensions(self, *exts: str) -> ListStr:
+        """Files whose name ends with any of the given extensions (`.py`, `.pyx.in`, ...)"""
+        out = set()
+        for ext in exts:
+            # splitext treats a bare ".pyx" as a hidden file name without extension
+            last = ext[ext.rfind(".") :]
+            key = ext if last == ".in" and ext != last else last
+            # `*.py` in glob does not match a file named `.py`, hidden files are already skipped
+            out.update(f for f in self.files.get(key, ()) if f.endswith(ext))
+        return sorted(out)
@@ -0,0 +1,149 @@
+import os
+from contextlib import contextmanager
+
+from Cython import Utils
+from Cython.Build import Dependencies, cythonize
+from Cython.Compiler.Errors import CompileError
+from setuptools import Extension, setup
+from setuptools.command.build_ext import build_ext
+
+from hatch_cython.command import CythonBuildExt
+from hatch_cython.config import Config
+from hatch_cython.temp import ExtensionArg, build_options
+from hatch_cython.types import DictT, ListStr, ListT, UnionT
+
+
+@contextmanager
+def patched_environ(env: DictT[str, str]):
+    """
+    Replaces os.environ for the duration of the build, as distutils reads CC, CFLAGS & co.
+    from the environment when it configures the compiler.
+    """
+    previous = os.environ.copy()
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(previous)
+
+
+def reset_cython_caches():
+    # cython memoizes dependency parsing and timestamps per interpreter, which would hide
+    # source changes between builds run in the same process
+    Dependencies._dep_tree = None
+    clear = getattr(Utils, "clear_function_caches", None)
+    if clear is not None:
+        clear()
+
+
+def extension_modules(*files: ListT[ExtensionArg], options: Config):
+    """
+    The same `Extension` objects the generated setup.py declares, built from the parsed config
+    """
+    return [
+        Extension(
+            ex.get("name"),
+            ex.get("files"),
+            extra_compile_args=options.compile_args_for_platform,
+            extra_link_args=options.compile_links_for_platform,
+            include_dirs=options.includes,
+            libraries=options.libraries,
+            library_dirs=options.library_dirs,
+            define_macros=options.define_macros,
+            **options.compile_kwargs,
+        )
+        for ex in files
+    ]
+
+
+def build_in_process(
+    *files: ListT[ExtensionArg],
+    options: Config,
+    sdist: bool,
+    build_lib: str,
+    build_temp: str,
+    state_dir: UnionT[str, None] = None,
+    trace: UnionT[str, None] = None,
+    resources: UnionT[str, None] = None,
+    force: bool = False,
+):
+    """
+    Runs cythonize and build_ext in the hook's interpreter rather than through a generated
+    setup.py, saving an interpreter start and the setuptools / Cython imports per build.
+    `force` compiles extensions whose in-place artifact is newer than their sources.
+
+    Raises:
+        Exception: compilation failed
+    """
+    opts = build_options(options, sdist, state_dir, trace, resources)
+    with patched_environ(options.envflags.env):
+        reset_cython_caches()
+        try:
+            exts = extension_modules(*files, options=options)
+            if "cythonize" not in opts:
+                exts = cythonize(
+                    exts,
+                    compiler_directives=options.directives,
+                    include_path=options.includes,
+                    **options.cythonize_kwargs,
+                )
+            if sdist:
+                return
+            setup(
+                script_name="setup.py",
+                script_args=[
+                    "build_ext",
+                    "--inplace",
+                    "--verbose",
+                    "--build-lib",
+                    build_lib,
+                    "--build-temp",
+                    build_temp,
+                    *(["--force"] if force else []),
+                ],
+                ext_modules=exts,
+                cmdclass={"build_ext": CythonBuildExt.configure(opts) if opts else build_ext},
+            )
+        except (CompileError, SystemExit) as e:
+            # setup() reports compiler & distutils errors by exiting
+            msg = "failed compilation"
+            raise Exception(msg) from e
+
+
+def generate_shared_utility(ext: ExtensionArg, options: Config):
+    """
+    Writes the C source of the shared utility module `ext`, unless this Cython version already did.
+    Done ahead of the build, as its cythonize options (e.g. annotate) do not all apply to a module without sources.
+    """
+    with patched_environ(options.envflags.env):
+        cythonize(
+            [Extension(ext["name"], ext["files"])],
+            compiler_directives=options.directives,
+            shared_utility_qualified_name=ext["name"],
+            quiet=True,
+        )
+
+
+def cythonize_sources(*files: ListT[ExtensionArg], options: Config) -> DictT[str, ListStr]:
+    """
+    Writes the C sources of `files` without compiling them, e.g. to build several into one library.
+    Returns the sources of each module: its language may be set in the module, with a distutils comment.
+
+    Raises:
+        Exception: cythonization failed
+    """
+    with patched_environ(options.envflags.env):
+        reset_cython_caches()
+        try:
+            modules = cythonize(
+                extension_modules(*files, options=options),
+                compiler_directives=options.directives,
+                include_path=options.includes,
+                **options.cythonize_kwargs,
+            )
+        except CompileError as e:
+            msg = "failed compilation"
+            raise Exception(msg) from e
+    return {module.name: list(module.sources) for module in modules}
@@ -0,0 +1,59 @@
+import os
+import re
+
+from hatch_cython.render import write_if_changed
+from hatch_cython.types import ListStr
+
+FINDER = '''"""
+Generated by hatch-cython: {purpose}
+"""
+
+import os
+import sys
+from importlib.machinery import ExtensionFileLoader
+from importlib.util import spec_from_file_location
+
+
+def extension_spec(fullname, directories, library):
+    """The spec of `fullname` from its `library` in the first of `directories` holding it, if any"""
+    for directory in directories:
+        location = os.path.join(directory, library)
+        if os.path.exists(location):
+            return spec_from_file_location(fullname, location, loader=ExtensionFileLoader(fullname, location))
+    return None
+
+
+{lookup}
+
+
+class {finder}:
+    @classmethod
+    def find_spec(cls, fullname, path=None, target=None):
+        return locate(fullname)
+
+    @classmethod
+    def invalidate_caches(cls):
+        pass
+
+
+sys.meta_path.insert(0, {finder})
+'''
+
+
+def loader_name(project: str, kind: str) -> str:
+    """The top level module that registers the finder of the `kind` of modules of `project`"""
+    return f"_{re.sub(r'[^0-9a-zA-Z_]', '_', project)}_{kind}"
+
+
+def write_finder(directory: str, project: str, kind: str, *, finder: str, purpose: str, lookup: str) -> ListStr:
+    """
+    Writes the module installing the import finder `finder` to `directory`, and the .pth file that
+    imports it at startup. `lookup` defines its `locate(fullname)`, which returns the spec of a
+    module, or None to leave it to the other finders. Returns their paths
+    """
+    module = loader_name(project, kind)
+    loader = os.path.join(directory, f"{module}.py")
+    pth = os.path.join(directory, f"{module}.pth")
+    write_if_changed(loader, FINDER.format(purpose=purpose, lookup=lookup.strip(), finder=finder))
+    write_if_changed(pth, f"import {module}\n")
+    return [loader, pth]
@@ -0,0 +1,112 @@
+import ast
+import os
+from dataclasses import dataclass, field
+
+from hatch_cython.config.heuristics import HeuristicArgs
+from hatch_cython.types import UnionT
+
+# modules that are skipped by name, whatever their code
+NO_GAIN = {
+    "__init__": "package initializer",
+    "__about__": "package metadata",
+    "_version": "package metadata",
+    "__main__": "entry point, runs once",
+}
+# a loop runs its body many times, which is where compiled code gains most
+LOOP_WEIGHT = 3
+# attribute access is a dictionary lookup either way, and gains little
+ATTRIBUTE_WEIGHT = 0.5
+
+DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+LOOPS = (ast.For, ast.AsyncFor, ast.While, ast.comprehension)
+ARITHMETIC = (ast.BinOp, ast.AugAssign, ast.Compare)
+IMPORTS = (ast.Import, ast.ImportFrom)
+ASSIGNMENTS = (ast.Assign, ast.AnnAssign)
+
+
+@dataclass
+class ModuleScore:
+    """What the code in the functions and methods of a module does, which runs after its import"""
+
+    loops: int = field(default=0)
+    arithmetic: int = field(default=0)
+    attributes: int = field(default=0)
+    statements: int = field(default=0)
+
+    @property
+    def score(self) -> float:
+        if not self.statements:
+            return 0.0
+        return (LOOP_WEIGHT * self.loops + self.arithmetic - ATTRIBUTE_WEIGHT * self.attributes) / self.statements
+
+    def describe(self) -> str:
+        return (
+            f"{self.loops} loops, {self.arithmetic} arithmetic, {self.attributes} attribute accesses "
+            f"in {self.statements} statements"
+        )
+
+
+def score_module(tree: ast.Module) -> ModuleScore:
+    score = ModuleScore()
+    for definition in (node for node in tree.body if isinstance(node, DEFINITIONS)):
+        for node in ast.walk(definition):
+            if isinstance(node, ast.stmt) and node is not definition and not isinstance(node, DEFINITIONS):
+                score.statements += 1
+            if isinstance(node, LOOPS):
+                score.loops += 1
+            elif isinstance(node, ARITHMETIC) or (
+                isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Invert))
+            ):
+                score.arithmetic += 1
+            elif isinstance(node, ast.Attribute):
+                score.attributes += 1
+    return score
+
+
+def is_docstring(node: ast.stmt) -> bool:
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+
+def _targets(node: ast.stmt):
+    return node.targets if isinstance(node, ast.Assign) else [node.target]
+
+
+def classify(tree: ast.Module) -> UnionT[str, None]:
+    """Why a module without functions or classes gains nothing from compilation: its code runs once"""
+    body = [node for node in tree.body if not is_docstring(node)]
+    if any(isinstance(node, DEFINITIONS) for node in body):
+        return None
+    if not body:
+        return "empty"
+    exports = (
+        isinstance(node, IMPORTS)
+        or (isinstance(node, ASSIGNMENTS) and any(getattr(t, "id", None) == "__all__" for t in _targets(node)))
+        for node in body
+    )
+    if all(exports):
+        return "re-exports only"
+    if all(isinstance(node, (*IMPORTS, *ASSIGNMENTS)) for node in body):
+        return "constants only"
+    return "no functions, runs once at import"
+
+
+def analyze(path: str, args: HeuristicArgs) -> UnionT[str, None]:
+    """Why the module at `path` is skipped, or None if it is worth compiling"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name in NO_GAIN:
+        return NO_GAIN[name]
+    try:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+    except (SyntaxError, UnicodeDecodeError, ValueError):
+        # left to Cython to report
+        return None
+    reason = classify(tree)
+    if reason is not None:
+        return reason
+    score = score_module(tree)
+    if score.statements < args.min_statements:
+        return f"small: {score.describe()}"
+    if score.score < args.min_score:
+        return f"score {score.score:.2f} below {args.min_score} ({score.describe()})"
+    return None
@@ -0,0 +1,232 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from statistics import median
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+from hatch_cython.types import DictT, ListStr, ListT, TupleT, UnionT
+from hatch_cython.utils import ensure_state_dir
+
+HISTORY_VERSION = 1
+# number of previous records of a module that its baseline is the median of
+RECENT = 5
+# growth below these is noise, whatever the relative change
+MIN_SECONDS = 0.1
+MIN_KIB = 1024
+# linux: writing 5 to clear_refs resets the peak RSS (VmHWM) of the process
+CLEAR_REFS = "/proc/self/clear_refs"
+STATUS = "/proc/self/status"
+
+ModuleRecord = DictT[str, Any]
+
+
+@dataclass
+class Usage:
+    """Resources used by a build step: wall and CPU seconds, peak RSS in KiB"""
+
+    wall: float = field(default=0.0)
+    cpu: float = field(default=0.0)
+    rss: int = field(default=0)
+
+    def add(self, other: "Usage"):
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.rss = max(self.rss, other.rss)
+
+    def asdict(self) -> DictT[str, float]:
+        return {"wall": round(self.wall, 4), "cpu": round(self.cpu, 4), "rss": self.rss}
+
+
+def maxrss_kib(usage) -> int:
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def reset_peak_rss() -> bool:
+    try:
+        with open(CLEAR_REFS, "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss() -> int:
+    try:
+        with open(STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    return maxrss_kib(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def cpu_seconds() -> float:
+    if resource is None:
+        return time.process_time()
+    usage = resource.getrusage(getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF))
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def measured(usage: Usage):
+    """
+    Adds the resources used by the calling thread in the enclosed block to usage. The
+    peak RSS is that of the block where it can be reset (linux), otherwise it is the
+    peak of the process so far.
+    """
+    reset_peak_rss()
+    start, cpu = time.perf_counter(), cpu_seconds()
+    try:
+        yield usage
+    finally:
+        usage.add(Usage(time.perf_counter() - start, cpu_seconds() - cpu, peak_rss()))
+
+
+def exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def spawn_measured(cmd: ListStr, env: UnionT[dict, None] = None) -> TupleT[int, Usage]:
+    """Runs cmd, returning its exit code and the resources used by the process"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env)  # noqa: S603
+    if not hasattr(os, "wait4"):
+        return proc.wait(), Usage(wall=time.perf_counter() - start)
+    _, status, usage = os.wait4(proc.pid, 0)
+    # the child is reaped already, so Popen must not wait for it again
+    proc.returncode = exit_code(status)
+    return proc.returncode, Usage(time.perf_counter() - start, usage.ru_utime + usage.ru_stime, maxrss_kib(usage))
+
+
+def build_seconds(record: ModuleRecord) -> float:
+    return sum(record.get(stage, {}).get("wall", 0.0) for stage in ("cythonize", "compile"))
+
+
+def peak_kib(record: ModuleRecord) -> int:
+    return max(record.get(stage, {}).get("rss", 0) for stage in ("cythonize", "compile"))
+
+
+def slowest(modules: DictT[str, ModuleRecord], count: int = 10) -> ListT[TupleT[str, ModuleRecord]]:
+    return sorted(modules.items(), key=lambda item: -build_seconds(item[1]))[:count]
+
+
+def describe(name: str, record: ModuleRecord) -> str:
+    stages = [
+        f"{stage} {u['wall']:.2f}s (cpu {u['cpu']:.2f}s, peak {u['rss'] / 1024:.1f} MiB)"
+        for stage, u in ((s, record.get(s)) for s in ("cythonize", "compile"))
+        if u
+    ]
+    return f"{name}: {', '.join(stages)}, {record.get('c_size', 0) / 1024:.0f} KiB of C"
+
+
+METRICS = (
+    ("build time", build_seconds, MIN_SECONDS),
+    ("peak memory", peak_kib, MIN_KIB),
+)
+
+
+@dataclass(frozen=True)
+class Regression:
+    module: str
+    metric: str
+    before: float
+    after: float
+
+    @property
+    def growth(self) -> float:
+        return self.after / self.before - 1
+
+    def format(self, value: float) -> str:
+        if self.metric == "peak memory":
+            return f"{value / 1024:.1f} MiB"
+        return f"{value:.2f}s"
+
+    def __str__(self) -> str:
+        return (
+            f"{self.module}: {self.metric} {self.format(self.before)} -> {self.format(self.after)} (+{self.growth:.0%})"
+        )
+
+
+class BuildHistory:
+    """
+    Resources used to build each module in previous builds, oldest first. Each build is
+    a mapping of module name to its record: `cythonize` and `compile` usage, and the
+    size of the generated C in bytes.
+    """
+
+    path: str
+    keep: int
+    builds: ListT[dict]
+
+    def __init__(self, path: str, keep: int = 20):
+        self.path = path
+        self.keep = keep
+        self.builds = self.load()
+
+    def load(self) -> ListT[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != HISTORY_VERSION:
+                return []
+            return list(data["builds"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return []
+
+    def save(self):
+        ensure_state_dir(os.path.dirname(self.path))
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": HISTORY_VERSION, "builds": self.builds[-self.keep :]}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def record(self, modules: DictT[str, ModuleRecord], when: UnionT[float, None] = None):
+        self.builds.append({"time": time.time() if when is None else when, "modules": modules})
+        del self.builds[: -self.keep]
+
+    def previous(self, name: str) -> ListT[ModuleRecord]:
+        return [b["modules"][name] for b in self.builds if name in b.get("modules", {})]
+
+    def baseline(self, name: str, metric) -> UnionT[float, None]:
+        records = self.previous(name)[-RECENT:]
+        if not records:
+            return None
+        return median(metric(r) for r in records)
+
+    def estimate(self, names: ListStr, workers: int = 1) -> TupleT[float, int]:
+        """
+        Expected wall time to build the named modules, and how many of them have a
+        history. Modules without one are assumed to take the mean of those with one.
+        """
+        known = [s for s in (self.baseline(n, build_seconds) for n in names) if s is not None]
+        if not known:
+            return 0.0, 0
+        total = sum(known) + (len(names) - len(known)) * sum(known) / len(known)
+        return max(total / max(workers, 1), *known), len(known)
+
+    def regressions(self, modules: DictT[str, ModuleRecord], threshold: float) -> ListT[Regression]:
+        """Metrics of the given records that grew more than threshold over their baseline"""
+        found = []
+        for name, record in sorted(modules.items()):
+            for metric, measure, floor in METRICS:
+                before, after = self.baseline(name, measure), measure(record)
+                if not before or after - before < floor:
+                    continue
+                if after > before * (1 + threshold):
+                    found.append(Regression(name, metric, before, after))
+        return found
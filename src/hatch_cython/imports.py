@@ -0,0 +1,135 @@
+import json
+import os
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from statistics import median
+
+from hatch_cython.types import DictT, ListStr, ListT, UnionT
+from hatch_cython.utils import ensure_state_dir
+
+IMPORTS_VERSION = 1
+# warm imports of small modules take a fraction of a millisecond, where a few scheduler
+# or page cache hiccups double the median; a regression must also add this many ms
+MIN_MS = 0.5
+
+# imports `module` from its Python source, even though its extension would be found first
+PURE = """
+import os
+import sys
+from importlib.util import spec_from_file_location
+
+
+class SourceFinder:
+    @classmethod
+    def find_spec(cls, fullname, path=None, target=None):
+        if fullname != {module!r}:
+            return None
+        package = [os.path.dirname({source!r})] if {source!r}.endswith("__init__.py") else None
+        return spec_from_file_location(fullname, {source!r}, submodule_search_locations=package)
+
+
+sys.meta_path.insert(0, SourceFinder)
+import {module}
+"""
+
+
+def parse_importtime(output: str, module: str) -> UnionT[float, None]:
+    """The cumulative import time of `module`, in ms, from the report of -X importtime"""
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) == 3 and parts[2].strip() == module:  # noqa: PLR2004
+            try:
+                return int(parts[1]) / 1000
+            except ValueError:
+                return None
+    return None
+
+
+def time_import(module: str, env: dict, source: UnionT[str, None] = None) -> float:
+    """Imports `module` in a fresh interpreter, from its Python `source` if given. Returns its import time in ms"""
+    code = f"import {module}" if source is None else PURE.format(module=module, source=source)
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=False
+    )
+    if process.returncode:
+        msg = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit {process.returncode}"
+        raise RuntimeError(msg)
+    elapsed = parse_importtime(process.stderr, module)
+    if elapsed is None:
+        msg = f"{module} is not in the -X importtime report"
+        raise RuntimeError(msg)
+    return elapsed
+
+
+@dataclass
+class ImportTiming:
+    """Import times of a compiled module in ms, and the size of its library in bytes"""
+
+    cold: float
+    warm: float
+    size: int
+    # the same, imported from its Python source
+    pure_cold: UnionT[float, None] = field(default=None)
+    pure_warm: UnionT[float, None] = field(default=None)
+
+
+def measure(module: str, library: str, runs: int, env: dict, source: UnionT[str, None] = None) -> ImportTiming:
+    """
+    Imports `module` in `runs` fresh interpreters. The first import is the cold one, which loads
+    the library from disk; the median of the others is the warm import time.
+    """
+    times = [time_import(module, env) for _ in range(runs)]
+    timing = ImportTiming(cold=times[0], warm=median(times[1:]), size=os.path.getsize(library))
+    if source is not None:
+        pure = [time_import(module, env, source) for _ in range(runs)]
+        timing.pure_cold, timing.pure_warm = pure[0], median(pure[1:])
+    return timing
+
+
+def describe_timing(module: str, timing: ImportTiming) -> str:
+    line = f"{timing.cold:8.2f}ms cold {timing.warm:8.2f}ms warm {timing.size / 1024:8.1f} KiB  {module}"
+    if timing.pure_warm is not None:
+        line += f" (python: {timing.pure_cold:.2f}ms cold, {timing.pure_warm:.2f}ms warm)"
+    return line
+
+
+class ImportResults:
+    """The import times of the compiled modules of the last build, which the next build is compared to"""
+
+    path: str
+    modules: DictT[str, dict]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.modules = self.load()
+
+    def load(self) -> DictT[str, dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != IMPORTS_VERSION:
+                return {}
+            return dict(data["modules"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+    def save(self):
+        ensure_state_dir(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": IMPORTS_VERSION, "modules": self.modules}, f, indent=2, sort_keys=True)
+
+    def record(self, timings: DictT[str, ImportTiming]):
+        self.modules = {module: asdict(timing) for module, timing in timings.items()}
+
+    def regressions(self, timings: DictT[str, ImportTiming], threshold: float) -> ListStr:
+        """Modules whose warm import time grew by more than `threshold` since the last build"""
+        found: ListT[str] = []
+        for module, timing in sorted(timings.items()):
+            before = self.modules.get(module, {}).get("warm")
+            if not before or timing.warm - before < MIN_MS or timing.warm / before - 1 <= threshold:
+                continue
+            found.append(f"{module}: {before:.2f}ms -> {timing.warm:.2f}ms (+{timing.warm / before - 1:.0%})")
+        return found
@@ -0,0 +1,156 @@
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sysconfig
+import time
+from tempfile import TemporaryDirectory
+
+from hatch_cython.config.lto import FULL, OFF, THIN
+from hatch_cython.constants import LTO_ENV
+from hatch_cython.pgo import CLANG, GCC, Flags, compiler_command
+from hatch_cython.types import DictT, ListStr, UnionT
+from hatch_cython.utils import ensure_state_dir
+
+PROBE = "int hatch_cython_lto_probe(int x) { return x + 1; }\n"
+
+
+def lto_flags(compiler: str, mode: str) -> Flags:
+    """Compile and link flags of `mode` LTO, which must be the same on both steps"""
+    if compiler == CLANG:
+        flag = f"-flto={THIN if mode == THIN else FULL}"
+        return [flag], [flag]
+    # gcc has no ThinLTO: its default, partitioned mode is the parallel one, and "full" optimizes
+    # the whole extension as one unit. auto runs the link-time jobs through make's jobserver, or on every core
+    if mode == FULL:
+        return ["-flto=auto"], ["-flto=auto", "-flto-partition=one"]
+    return ["-flto=auto"], ["-flto=auto"]
+
+
+def archiver(compiler: str, env: dict) -> UnionT[str, None]:
+    """The archiver that loads the compiler's LTO plugin: gcc-ar or llvm-ar, of the same prefix and version"""
+    name = os.path.basename(compiler_command(env)[0])
+    if compiler == GCC:
+        candidates = [name.replace("gcc", "gcc-ar", 1) if "gcc" in name else "gcc-ar", "gcc-ar"]
+    else:
+        candidates = [name.replace("clang", "llvm-ar", 1) if "clang" in name else "llvm-ar", "llvm-ar"]
+    for candidate in candidates:
+        found = shutil.which(candidate, path=env.get("PATH"))
+        if found:
+            return found
+    return None
+
+
+def shared_linker(env: dict) -> ListStr:
+    return shlex.split(env.get("LDSHARED") or sysconfig.get_config_var("LDSHARED") or "cc -shared")
+
+
+def linker_with_compiler(env: dict) -> UnionT[str, None]:
+    """
+    LDSHARED linking with the compiler driver in CC, when Python was built with another one: the
+    link step must run the compiler that wrote the LTO objects. None if it already does
+    """
+    compiler = compiler_command(env)
+    linker = shared_linker(env)
+    if os.path.basename(linker[0]) == os.path.basename(compiler[0]):
+        return None
+    return shlex.join([*compiler, *linker[1:]])
+
+
+def probe(flags: Flags, env: dict) -> UnionT[str, None]:
+    """Compiles and links a shared library with `flags`. Returns the toolchain's output if that failed"""
+    compile_args, link_args = flags
+    with TemporaryDirectory() as temp:
+        source = os.path.join(temp, "probe.c")
+        obj = os.path.join(temp, "probe.o")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(PROBE)
+        for command in (
+            [*compiler_command(env), *compile_args, "-fPIC", "-c", source, "-o", obj],
+            [*shared_linker(env), *link_args, obj, "-o", os.path.join(temp, "probe.so")],
+        ):
+            try:
+                process = subprocess.run(command, capture_output=True, text=True, env=env, check=False)  # noqa: S603
+            except OSError as e:
+                return str(e)
+            if process.returncode:
+                return (process.stdout + process.stderr).strip() or f"{command[0]} exited {process.returncode}"
+    return None
+
+
+def time_command(command: ListStr, repeat: int, cwd: str, env: dict) -> float:
+    """The fastest of `repeat` runs of `command`, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(command, cwd=cwd, env=env, check=False)  # noqa: S603
+        elapsed = time.perf_counter() - start
+        if process.returncode:
+            msg = f"lto benchmark command exited with status {process.returncode}"
+            raise Exception(msg)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def relative(value: float, baseline: float) -> str:
+    return f"{(value - baseline) / baseline:+.1%}" if baseline else "n/a"
+
+
+class LtoResults:
+    """
+    The extension sizes and benchmark time of the last build of each LTO mode, which
+    builds of the other modes are compared to.
+    """
+
+    path: str
+    modes: DictT[str, dict]
+
+    def __init__(self, path: str, modes: DictT[str, dict] = None):
+        if modes is None:
+            modes = {}
+        self.path = path
+        self.modes = modes
+
+    @classmethod
+    def load(cls, path: str) -> "LtoResults":
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(path, json.load(f))
+        except (OSError, ValueError):
+            return cls(path)
+
+    def save(self):
+        ensure_state_dir(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.modes, f, indent=2, sort_keys=True)
+
+    def record(self, mode: str, sizes: DictT[str, int], benchmark: UnionT[float, None]):
+        self.modes[mode] = {"sizes": sizes, "benchmark": benchmark}
+
+    def report(self, mode: str) -> ListStr:
+        """Total size and benchmark time of `mode`, relative to the last build without LTO"""
+        current = self.modes[mode]
+        baseline = self.modes.get(OFF) if mode != OFF else None
+        total = sum(current["sizes"].values())
+        line = f"lto ({mode}): extensions {total / 1024:.1f} KiB"
+        if baseline is not None:
+            line += f" ({relative(total, sum(baseline['sizes'].values()))} vs off)"
+        lines = [line]
+        if current["benchmark"] is not None:
+            line = f"lto ({mode}): benchmark {current['benchmark']:.3f}s"
+            if baseline is not None and baseline.get("benchmark") is not None:
+                line += f" ({relative(current['benchmark'], baseline['benchmark'])} vs off)"
+            lines.append(line)
+        if baseline is None and mode != OFF:
+            lines.append(f"lto ({mode}): build with {LTO_ENV}=off to record the baseline it is compared to")
+        return lines
+
+    def module_deltas(self, mode: str) -> ListStr:
+        baseline = self.modes.get(OFF, {}).get("sizes", {})
+        lines = []
+        for name, size in sorted(self.modes[mode]["sizes"].items()):
+            before = baseline.get(name)
+            delta = f" ({relative(size, before)})" if before and mode != OFF else ""
+            lines.append(f"{size / 1024:10.1f} KiB {name}{delta}")
+        return lines
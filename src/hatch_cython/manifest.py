@@ -0,0 +1,71 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+
+from hatch_cython.types import DictT, ListStr
+from hatch_cython.utils import ensure_state_dir
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    digest: str
+    artifacts: ListStr = field(default_factory=list)
+
+
+class BuildManifest:
+    """
+    Persistent record of the last successful build of each extension, keyed by
+    module name. An extension is fresh when its digest is unchanged and every
+    artifact it produced is still on disk.
+    """
+
+    path: str
+    entries: DictT[str, ManifestEntry]
+
+    def __init__(self, path: str, entries: DictT[str, ManifestEntry] = None):
+        if entries is None:
+            entries = {}
+        self.path = path
+        self.entries = entries
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        entries = {name: ManifestEntry(**entry) for name, entry in data.get("entries", {}).items()}
+        return cls(path, entries)
+
+    def save(self):
+        ensure_state_dir(os.path.dirname(self.path))
+        data = {
+            "version": MANIFEST_VERSION,
+            "entries": {name: asdict(entry) for name, entry in sorted(self.entries.items())},
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def is_fresh(self, name: str, digest: str) -> bool:
+        entry = self.entries.get(name)
+        if entry is None or entry.digest != digest:
+            return False
+        return len(entry.artifacts) != 0 and all(os.path.exists(a) for a in entry.artifacts)
+
+    def record(self, name: str, digest: str, artifacts: ListStr):
+        self.entries[name] = ManifestEntry(digest=digest, artifacts=list(artifacts))
+
+    def discard(self, name: str):
+        self.entries.pop(name, None)
+
+    def clear(self):
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,147 @@
+import os
+import re
+
+from hatch_cython.config.multiversion import LEVELS
+from hatch_cython.finder import write_finder
+from hatch_cython.pgo import Flags
+from hatch_cython.render import write_if_changed
+from hatch_cython.types import DictT, ListStr, ListT, TupleT, UnionT
+
+# CPU features of each level, as /proc/cpuinfo names them. Each level has those of the previous one
+FEATURES: DictT[str, ListStr] = {
+    "x86-64-v2": ["cx16", "lahf_lm", "popcnt", "sse4_1", "sse4_2", "ssse3"],
+    "x86-64-v3": ["abm", "avx", "avx2", "bmi1", "bmi2", "f16c", "fma", "movbe", "xsave"],
+    "x86-64-v4": ["avx512bw", "avx512cd", "avx512dq", "avx512f", "avx512vl"],
+}
+VARIANT = re.compile(r"__x86_64_v\d$")
+
+LOOKUP = '''
+# level -> CPU features it requires, from the oldest
+LEVELS = {levels!r}
+# the level the regular libraries are built for, None for any x86-64 CPU
+BASELINE = {baseline!r}
+# module -> (its package, file name of its library for each level, best first, file name of its Python source)
+MODULES = {modules!r}
+# set to a level to load no better one, or to "none" to load the regular libraries
+ENV = {env!r}
+# feature names macOS reports differently
+ALIASES = {{"avx1.0": "avx", "lahf": "lahf_lm", "lzcnt": "abm", "sse4.1": "sse4_1", "sse4.2": "sse4_2"}}
+SUPPORTED = []
+
+
+def cpu_features():
+    """The CPU's features, or None where they are unknown"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/cpuinfo", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("flags"):
+                        return set(line.split(":", 1)[1].split())
+        except OSError:
+            pass
+    elif sys.platform == "darwin":
+        # only imported where it is used, the finder is imported at every startup
+        import subprocess
+
+        keys = ["machdep.cpu.features", "machdep.cpu.leaf7_features", "machdep.cpu.extfeatures"]
+        try:
+            output = subprocess.run(["sysctl", "-n", *keys], capture_output=True, text=True, check=False).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return {{ALIASES.get(feature, feature) for feature in output.lower().split()}} or None
+    return None
+
+
+def supported():
+    """The levels this CPU runs"""
+    if not SUPPORTED:
+        names = list(LEVELS)
+        forced = os.environ.get(ENV)
+        features = cpu_features()
+        if forced:
+            levels = names[: names.index(forced) + 1] if forced in names else []
+        elif features is None:
+            # trust the wheel was installed where its baseline runs
+            levels = names[: names.index(BASELINE) + 1] if BASELINE else []
+        else:
+            levels = [level for level in names if set(LEVELS[level]) <= features]
+        SUPPORTED.append(set(levels))
+    return SUPPORTED[0]
+
+
+def locate(fullname):
+    located = MODULES.get(fullname)
+    if located is None:
+        return None
+    package, variants, source = located
+    # the package of a module is imported before it
+    directories = (getattr(sys.modules.get(package), "__path__", None) or []) if package else sys.path
+    levels = supported()
+    for level, library in variants:
+        if level in levels:
+            spec = extension_spec(fullname, directories, library)
+            if spec is not None:
+                return spec
+    if BASELINE is None or BASELINE in levels:
+        # the regular library
+        return None
+    for directory in directories if source else []:
+        location = os.path.join(directory, source)
+        if os.path.exists(location):
+            return spec_from_file_location(fullname, location)
+    msg = f"{{fullname}} is built for {{BASELINE}}, which this CPU does not support"
+    raise ImportError(msg)
+'''
+
+
+def march_flags(level: str) -> Flags:
+    # the link step compiles too, under LTO
+    return [f"-march={level}"], [f"-march={level}"]
+
+
+def variant_name(module: str, level: str) -> str:
+    """The name the library of `module` for `level` is built under. It still defines the module's own `PyInit_`"""
+    return f"{module}__{level.replace('-', '_')}"
+
+
+def is_variant(name: str) -> bool:
+    return VARIANT.search(name) is not None
+
+
+def write_wrappers(directory: str, module: str, sources: ListStr) -> ListStr:
+    """
+    Writes a source that includes each of `sources`, so that the variants of `module`
+    compile to their own objects. Includes still resolve next to the original sources.
+    """
+    wrappers = []
+    for source in sources:
+        wrapper = os.path.join(directory, module, os.path.basename(source))
+        os.makedirs(os.path.dirname(wrapper), exist_ok=True)
+        write_if_changed(wrapper, f'#include "{os.path.abspath(source).replace(os.sep, "/")}"\n')
+        wrappers.append(wrapper)
+    return wrappers
+
+
+def write_isa_loader(
+    directory: str,
+    project: str,
+    modules: DictT[str, TupleT[str, ListT[TupleT[str, str]], UnionT[str, None]]],
+    baseline: UnionT[str, None],
+    env: str,
+) -> ListStr:
+    """
+    Writes the finder module of the multiversioned `modules` and the .pth file that imports
+    it at startup to `directory`. Returns their paths
+    """
+    levels = {
+        level: sorted(f for known in LEVELS[: LEVELS.index(level) + 1] for f in FEATURES[known]) for level in LEVELS
+    }
+    return write_finder(
+        directory,
+        project,
+        "isa",
+        finder="MultiversionFinder",
+        purpose="imports each multiversioned module from its library built for the\n"
+        "best x86-64 level this CPU supports.",
+        lookup=LOOKUP.format(levels=levels, baseline=baseline, modules=dict(sorted(modules.items())), env=env),
+    )
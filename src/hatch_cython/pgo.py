@@ -0,0 +1,112 @@
+import glob
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sysconfig
+
+from hatch_cython.types import ListStr, TupleT, UnionT
+
+GCC = "gcc"
+CLANG = "clang"
+PROFDATA = "default.profdata"
+PGO_STATE = "pgo.json"
+
+Flags = TupleT[ListStr, ListStr]
+
+
+def compiler_command(env: dict) -> ListStr:
+    return shlex.split(env.get("CC") or sysconfig.get_config_var("CC") or "cc")
+
+
+def detect_compiler(env: dict) -> UnionT[str, None]:
+    """The family of the C compiler setuptools uses: gcc, clang, or None if it is neither (e.g. MSVC)"""
+    try:
+        out = subprocess.run(  # noqa: S603
+            [*compiler_command(env)[:1], "--version"], capture_output=True, text=True, env=env, check=False
+        ).stdout
+    except OSError:
+        return None
+    if "clang" in out:
+        return CLANG
+    if "gcc" in out or "Free Software Foundation" in out:
+        return GCC
+    return None
+
+
+def generate_flags(directory: str) -> Flags:
+    """Compile and link flags of the instrumented build, writing its profiles to `directory`"""
+    flag = f"-fprofile-generate={directory}"
+    return [flag], [flag]
+
+
+def use_flags(compiler: str, directory: str) -> Flags:
+    """Compile and link flags of the build optimized with the profiles in `directory`"""
+    if compiler == CLANG:
+        flag = f"-fprofile-use={os.path.join(directory, PROFDATA)}"
+        return [flag, "-Wno-profile-instr-unprofiled", "-Wno-profile-instr-out-of-date"], [flag]
+    flag = f"-fprofile-use={directory}"
+    # modules the training did not import have no profile, and counters of threaded code may be off
+    return [flag, "-fprofile-correction", "-Wno-missing-profile"], [flag]
+
+
+def find_profdata(env: dict) -> UnionT[ListStr, None]:
+    if env.get("LLVM_PROFDATA"):
+        return shlex.split(env["LLVM_PROFDATA"])
+    found = shutil.which("llvm-profdata", path=env.get("PATH"))
+    if found:
+        return [found]
+    if shutil.which("xcrun", path=env.get("PATH")):
+        return ["xcrun", "llvm-profdata"]
+    return None
+
+
+def merge_profiles(compiler: str, directory: str, env: dict):
+    """clang writes raw profiles, which must be merged before they are used. gcc's are used as is"""
+    if compiler != CLANG:
+        return
+    raw = sorted(glob.glob(os.path.join(directory, "*.profraw")))
+    if not raw:
+        msg = f"the training run wrote no profiles to {directory}"
+        raise RuntimeError(msg)
+    profdata = find_profdata(env)
+    if profdata is None:
+        msg = "llvm-profdata was not found. install it, or set LLVM_PROFDATA to its path"
+        raise RuntimeError(msg)
+    subprocess.run(  # noqa: S603
+        [*profdata, "merge", f"-output={os.path.join(directory, PROFDATA)}", *raw], env=env, check=True
+    )
+
+
+class PgoProfiles:
+    """
+    The profiles of the last training run, in `directory`, with the key of the sources,
+    flags and training command they were collected for.
+    """
+
+    directory: str
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @property
+    def state(self) -> str:
+        return os.path.join(self.directory, PGO_STATE)
+
+    def is_fresh(self, key: str) -> bool:
+        try:
+            with open(self.state, encoding="utf-8") as f:
+                return json.load(f).get("key") == key
+        except (OSError, ValueError):
+            return False
+
+    def reset(self):
+        """Removes the profiles, so that the next training run does not add to stale counters"""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+
+    def record(self, key: str, compiler: str):
+        with open(self.state, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "compiler": compiler}, f)
@@ -0,0 +1,145 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from types import MappingProxyType
+
+from hatch_cython.temp import ExtensionArg
+from hatch_cython.types import DictT, TupleT
+from hatch_cython.utils import ensure_state_dir
+
+PLAN_VERSION = 1
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class ExtensionPlan:
+    name: str
+    files: TupleT[str, ...]
+
+    def arg(self) -> ExtensionArg:
+        return ExtensionArg(name=self.name, files=list(self.files))
+
+
+@dataclass(frozen=True)
+class PlanDiff:
+    added: TupleT[str, ...] = field(default=())
+    removed: TupleT[str, ...] = field(default=())
+    changed: TupleT[str, ...] = field(default=())
+    flags: TupleT[str, ...] = field(default=())
+
+    @property
+    def empty(self):
+        return not (self.added or self.removed or self.changed or self.flags)
+
+    def __str__(self) -> str:
+        parts = [f"{k}: {', '.join(v)}" for k, v in asdict(self).items() if v]
+        return "; ".join(parts) if parts else "no changes"
+
+
+@dataclass(frozen=True)
+class BuildPlan:
+    """
+    Everything a hook run decided before compiling: the extensions and their sources,
+    the templates that were rendered, the artifact globs and the resolved flags. Computed
+    once per run, then consumed by every later stage; saved to the state directory so
+    that the next run can tell what changed.
+    """
+
+    target: str
+    project_dir: str
+    sources: TupleT[str, ...]
+    extensions: TupleT[ExtensionPlan, ...]
+    templates: TupleT[str, ...]
+    artifacts: TupleT[str, ...]
+    flags: MappingProxyType
+    fingerprint: str
+
+    def __post_init__(self):
+        object.__setattr__(self, "sources", tuple(sorted(self.sources)))
+        object.__setattr__(self, "extensions", tuple(sorted(self.extensions, key=lambda e: e.name)))
+        object.__setattr__(self, "templates", tuple(sorted(self.templates)))
+        object.__setattr__(self, "artifacts", tuple(self.artifacts))
+        # normalize through json so a loaded plan compares equal to a computed one
+        object.__setattr__(self, "flags", freeze(json.loads(json.dumps(thaw(freeze(self.flags)), default=repr))))
+
+    def extension_args(self):
+        return [e.arg() for e in self.extensions]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PLAN_VERSION,
+            "target": self.target,
+            "project_dir": self.project_dir,
+            "sources": list(self.sources),
+            "extensions": {e.name: list(e.files) for e in self.extensions},
+            "templates": list(self.templates),
+            "artifacts": list(self.artifacts),
+            "flags": thaw(self.flags),
+            "fingerprint": self.fingerprint,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BuildPlan":
+        if data.get("version") != PLAN_VERSION:
+            msg = f"unsupported build plan version {data.get('version')!r}"
+            raise ValueError(msg)
+        return cls(
+            target=data["target"],
+            project_dir=data["project_dir"],
+            sources=tuple(data["sources"]),
+            extensions=tuple(ExtensionPlan(name, tuple(files)) for name, files in data["extensions"].items()),
+            templates=tuple(data["templates"]),
+            artifacts=tuple(data["artifacts"]),
+            flags=data["flags"],
+            fingerprint=data["fingerprint"],
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "BuildPlan":
+        return cls.from_dict(json.loads(text))
+
+    @classmethod
+    def load(cls, path: str):
+        """The plan saved at path, or None when there is no (readable) plan"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls.from_json(f.read())
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str):
+        ensure_state_dir(os.path.dirname(path))
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        os.replace(tmp, path)
+
+    def diff(self, previous: "BuildPlan") -> PlanDiff:
+        """Changes from a previous plan to this one"""
+        before: DictT[str, TupleT[str, ...]] = {e.name: tuple(sorted(e.files)) for e in previous.extensions}
+        after: DictT[str, TupleT[str, ...]] = {e.name: tuple(sorted(e.files)) for e in self.extensions}
+        flags = sorted(k for k in {*self.flags, *previous.flags} if self.flags.get(k) != previous.flags.get(k))
+        return PlanDiff(
+            added=tuple(sorted(after.keys() - before.keys())),
+            removed=tuple(sorted(before.keys() - after.keys())),
+            changed=tuple(sorted(k for k in after.keys() & before.keys() if after[k] != before[k])),
+            flags=tuple(flags),
+        )
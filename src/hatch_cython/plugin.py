@@ -1,25 +1,82 @@
+import io
+import json
 import locale
 import os
 import re
 import subprocess
 import sys
+import sysconfig
 from contextlib import contextmanager
+from dataclasses import replace
 from glob import glob
+from importlib.util import find_spec
 from tempfile import TemporaryDirectory
 
-from Cython.Tempita import sub as render_template
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+from packaging.version import Version
 
-from hatch_cython.config import parse_from_dict
+from hatch_cython.buildlog import BuildLog
+from hatch_cython.bundle import check_members, write_loader, write_stub
+from hatch_cython.config import Config, parse_from_dict
+from hatch_cython.config.flags import EnvFlag, EnvFlags
+from hatch_cython.config.lto import OFF
+from hatch_cython.config.multiversion import LEVELS
 from hatch_cython.constants import (
+    BUNDLE,
+    BUNDLES_DIR,
+    DEPGRAPH,
+    HISTORY,
+    HOOK_PROFILE,
+    IMPORTS,
+    IMPORTS_PYCACHE,
+    INPROCESS,
+    ISA_ENV,
+    LTO,
+    MANIFEST,
+    MULTIVERSION_DIR,
+    PGO_BUILD,
+    PGO_DIR,
+    PLAN,
+    PROFILE,
+    PROFILE_DIRECTIVES,
+    PROFILE_MACROS,
+    PROFILE_MARKER,
+    RENDERS,
+    SHARED_UTILITY,
+    STATE_DIR,
+    TRACE,
     compiled_extensions,
     intermediate_extensions,
     precompiled_extensions,
     templated_extensions,
 )
+from hatch_cython.depgraph import DependencyGraph, parse_makefile_deps
+from hatch_cython.discovery import FileIndex, prunable
+from hatch_cython.driver import build_in_process, cythonize_sources, generate_shared_utility
+from hatch_cython.heuristics import analyze
+from hatch_cython.history import BuildHistory, describe, slowest
+from hatch_cython.imports import ImportResults, ImportTiming, describe_timing, measure
+from hatch_cython.lto import LtoResults, archiver, linker_with_compiler, lto_flags, probe, time_command
+from hatch_cython.manifest import BuildManifest
+from hatch_cython.multiversion import is_variant, march_flags, variant_name, write_isa_loader, write_wrappers
+from hatch_cython.pgo import Flags, PgoProfiles, detect_compiler, generate_flags, merge_profiles, use_flags
+from hatch_cython.plan import BuildPlan, ExtensionPlan
+from hatch_cython.render import RenderCache, RenderJob, describe_renders, render_all
+from hatch_cython.selection import Selection, describe_selection, select_modules, source_module
 from hatch_cython.temp import ExtensionArg, setup_py
-from hatch_cython.types import CallableT, DictT, ListStr, ListT, P, Set
-from hatch_cython.utils import autogenerated, memo, parse_user_glob, plat
+from hatch_cython.tracing import PROFILE_ENV, TRACE_ENV, Tracer, output_path, profiled
+from hatch_cython.types import CallableT, DictT, ListStr, ListT, P, Set, TupleT, UnionT
+from hatch_cython.utils import (
+    GlobMatcher,
+    aarch,
+    autogenerated,
+    digest,
+    ensure_state_dir,
+    file_digest,
+    memo,
+    parse_user_glob,
+    plat,
+)
 
 
 class CythonBuildHook(BuildHookInterface):
@@ -71,16 +128,230 @@ class CythonBuildHook(BuildHookInterface):
             src = f"./{self.dir_name}"
         return src
 
+    @property
+    @memo
+    def state_dir(self):
+        return os.path.join(self.root, STATE_DIR)
+
+    @property
+    @memo
+    def trace_path(self) -> UnionT[str, None]:
+        # read before the options are parsed, so that parsing can be traced too
+        setting = os.environ.get(TRACE_ENV, self.config.get("options", {}).get("trace"))
+        return output_path(setting, os.path.join(self.state_dir, TRACE))
+
+    @property
+    @memo
+    def profile_path(self) -> UnionT[str, None]:
+        setting = os.environ.get(PROFILE_ENV, self.config.get("options", {}).get("profile_hook"))
+        return output_path(setting, os.path.join(self.state_dir, HOOK_PROFILE))
+
+    @property
+    @memo
+    def tracer(self):
+        return Tracer(enabled=self.trace_path is not None)
+
+    @contextmanager
+    def instrumented(self):
+        """
+        Traces the enclosed hook stage and, if enabled, runs it under cProfile. The trace
+        is exported even if the build fails.
+        """
+        try:
+            with profiled(self.profile_path), self.tracer.span("initialize", target=self.target_name):
+                yield
+        finally:
+            if self.tracer.enabled:
+                self.tracer.export(self.trace_path)
+                self.app.display_info(f"build trace written to {self.trace_path}")
+            if self.profile_path is not None:
+                self.app.display_info(f"hook profile written to {self.profile_path}")
+
+    @property
+    @memo
+    def manifest(self):
+        return BuildManifest.load(os.path.join(self.state_dir, MANIFEST))
+
+    @property
+    @memo
+    def depgraph(self):
+        return DependencyGraph.load(
+            os.path.join(self.state_dir, DEPGRAPH),
+            ["./src" if self.is_src else ".", *self.options.includes],
+        )
+
+    @property
+    @memo
+    def file_digests(self) -> DictT[str, str]:
+        return {}
+
+    def file_digest(self, path: str):
+        if path not in self.file_digests:
+            self.file_digests[path] = file_digest(path) if os.path.exists(path) else "missing"
+        return self.file_digests[path]
+
+    def module_path(self, name: str):
+        base = "./src" if self.is_src else "."
+        return f"{base}/{name.replace('.', '/')}"
+
+    def extension_artifact(self, ext: ExtensionArg):
+        return self.module_path(self.bundled.get(ext["name"], ext["name"])) + sysconfig.get_config_var("EXT_SUFFIX")
+
+    def extension_sources(self, ext: ExtensionArg) -> ListStr:
+        """
+        The extension's sources and everything they transitively depend on:
+        cimported .pxd files, included .pxi files and C headers.
+        """
+        return self.depgraph.closure(ext["files"], ext["name"])
+
+    @property
+    @memo
+    def options_fingerprint(self):
+        return self.options.fingerprint()
+
+    def extension_digest(self, ext: ExtensionArg):
+        parts = []
+        for source in self.extension_sources(ext):
+            parts.extend((source, self.file_digest(source)))
+        return digest(self.options_fingerprint, ext["name"], *parts)
+
+    @property
+    def incremental(self):
+        return self.options.incremental and not self.sdist
+
+    def stale_extensions(self, extensions: ListT[ExtensionArg]):
+        with self.tracer.span("stale check"):
+            return self.find_stale(extensions)
+
+    def find_stale(self, extensions: ListT[ExtensionArg]):
+        if not self.incremental:
+            return extensions
+        if self.previous_plan is not None:
+            changes = self.plan.diff(self.previous_plan)
+            self.display_lazy(lambda: f"changes since the last build: {changes}", 1)
+            for name in changes.removed:
+                self.manifest.discard(name)
+        stale = []
+        for ext in extensions:
+            if self.manifest.is_fresh(ext["name"], self.extension_digest(ext)):
+                self.app.display_debug(f"{ext['name']} is up to date")
+            else:
+                stale.append(ext)
+        return stale
+
+    def is_project_header(self, header: str):
+        header = os.path.abspath(header)
+        if header.startswith(os.path.abspath(sysconfig.get_paths()["include"])):
+            return False
+        roots = [os.getcwd(), *self.options.includes]
+        return any(header.startswith(os.path.join(os.path.abspath(r), "")) for r in roots)
+
+    def record_headers(self, extensions: ListT[ExtensionArg], build_temp: str):
+        """
+        Reads the compiler generated dependency files in the build directory and
+        records each extension's project / include-dir headers.
+        """
+        modules = {}
+        for ext in extensions:
+            for file in ext["files"]:
+                modules[os.path.normpath(os.path.splitext(file)[0])] = ext["name"]
+        for parent, _, files in os.walk(build_temp):
+            for file in files:
+                if not file.endswith(".d"):
+                    continue
+                with open(os.path.join(parent, file), encoding="utf-8", errors="replace") as f:
+                    deps = parse_makefile_deps(f.read())
+                if len(deps) == 0:
+                    continue
+                name = modules.get(os.path.normpath(os.path.splitext(deps[0])[0]))
+                if name is not None:
+                    self.depgraph.record_headers(name, list(filter(self.is_project_header, deps[1:])))
+        self.depgraph.save(os.path.join(self.state_dir, DEPGRAPH))
+
+    def record_extensions(self, extensions: ListT[ExtensionArg], build_temp: str):
+        if not self.incremental:
+            return
+        self.record_headers(extensions, build_temp)
+        for ext in extensions:
+            artifact = self.extension_artifact(ext)
+            if os.path.exists(artifact):
+                # digest again, now including the headers reported by the compiler
+                self.manifest.record(ext["name"], self.extension_digest(ext), [artifact])
+            else:
+                self.manifest.discard(ext["name"])
+        self.manifest.save()
+        self.plan.save(os.path.join(self.state_dir, PLAN))
+
+    @property
+    @memo
+    def history(self) -> UnionT[BuildHistory, None]:
+        # source distributions only cythonize, which is not worth recording
+        if not self.options.history.enabled or self.sdist:
+            return None
+        return BuildHistory(os.path.join(self.state_dir, HISTORY), keep=self.options.history.keep)
+
+    def estimate_build(self, extensions: ListT[ExtensionArg]):
+        seconds, known = self.history.estimate([e["name"] for e in extensions], self.options.worker_count or 1)
+        if known:
+            self.app.display_info(
+                f"Estimated build time {seconds:.1f}s ({known} of {len(extensions)} extensions built before)"
+            )
+
+    def record_resources(self, path: str):
+        """Adds the resources used by this build to the history and warns about regressions"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                modules = json.load(f)
+        except (OSError, ValueError):
+            return
+        for regression in self.history.regressions(modules, self.options.history.threshold):
+            self.app.display_warning(f"Build regression in {regression}")
+        self.history.record(modules)
+        self.history.save()
+        self.display_lazy(lambda: "\n".join(describe(name, record) for name, record in slowest(modules)), 1)
+
+    @property
+    @memo
+    def render_cache(self):
+        return RenderCache.load(os.path.join(self.state_dir, RENDERS))
+
     def render_templates(self):
-        for template in self.templated_globs:
-            outfile = template[:-3]
+        """
+        Renders templates whose source, keywords or Cython version changed since they were last
+        rendered. Outputs are only written when their content changes, so that they keep their mtime.
+        """
+        templates = self.templated_globs
+        resolved = self.options.templates.resolve(self, templates)
+        jobs = []
+        for template in templates:
             with open(template, encoding="utf-8") as f:
                 tmpl = f.read()
 
-            kwds = self.options.templates.find(self, outfile, template)
-            data = render_template(tmpl, **kwds)
-            with open(outfile, "w", encoding="utf-8") as f:
-                f.write(autogenerated(kwds) + "\n\n" + data)
+            for outfile, kwds in resolved[template]:
+                header = autogenerated(kwds)
+                key = digest(tmpl, header)
+                if not self.render_cache.is_fresh(outfile, key):
+                    jobs.append(RenderJob(template, outfile, tmpl, kwds, header, key))
+        outputs = {outfile for pairs in resolved.values() for outfile, _ in pairs}
+        removed = self.render_cache.prune(templates, outputs)
+        if removed:
+            self.app.display_info(f"removed outputs no longer rendered: {', '.join(removed)}")
+
+        rendered = render_all(jobs, self.options.worker_count)
+        for job in jobs:
+            self.render_cache.record(job.outfile, job.key, job.template)
+        if self.tracer.enabled:
+            for result in rendered:
+                name = f"render {os.path.relpath(result.outfile, self.root)}"
+                self.tracer.complete(name, result.start, result.duration, "template", result.pid)
+        if templates:
+            self.render_cache.save()
+        written = sum(result.written for result in rendered)
+        self.app.display_debug(f"rendered {len(rendered)} of {len(outputs)} template outputs, {written} changed")
+        if rendered:
+            self.display_lazy(lambda: describe_renders(rendered), 1)
+        if written or removed:
+            self.file_index.invalidate()
 
     @property
     @memo
@@ -100,12 +371,79 @@ class CythonBuildHook(BuildHookInterface):
     def options_include(self):
         return [parse_user_glob(e.matches) for e in self.options.files.targets if e.applies()]
 
-    def wanted(self, item: str):
-        not_excluded = not any(re.match(e, self.normalize_glob(item), re.IGNORECASE) for e in self.options_exclude)
+    @property
+    @memo
+    def user_exclude_matcher(self):
+        return GlobMatcher(self.options_exclude, re.IGNORECASE)
+
+    @property
+    @memo
+    def exclude_matcher(self):
+        # modules the heuristics skip are excluded as if by `files.exclude`
+        skipped = [f"{re.escape(path)}$" for path in self.heuristic_skips]
+        return GlobMatcher([*self.options_exclude, *skipped], re.IGNORECASE)
+
+    @property
+    @memo
+    def include_matcher(self):
+        return GlobMatcher(self.options_include)
+
+    @property
+    @memo
+    def prune_matcher(self):
+        return GlobMatcher([e for e in self.options_exclude if prunable(e)], re.IGNORECASE)
+
+    def excluded_dir(self, dirname: str):
+        return self.prune_matcher.matches(self.normalize_glob(dirname))
+
+    @property
+    @memo
+    def file_index(self):
+        """
+        Every file below the project directory, walked once and shared by the globbing
+        properties. Invalidated whenever the build adds or removes files.
+        """
+        return FileIndex(self.project_dir, prune=self.excluded_dir)
+
+    def wanted(self, item: str, exclude: UnionT[GlobMatcher, None] = None):
+        item = self.normalize_glob(item)
+        not_excluded = not (self.exclude_matcher if exclude is None else exclude).matches(item)
         if self.options.files.explicit_targets:
-            return not_excluded and any(re.match(opt, self.normalize_glob(item)) for opt in self.options_include)
+            return not_excluded and self.include_matcher.matches(item)
         return not_excluded
 
+    def wanted_by_user(self, item: str):
+        """`wanted`, before the heuristics skip any module"""
+        return self.wanted(item, self.user_exclude_matcher)
+
+    def candidate_modules(self) -> ListStr:
+        """
+        The .py files `compile_py` would compile, and that may be left uncompiled. Modules with
+        a .pxd are always compiled, as other extensions may cimport them
+        """
+        return sorted(
+            self.normalize_glob(path)
+            for path in self.file_index.with_extensions(".py")
+            if self.wanted_by_user(path) and not os.path.exists(os.path.splitext(path)[0] + ".pxd")
+        )
+
+    @property
+    @memo
+    def heuristic_skips(self) -> DictT[str, str]:
+        """The .py files the heuristics leave uncompiled, and why. Profiles take precedence"""
+        if not self.options.heuristics.enabled or not self.options.compile_py or self.selection is not None:
+            return {}
+        with self.tracer.span("heuristics"):
+            candidates = self.candidate_modules()
+            reasons = {path: analyze(path, self.options.heuristics) for path in candidates}
+        skipped = {path: reason for path, reason in reasons.items() if reason is not None}
+        self.app.display_info(
+            f"heuristics: compiling {len(candidates) - len(skipped)} of {len(candidates)} Python modules"
+        )
+        for path, reason in skipped.items():
+            self.app.display_info(f"heuristics: skipping {path}: {reason}")
+        return skipped
+
     def filter_ensure_wanted(self, tgts: ListStr):
         return list(
             filter(
@@ -118,21 +456,81 @@ class CythonBuildHook(BuildHookInterface):
     def included_files(self):
         included = set()
         self.app.display_debug("user globs")
-        for patt in self.precompiled_globs:
-            globbed = glob(patt, recursive=True)
-            self.app.display_info(f"{patt} globbed {globbed!r}")
+        for ex in self.precompiled_extensions:
+            globbed = self.file_index.with_extensions(ex)
+            self.display_lazy(lambda ex=ex, globbed=globbed: f"{self.project_dir}/**/*{ex} globbed {globbed!r}")
             if len(globbed) == 0:
                 continue
             matched = self.filter_ensure_wanted(globbed)
             included = included.union(matched)
+        if self.deselected:
+            included = {f for f in included if os.path.splitext(self.normalize_glob(f))[0] not in self.deselected}
         return list(included)
 
+    @property
+    @memo
+    def selection(self) -> UnionT[Selection, None]:
+        """The .py modules that `select` compiles, from the profiled time of each"""
+        args = self.options.select
+        if not args.enabled or not self.options.compile_py:
+            return None
+        profiles = sorted({p for pattern in args.profiles for p in glob(os.path.join(self.root, pattern))})
+        if not profiles:
+            self.app.display_warning(f"select: no profiles match {args.profiles!r}, compiling every module")
+            return None
+        base = "./src" if self.is_src else "."
+        modules = {}
+        for path in self.candidate_modules():
+            relative = os.path.relpath(path, base).replace(os.sep, "/")
+            modules[source_module(relative)] = relative
+        with self.tracer.span("select modules", profiles=len(profiles)):
+            selection = select_modules(profiles, modules, args.threshold)
+        if not selection.total:
+            self.app.display_warning(
+                "select: the profiles spent no time in the project's modules, compiling every module"
+            )
+            return None
+        self.app.display_info(describe_selection(selection))
+        self.display_lazy(
+            lambda: "\n".join(
+                f"{share:7.2%} {'compiled' if name in selection.selected else 'python  '} {name}"
+                for name, share in selection.ranked()
+            ),
+            1,
+        )
+        return selection
+
+    @property
+    @memo
+    def deselected(self) -> Set[str]:
+        """The paths, without extension, of the .py modules `select` or the heuristics leave uncompiled"""
+        if self.selection is None:
+            return {os.path.splitext(path)[0] for path in self.heuristic_skips}
+        base = "./src" if self.is_src else "."
+        return {
+            self.normalize_glob(os.path.splitext(os.path.join(base, relative))[0])
+            for name, relative in self.selection.modules.items()
+            if name not in self.selection.selected
+        }
+
+    def prune_deselected(self):
+        """Removes what earlier builds compiled from the modules that are now left uncompiled"""
+        suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        stale = [
+            f"{stem}{ext}"
+            for stem in sorted(self.deselected)
+            for ext in (suffix, ".c", ".cpp")
+            if os.path.exists(f"{stem}{ext}")
+        ]
+        if stale:
+            self.rm_recurse(stale)
+
     @property
     def normalized_included_files(self):
         """
         Produces files in posix format
         """
-        return list({self.normalize_glob(f) for f in self.included_files})
+        return list(self.plan.sources)
 
     def normalize_aliased_filelike(self, path: str):
         # sometimes we end up with a case where non src produces
@@ -143,8 +541,11 @@ class CythonBuildHook(BuildHookInterface):
 
     @property
     def grouped_included_files(self) -> ListT[ExtensionArg]:
+        return self.plan.extension_args()
+
+    def group_extensions(self, sources: ListStr) -> ListT[ExtensionArg]:
         grouped: DictT[str, set] = {}
-        for norm in self.normalized_included_files:
+        for norm in sources:
             root, ext = os.path.splitext(norm)
             ok = True
             if ext == ".pxd":
@@ -169,14 +570,62 @@ class CythonBuildHook(BuildHookInterface):
         return [ExtensionArg(name=key, files=list(files)) for key, files in grouped.items()]
 
     @property
-    @memo
     def artifact_globs(self):
+        return list(self.plan.artifacts)
+
+    def dist_globs(self, sources: ListStr):
         artifact_globs = []
-        for included_file in self.normalized_included_files:
+        for included_file in sources:
             root, _ = os.path.splitext(included_file)
             artifact_globs.extend(f"{root}.*{ext}" for ext in self.precompiled_extensions)
         return artifact_globs
 
+    def make_plan(self) -> BuildPlan:
+        sources = sorted({self.normalize_glob(f) for f in self.included_files})
+        return BuildPlan(
+            target=self.target_name,
+            project_dir=self.project_dir,
+            sources=tuple(sources),
+            extensions=tuple(
+                ExtensionPlan(e["name"], tuple(sorted(e["files"]))) for e in self.group_extensions(sources)
+            ),
+            templates=tuple(self.templated_globs),
+            artifacts=tuple(self.dist_globs(sources)),
+            flags=self.options.resolved_flags(),
+            fingerprint=self.options_fingerprint,
+        )
+
+    @property
+    @memo
+    def plan(self) -> BuildPlan:
+        """
+        The extensions, sources, templates, artifacts and flags of this run. Templates
+        are rendered first, as they produce sources.
+        """
+        with self.tracer.span("render templates"):
+            self.render_templates()
+        with self.tracer.span("discover"):
+            plan = self.make_plan()
+        self.display_lazy(plan.to_json, 2)
+        return plan
+
+    @property
+    @memo
+    def previous_plan(self) -> UnionT[BuildPlan, None]:
+        return BuildPlan.load(os.path.join(self.state_dir, PLAN))
+
+    def display_lazy(self, render: CallableT[[], object], level: int = 0):
+        """
+        Displays `render()` as info (level 0) or debug output, only rendering it when
+        the active verbosity shows that level.
+        """
+        if getattr(self.app, "verbosity", 0) < level:
+            return
+        if level == 0:
+            self.app.display_info(render())
+        else:
+            self.app.display_debug(render(), level=level)
+
     @property
     @memo
     def templated_globs(self):
@@ -206,13 +655,7 @@ class CythonBuildHook(BuildHookInterface):
     def _globs(self, exts: ListStr, normalize: CallableT[[str], str] = None):
         if normalize is None:
             normalize = self.normalize_glob
-        globs = [
-            *(f"{self.project_dir}/**/*{ext}" for ext in exts),
-            *(f"{self.project_dir}/*{ext}" for ext in exts),
-        ]
-        globbed = []
-        for g in globs:
-            globbed += list(map(normalize, glob(g, recursive=True)))
+        globbed = map(normalize, self.file_index.with_extensions(*exts))
         return list(filter(self.wanted, set(globbed)))
 
     @property
@@ -229,7 +672,8 @@ class CythonBuildHook(BuildHookInterface):
 
     @property
     def autogenerated(self):
-        return list(filter(os.path.exists, (s.replace(".in", "") for s in self.templated_globs)))
+        outputs = {s.replace(".in", "") for s in self.templated_globs} | set(self.render_cache.entries)
+        return sorted(filter(os.path.exists, outputs))
 
     @property
     def inclusion_map(self):
@@ -237,24 +681,28 @@ class CythonBuildHook(BuildHookInterface):
         for compl in self.compiled:
             include[compl] = compl
         self.app.display_debug("Derived inclusion map")
-        self.app.display_debug(include)
+        self.display_lazy(lambda: include, 1)
         return include
 
     def rm_recurse(self, li: ListStr):
         self.app.display_debug("Removing by match")
-        self.app.display_debug(li)
+        self.display_lazy(lambda: li, 1)
         for f in li:
             os.remove(f)
+        self.file_index.invalidate()
 
     def clean(self, _: ListStr):
+        self.manifest.clear()
         self.rm_recurse(self.autogenerated)
+        self.render_cache.clear()
         self.rm_recurse(self.intermediate)
         self.rm_recurse(self.compiled)
 
     @property
     @memo
     def options(self):
-        config = parse_from_dict(self)
+        with self.tracer.span("parse options"):
+            config = parse_from_dict(self)
         if config.compile_py:
             self.precompiled_extensions.add(".py")
         if config.files.explicit_targets:
@@ -264,6 +712,24 @@ class CythonBuildHook(BuildHookInterface):
             self.precompiled_extensions.add(".cpp")
         return config
 
+    def check_profile_version(self):
+        """Refuses to build a profile wheel whose version does not tell it apart from a release"""
+        version = self.metadata.version
+        if PROFILE not in (Version(version).local or "").split("."):
+            msg = (
+                f"profile build: version {version} is the version of a release. "
+                f"give profile wheels a '+{PROFILE}' local version, e.g. {Version(version).public}+{PROFILE}"
+            )
+            raise ValueError(msg)
+
+    def profile_marker(self) -> str:
+        """Writes the marker that tags wheels of profile builds, in their .dist-info"""
+        ensure_state_dir(self.state_dir)
+        path = os.path.join(self.state_dir, PROFILE_MARKER)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"variant": PROFILE, "directives": PROFILE_DIRECTIVES, "define_macros": PROFILE_MACROS}, f)
+        return path
+
     @property
     def sdist(self):
         return self.target_name == "sdist"
@@ -272,9 +738,463 @@ class CythonBuildHook(BuildHookInterface):
     def wheel(self):
         return self.target_name == "wheel"
 
+    def run_setup_py(
+        self,
+        extensions: ListT[ExtensionArg],
+        temp: str,
+        build_lib: str,
+        build_temp: str,
+        *,
+        options: UnionT[Config, None] = None,
+        force: bool = False,
+        **outputs: str,
+    ):
+        setup_file = os.path.join(temp, "setup.py")
+        with open(setup_file, "w") as f:
+            setup = setup_py(
+                *extensions,
+                options=options or self.build_options,
+                sdist=self.sdist,
+                state_dir=self.state_dir,
+                **outputs,
+            )
+            self.app.display_debug(setup)
+            f.write(setup)
+
+        log = BuildLog(extensions, on_progress=self.display_progress)
+        with subprocess.Popen(  # noqa: S603
+            [
+                sys.executable,
+                setup_file,
+                "build_ext",
+                "--inplace",
+                "--verbose",
+                "--build-lib",
+                build_lib,
+                "--build-temp",
+                build_temp,
+                *(["--force"] if force else []),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=(options or self.build_options).envflags.env,
+        ) as process:
+            # stream the output rather than buffering all of it, it grows with the number of extensions
+            encoding = locale.getpreferredencoding()
+            for line in io.TextIOWrapper(process.stdout, encoding=encoding, errors="replace"):
+                log.feed(line)
+                self.app.display_debug(line.rstrip("\r\n"))
+        if process.returncode:
+            self.app.display_error(f"cythonize exited non null status {process.returncode}")
+            for module, lines in log.diagnostics():
+                self.app.display_error(f"output of {module}:" if module else "last lines of output:")
+                self.app.display_error("\n".join(lines))
+            msg = "failed compilation"
+            raise Exception(msg)
+
+    def display_progress(self, done: int, total: int, module: str):
+        self.app.display_info(f"[{done}/{total}] building {module}")
+
+    def run_in_process(
+        self,
+        extensions: ListT[ExtensionArg],
+        build_lib: str,
+        build_temp: str,
+        *,
+        options: UnionT[Config, None] = None,
+        force: bool = False,
+        **outputs: str,
+    ):
+        self.app.display_debug("building in process")
+        build_in_process(
+            *extensions,
+            options=options or self.build_options,
+            sdist=self.sdist,
+            build_lib=build_lib,
+            build_temp=build_temp,
+            state_dir=self.state_dir,
+            force=force,
+            **outputs,
+        )
+
+    def run_build(
+        self,
+        extensions: ListT[ExtensionArg],
+        temp: str,
+        build_lib: str,
+        build_temp: str,
+        *,
+        options: UnionT[Config, None] = None,
+        force: bool = False,
+        **outputs: str,
+    ):
+        if self.options.driver == INPROCESS:
+            self.run_in_process(extensions, build_lib, build_temp, options=options, force=force, **outputs)
+        else:
+            self.run_setup_py(extensions, temp, build_lib, build_temp, options=options, force=force, **outputs)
+
+    @property
+    @memo
+    def pgo(self) -> UnionT[PgoProfiles, None]:
+        if not self.options.pgo.enabled or self.sdist:
+            return None
+        return PgoProfiles(os.path.join(self.state_dir, PGO_DIR))
+
+    def with_flags(self, flags: Flags, options: UnionT[Config, None] = None) -> Config:
+        """The build options, or `options`, with compile and link args added"""
+        options = options or self.build_options
+        compile_args, link_args = flags
+        return replace(
+            options,
+            compile_args=[*options.compile_args, *compile_args],
+            extra_link_args=[*options.extra_link_args, *link_args],
+        )
+
+    @property
+    @memo
+    def lto_toolchain(self) -> UnionT[TupleT[Flags, EnvFlags], None]:
+        """
+        The flags and build environment of the configured LTO mode, with the archiver and the linker
+        that load the compiler's LTO plugin. None if LTO is off, or the toolchain does not support it
+        """
+        lto = self.options.lto
+        if lto is None or not lto.enabled or self.sdist:
+            return None
+        envflags = self.options.envflags
+        compiler = lto.compiler
+        if compiler == "auto":
+            compiler = detect_compiler(envflags.env)
+        if compiler is None:
+            self.app.display_warning("lto: the compiler is neither gcc nor clang, building without lto")
+            return None
+
+        tools = {}
+        # explicitly configured tools are kept
+        ar = None if envflags.env.get("AR") else archiver(compiler, envflags.env)
+        if ar is not None:
+            tools["AR"] = EnvFlag(env="AR", arg=ar)
+        ldshared = None if envflags.env.get("LDSHARED") else linker_with_compiler(envflags.env)
+        if ldshared is not None:
+            tools["LDSHARED"] = EnvFlag(env="LDSHARED", arg=ldshared)
+        envflags = replace(envflags, env=envflags.env.copy(), **tools)
+
+        flags = lto_flags(compiler, lto.mode)
+        error = probe(flags, envflags.env)
+        if error is not None:
+            self.app.display_warning(f"lto: the toolchain does not support {' '.join(flags[1])}, building without lto")
+            self.app.display_debug(error)
+            return None
+        self.app.display_info(f"lto: {lto.mode} link-time optimization with {compiler}")
+        self.display_lazy(lambda: {"flags": flags, **{k: v.arg for k, v in tools.items()}}, 1)
+        return flags, envflags
+
+    @property
+    @memo
+    def shared_utility(self) -> UnionT[ExtensionArg, None]:
+        """
+        The extension holding the Cython utility code that every other extension imports rather
+        than embedding its own copy, or None if it is not shared
+        """
+        name = self.options.shared_utility
+        if not name or self.sdist:
+            return None
+        if find_spec("Cython.Build.SharedModule") is None:
+            self.app.display_warning("shared_utility requires Cython 3.1 or later, building without it")
+            return None
+        if name is True:
+            packages = {ext["name"].split(".")[0] for ext in self.plan.extension_args() if "." in ext["name"]}
+            if len(packages) != 1 or any("." not in ext["name"] for ext in self.plan.extension_args()):
+                msg = "shared_utility = true requires every extension to be in one package. set its module name instead"
+                raise ValueError(msg)
+            name = f"{packages.pop()}.{SHARED_UTILITY}"
+        suffix = ".cpp" if self.options.compile_kwargs.get("language") == "c++" else ".c"
+        return ExtensionArg(name=name, files=[self.module_path(name) + suffix])
+
+    @property
+    @memo
+    def build_options(self) -> Config:
+        """
+        The options the extensions are built with: the configured ones, importing the shared
+        utility module, for the multiversion baseline, and with LTO when it is supported
+        """
+        options = self.options
+        if self.shared_utility is not None:
+            cythonize_kwargs = {
+                **options.cythonize_kwargs,
+                "shared_utility_qualified_name": self.shared_utility["name"],
+            }
+            options = replace(options, cythonize_kwargs=cythonize_kwargs)
+        if self.isa_toolchain and self.options.multiversion.baseline is not None:
+            options = self.with_flags(march_flags(self.options.multiversion.baseline), options)
+        if self.lto_toolchain is None:
+            return options
+        flags, envflags = self.lto_toolchain
+        return self.with_flags(flags, replace(options, envflags=envflags))
+
+    def project_env(self) -> dict:
+        """The build environment, importing the project's in-place extensions"""
+        env = self.options.envflags.env.copy()
+        src = os.path.abspath(os.path.join(self.root, "src") if self.is_src else self.root)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, (src, env.get("PYTHONPATH"))))
+        return env
+
+    def train(self):
+        command = self.options.pgo.command
+        self.app.display_info(f"pgo: training with {' '.join(command)}")
+        process = subprocess.run(command, cwd=self.root, env=self.project_env(), check=False)  # noqa: S603
+        if process.returncode:
+            msg = f"pgo training command exited with status {process.returncode}"
+            raise Exception(msg)
+
+    def build_pgo(self, extensions: ListT[ExtensionArg], temp: str, build_lib: str, build_temp: str, **outputs: str):
+        """
+        Builds `extensions` instrumented, runs the training command against them and builds them
+        again with the profiles it wrote. Profiles are reused until the extensions or options change.
+        """
+        compiler = self.options.pgo.compiler
+        if compiler == "auto":
+            compiler = detect_compiler(self.options.envflags.env)
+        if compiler is None:
+            self.app.display_warning("pgo: the compiler is neither gcc nor clang, building without profiles")
+            self.run_build(extensions, temp, build_lib, build_temp, **outputs)
+            return
+
+        key = digest(self.options_fingerprint, compiler, *sorted(map(self.extension_digest, extensions)))
+        if self.pgo.is_fresh(key):
+            self.app.display_info("pgo: reusing the profiles of the last training run")
+        else:
+            self.pgo.reset()
+            with self.tracer.span("pgo instrumented build"):
+                options = self.with_flags(generate_flags(self.pgo.directory))
+                self.run_build(extensions, temp, build_lib, build_temp, options=options, force=True, **outputs)
+            with self.tracer.span("pgo training"):
+                self.train()
+            merge_profiles(compiler, self.pgo.directory, self.options.envflags.env)
+            self.pgo.record(key, compiler)
+        with self.tracer.span("pgo optimized build"):
+            options = self.with_flags(use_flags(compiler, self.pgo.directory))
+            self.run_build(extensions, temp, build_lib, build_temp, options=options, force=True, **outputs)
+
+    @property
+    @memo
+    def lto_results(self) -> UnionT[LtoResults, None]:
+        if self.options.lto is None or self.sdist:
+            return None
+        return LtoResults.load(os.path.join(self.state_dir, LTO))
+
+    def report_lto(self):
+        """Records the extension sizes and benchmark time of this build, and reports them relative to no LTO"""
+        lto = self.options.lto
+        mode = OFF if self.lto_toolchain is None else lto.mode
+        sizes = {}
+        for ext in self.plan.extension_args():
+            artifact = self.extension_artifact(ext)
+            if os.path.exists(artifact):
+                sizes[self.bundled.get(ext["name"], ext["name"])] = os.path.getsize(artifact)
+        benchmark = None
+        if lto.command is not None:
+            self.app.display_info(f"lto: timing {' '.join(lto.command)}")
+            with self.tracer.span("lto benchmark"):
+                benchmark = time_command(lto.command, lto.repeat, self.root, self.project_env())
+        self.lto_results.record(mode, sizes, benchmark)
+        self.lto_results.save()
+        for line in self.lto_results.report(mode):
+            self.app.display_info(line)
+        self.display_lazy(lambda: "\n".join(self.lto_results.module_deltas(mode)), 1)
+
+    @property
+    @memo
+    def bundles(self) -> DictT[str, ListT[ExtensionArg]]:
+        """The module name of each bundle library, and the extensions built into it"""
+        grouped: DictT[str, ListT[ExtensionArg]] = {}
+        if self.sdist:
+            return grouped
+        # a module belongs to the innermost bundled package
+        packages = sorted(self.options.files.bundle, key=len, reverse=True)
+        for ext in self.plan.extension_args():
+            package = next((p for p in packages if ext["name"].startswith(f"{p}.")), None)
+            # packages are imported through the path finder, which would not find their __init__ in a bundle
+            if package is not None and not ext["name"].endswith(".__init__"):
+                grouped.setdefault(f"{package}.{BUNDLE}", []).append(ext)
+        for name, members in grouped.items():
+            check_members(name, members)
+        return grouped
+
+    @property
+    @memo
+    def bundled(self) -> DictT[str, str]:
+        return {ext["name"]: name for name, members in self.bundles.items() for ext in members}
+
+    def bundle_targets(self, extensions: ListT[ExtensionArg]) -> ListT[ExtensionArg]:
+        """
+        `extensions`, with the bundled ones replaced by their bundle library. A bundle is built
+        from the C sources of all of its modules whenever one of them is stale.
+        """
+        stale = sorted({self.bundled[ext["name"]] for ext in extensions if ext["name"] in self.bundled})
+        targets = [ext for ext in extensions if ext["name"] not in self.bundled]
+        suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        for name in stale:
+            members = self.bundles[name]
+            with self.tracer.span("cythonize bundle", module=name, modules=len(members)):
+                sources = cythonize_sources(*members, options=self.build_options)
+            stub = self.module_path(name) + ".c"
+            write_stub(stub, name, members)
+            for ext in members:
+                # left by a build without the bundle, it would be shipped next to it
+                if os.path.exists(self.module_path(ext["name"]) + suffix):
+                    os.remove(self.module_path(ext["name"]) + suffix)
+            files = [source for ext in members for source in sources[ext["name"]]]
+            targets.append(ExtensionArg(name=name, files=[*files, stub]))
+        return targets
+
+    def bundle_loader(self) -> ListStr:
+        """Writes the finder that imports bundled modules by their names, and the .pth file that registers it"""
+        suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        bundled = {}
+        for name, members in self.bundles.items():
+            package, _, module = name.rpartition(".")
+            for ext in members:
+                bundled[ext["name"]] = (package, module + suffix)
+        directory = os.path.join(self.state_dir, BUNDLES_DIR)
+        ensure_state_dir(directory)
+        return write_loader(directory, self.metadata.name, bundled)
+
+    @property
+    @memo
+    def import_results(self) -> UnionT[ImportResults, None]:
+        if not self.options.import_bench.enabled or self.sdist:
+            return None
+        return ImportResults(os.path.join(self.state_dir, IMPORTS))
+
+    def compiled_modules(self) -> DictT[str, TupleT[str, UnionT[str, None]]]:
+        """
+        The name of each compiled module in the inclusion map, with its library and, when
+        `compile_py` compiled it, its Python source. Bundle libraries are not modules
+        """
+        suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        root = os.path.abspath(os.path.join(self.root, "src") if self.is_src else self.root)
+        modules = {}
+        for library in self.inclusion_map:
+            if not library.endswith(suffix):
+                continue
+            stem = os.path.abspath(os.path.join(self.root, library))[: -len(suffix)]
+            name = os.path.relpath(stem, root).replace(os.sep, ".")
+            if name in self.bundles or is_variant(name):
+                continue
+            source = f"{stem}.py" if self.options.compile_py and os.path.exists(f"{stem}.py") else None
+            if name.endswith(".__init__"):
+                name = name[: -len(".__init__")]
+            modules[name] = (library, source)
+        return modules
+
+    def bench_imports(self):
+        """Imports every compiled module in fresh interpreters, and fails or warns on import time regressions"""
+        args = self.options.import_bench
+        env = self.project_env()
+        # bytecode of the pure Python imports, kept out of the source tree
+        env["PYTHONPYCACHEPREFIX"] = os.path.join(self.state_dir, IMPORTS_PYCACHE)
+        timings: DictT[str, ImportTiming] = {}
+        with self.tracer.span("import bench"):
+            for name, (library, source) in sorted(self.compiled_modules().items()):
+                try:
+                    timings[name] = measure(name, library, args.runs, env, source)
+                except RuntimeError as e:
+                    self.app.display_warning(f"import bench: {name} failed to import ({e})")
+        self.app.display_info("import times (cold: first import, warm: median of the others):")
+        self.app.display_info("\n".join(describe_timing(name, timing) for name, timing in timings.items()))
+
+        regressions = self.import_results.regressions(timings, args.threshold)
+        for regression in regressions:
+            self.app.display_warning(f"Import time regression in {regression}")
+        if regressions and args.fail:
+            # the previous timings stay the baseline
+            msg = f"import time regressed by more than {args.threshold:.0%} in {len(regressions)} modules"
+            raise Exception(msg)
+        self.import_results.record(timings)
+        self.import_results.save()
+
+    @property
+    @memo
+    def isa_toolchain(self) -> bool:
+        """Whether extensions are multiversioned: x86-64, gcc or clang, and the baseline builds"""
+        args = self.options.multiversion
+        if not args.enabled or self.sdist:
+            return False
+        if aarch() not in {"x86_64", "amd64"}:
+            self.app.display_warning(f"multiversion: x86-64 levels do not apply to {aarch()}, building one version")
+            return False
+        if detect_compiler(self.options.envflags.env) is None:
+            self.app.display_warning("multiversion: the compiler is neither gcc nor clang, building one version")
+            return False
+        failed = args.baseline is not None and probe(march_flags(args.baseline), self.options.envflags.env)
+        if failed:
+            self.app.display_warning(f"multiversion: the compiler cannot build {args.baseline}: {failed}")
+            return False
+        return True
+
+    @property
+    @memo
+    def isa_levels(self) -> ListStr:
+        """The configured levels the compiler builds for, from the oldest"""
+        if not self.isa_toolchain:
+            return []
+        levels = []
+        for level in self.options.multiversion.levels:
+            failed = probe(march_flags(level), self.options.envflags.env)
+            if failed:
+                self.app.display_warning(f"multiversion: the compiler cannot build {level}, skipping it: {failed}")
+            else:
+                levels.append(level)
+        return levels
+
+    def multiversioned(self, ext: ExtensionArg) -> bool:
+        # packages are imported through the path finder, which would not find the variants of their __init__
+        return ext["name"] not in self.bundled and not ext["name"].endswith(".__init__")
+
+    def build_variants(self, extensions: ListT[ExtensionArg], temp: str, build_lib: str):
+        """Builds the library of each of `extensions` for each level, from the C sources of its regular build"""
+        targets = [ext for ext in extensions if self.multiversioned(ext)]
+        if not targets or not self.isa_levels:
+            return
+        suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        with self.tracer.span("cythonize variants", extensions=len(targets)):
+            sources = cythonize_sources(*targets, options=self.build_options)
+        directory = os.path.join(self.state_dir, MULTIVERSION_DIR, "sources")
+        wrappers = {ext["name"]: write_wrappers(directory, ext["name"], sources[ext["name"]]) for ext in targets}
+        for ext in targets:
+            for level in set(LEVELS) - set(self.isa_levels):
+                # left by a build with other levels, it would be shipped
+                stale = self.module_path(variant_name(ext["name"], level)) + suffix
+                if os.path.exists(stale):
+                    os.remove(stale)
+        for level in self.isa_levels:
+            variants = [ExtensionArg(name=variant_name(name, level), files=files) for name, files in wrappers.items()]
+            build_temp = os.path.join(temp, f"tmp-{level}")
+            os.mkdir(build_temp)
+            with self.tracer.span("build variants", level=level, extensions=len(variants)):
+                options = self.with_flags(march_flags(level))
+                self.run_build(variants, temp, build_lib, build_temp, options=options, force=True)
+
+    def multiversion_loader(self) -> ListStr:
+        """Writes the finder that imports the best variant of each module, and the .pth file that registers it"""
+        suffix = sysconfig.get_config_var("EXT_SUFFIX")
+        modules = {}
+        for ext in filter(self.multiversioned, self.plan.extension_args()):
+            package, _, module = ext["name"].rpartition(".")
+            variants = [(level, variant_name(module, level) + suffix) for level in reversed(self.isa_levels)]
+            source = f"{module}.py" if os.path.exists(self.module_path(ext["name"]) + ".py") else None
+            modules[ext["name"]] = (package, variants, source)
+        directory = os.path.join(self.state_dir, MULTIVERSION_DIR)
+        ensure_state_dir(directory)
+        return write_isa_loader(directory, self.metadata.name, modules, self.options.multiversion.baseline, ISA_ENV)
+
     def build_ext(self):
         with self.get_build_dirs() as temp:
-            self.render_templates()
+            extensions = self.stale_extensions(self.plan.extension_args())
+            if len(extensions) == 0:
+                self.record_extensions(extensions, temp)
+                self.app.display_success("All extensions are up to date")
+                return
 
             shared_temp_build_dir = os.path.join(temp, "build")
             temp_build_dir = os.path.join(temp, "tmp")
@@ -283,66 +1203,88 @@ class CythonBuildHook(BuildHookInterface):
             os.mkdir(temp_build_dir)
 
             self.app.display_info("Building c/c++ extensions...")
-            self.app.display_info(self.normalized_included_files)
-            setup_file = os.path.join(temp, "setup.py")
-            with open(setup_file, "w") as f:
-                setup = setup_py(
-                    *self.grouped_included_files,
-                    options=self.options,
-                    sdist=self.sdist,
-                )
-                self.app.display_debug(setup)
-                f.write(setup)
-
+            self.display_lazy(lambda: list(self.plan.sources))
             self.options.validate_include_opts()
 
-            process = subprocess.run(  # noqa: PLW1510, S603
-                [
-                    sys.executable,
-                    setup_file,
-                    "build_ext",
-                    "--inplace",
-                    "--verbose",
-                    "--build-lib",
-                    shared_temp_build_dir,
-                    "--build-temp",
-                    temp_build_dir,
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                env=self.options.envflags.env,
-            )
-            encoding = locale.getpreferredencoding()
-            stdout = process.stdout.decode(encoding, errors="replace")
-            if process.returncode:
-                self.app.display_error(f"cythonize exited non null status {process.returncode}")
-                self.app.display_error(stdout)
-                msg = "failed compilation"
-                raise Exception(msg)
-            else:
-                self.app.display_info(stdout)
+            # files the build command writes its per module spans and resource records to
+            outputs = {}
+            if self.tracer.enabled:
+                outputs["trace"] = os.path.join(temp, "trace-events.json")
+            if self.history is not None:
+                outputs["resources"] = os.path.join(temp, "resources.json")
+                self.estimate_build(extensions)
 
+            targets = self.bundle_targets(extensions)
+            if self.shared_utility is not None:
+                with self.tracer.span("generate shared utility"):
+                    generate_shared_utility(self.shared_utility, self.build_options)
+                # built alongside any stale extension: setuptools skips it while its C source is unchanged
+                targets = [*targets, self.shared_utility]
+            with self.tracer.span("build", driver=self.options.driver, extensions=len(targets)):
+                if self.pgo is not None:
+                    # gcc finds profiles by object path, so every pgo build uses the same build directory
+                    temp_build_dir = os.path.join(self.state_dir, PGO_BUILD)
+                    self.build_pgo(targets, temp, shared_temp_build_dir, temp_build_dir, **outputs)
+                else:
+                    self.run_build(targets, temp, shared_temp_build_dir, temp_build_dir, **outputs)
+            if self.isa_toolchain:
+                self.build_variants(extensions, temp, shared_temp_build_dir)
+            if "trace" in outputs:
+                self.tracer.load_events(outputs["trace"])
+            if "resources" in outputs:
+                self.record_resources(outputs["resources"])
+            self.file_index.invalidate()
+
+            with self.tracer.span("record"):
+                self.record_extensions(extensions, temp_build_dir)
+            if self.lto_results is not None:
+                self.report_lto()
             self.app.display_success("Post-build artifacts")
 
     def initialize(self, _: str, build_data: dict):
-        self.app.display_mini_header(self.PLUGIN_NAME)
-        self.app.display_debug("options")
-        self.app.display_debug(self.options.asdict(), level=1)
-        self.app.display_debug("sdist")
-        self.app.display_debug(self.sdist, level=1)
-        self.app.display_waiting("pre-build artifacts")
-
-        if len(self.grouped_included_files) != 0:
-            self.build_ext()
-            self.app.display_info(glob(f"{self.project_dir}/*/**", recursive=True))
-
-        if self.sdist and not self.options.compiled_sdist:
-            self.clean(None)
-
-        build_data["infer_tag"] = True
-        build_data["artifacts"].extend(self.artifacts)
-        build_data["force_include"].update(self.inclusion_map)
-        build_data["pure_python"] = False
-
-        self.app.display_info("Extensions complete")
-        self.app.display_debug(build_data)
+        with self.instrumented():
+            self.app.display_mini_header(self.PLUGIN_NAME)
+            self.app.display_debug("options")
+            self.display_lazy(self.options.asdict, 1)
+            self.app.display_debug("sdist")
+            self.app.display_debug(self.sdist, level=1)
+            self.app.display_waiting("pre-build artifacts")
+            if self.options.variant == PROFILE:
+                if self.wheel:
+                    self.check_profile_version()
+                self.app.display_warning(
+                    "profile build: extensions are built with profiling and line tracing, which slows them down. "
+                    "do not ship this build"
+                )
+
+            if self.deselected:
+                self.prune_deselected()
+
+            if len(self.plan.extensions) != 0:
+                self.build_ext()
+                self.display_lazy(self.file_index.all_files)
+
+            if self.import_results is not None:
+                self.bench_imports()
+
+            if self.sdist and not self.options.compiled_sdist:
+                with self.tracer.span("clean"):
+                    self.clean(None)
+
+            with self.tracer.span("collect artifacts"):
+                build_data["infer_tag"] = True
+                build_data["artifacts"].extend(self.artifacts)
+                build_data["force_include"].update(self.inclusion_map)
+                build_data["pure_python"] = False
+                if self.bundles:
+                    # wheel root: the .pth file imports the finder at startup
+                    for path in self.bundle_loader():
+                        build_data["force_include"][path] = os.path.basename(path)
+                if self.isa_toolchain:
+                    for path in self.multiversion_loader():
+                        build_data["force_include"][path] = os.path.basename(path)
+                if self.options.variant == PROFILE and not self.sdist:
+                    build_data.setdefault("extra_metadata", {})[self.profile_marker()] = PROFILE_MARKER
+
+            self.app.display_info("Extensions complete")
+            self.display_lazy(lambda: build_data, 1)
@@ -0,0 +1,178 @@
+"""
+Runs an entry point against a profile build (`variant = "profile"`) under cProfile and
+line tracing, and reports the time spent per function and per line of the Cython sources.
+
+    python -m hatch_cython.profiling mypkg.bench:main --output profile -- --size 1000
+"""
+
+import argparse
+import cProfile
+import linecache
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from hatch_cython.types import CallableT, DictT, ListStr, TupleT, UnionT
+
+SOURCES = (".pyx", ".pxd", ".pxi")
+LIMIT = 30
+
+LineKey = TupleT[str, int]
+
+
+class LineCollector:
+    """
+    Counts the line events of functions defined in `sources`, and the time until the next
+    event of the same frame: the time spent on the line, including the calls it makes.
+    """
+
+    sources: TupleT[str, ...]
+    hits: DictT[LineKey, list]
+
+    def __init__(self, sources: TupleT[str, ...] = SOURCES):
+        self.sources = sources
+        self.hits = {}
+        self.last: DictT[int, TupleT[LineKey, float]] = {}
+
+    def trace(self, frame, event: str, _):
+        if event == "call" and frame.f_code.co_filename.endswith(self.sources):
+            return self.local
+        return None
+
+    def local(self, frame, event: str, _):
+        now = time.perf_counter()
+        previous = self.last.pop(id(frame), None)
+        if previous is not None:
+            self.hits[previous[0]][1] += now - previous[1]
+        if event == "line":
+            key = (frame.f_code.co_filename, frame.f_lineno)
+            self.hits.setdefault(key, [0, 0.0])[0] += 1
+            self.last[id(frame)] = (key, time.perf_counter())
+        return self.local
+
+    @contextmanager
+    def collecting(self):
+        threading.settrace(self.trace)
+        sys.settrace(self.trace)
+        try:
+            yield self
+        finally:
+            sys.settrace(None)
+            threading.settrace(None)
+
+
+def load_entry_point(entry: str) -> CallableT[[], object]:
+    """`module:attr` calls `module.attr()`, `module` runs the module as __main__"""
+    module, _, attr = entry.partition(":")
+    if not attr:
+        return lambda: runpy.run_module(module, run_name="__main__", alter_sys=True)
+    target = import_module(module)
+    for part in attr.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def source_path(filename: str) -> str:
+    """The path of a source as compiled into an extension, which is relative to the build root"""
+    if os.path.isabs(filename) or os.path.exists(filename):
+        return filename
+    for root in sys.path:
+        candidate = os.path.join(root or ".", filename)
+        if os.path.exists(candidate):
+            return candidate
+    return filename
+
+
+def function_report(stats: pstats.Stats, sources: TupleT[str, ...] = SOURCES, limit: int = LIMIT) -> str:
+    rows = [
+        (tottime, cumtime, calls, f"{filename}:{line}({name})")
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items()
+        if filename.endswith(sources)
+    ]
+    if not rows:
+        return "no profiled Cython functions were called. is this a profile build (variant = 'profile')?"
+    rows.sort(reverse=True)
+    lines = [f"{'tottime':>10} {'cumtime':>10} {'calls':>10}  function"]
+    lines.extend(f"{tt:>10.4f} {ct:>10.4f} {calls:>10}  {name}" for tt, ct, calls, name in rows[:limit])
+    return "\n".join(lines)
+
+
+def line_report(collector: LineCollector, limit: int = LIMIT) -> str:
+    if not collector.hits:
+        return "no traced lines. is this a profile build (variant = 'profile')?"
+    rows = sorted(collector.hits.items(), key=lambda it: -it[1][1])[:limit]
+    lines = [f"{'time':>10} {'hits':>10}  line (time includes the calls it makes)"]
+    for (filename, lineno), (count, seconds) in rows:
+        source = linecache.getline(source_path(filename), lineno).strip()
+        lines.append(f"{seconds:>10.4f} {count:>10}  {filename}:{lineno}  {source}")
+    return "\n".join(lines)
+
+
+def run(
+    entry: str, output: str, args: UnionT[ListStr, None] = None, lines: bool = True, limit: int = LIMIT
+) -> TupleT[str, ListStr]:
+    """Runs `entry` with `args` as its sys.argv, and writes its reports to `output`. Returns the report"""
+    target = load_entry_point(entry)
+    profile = cProfile.Profile()
+    collector = LineCollector()
+    argv = sys.argv
+    sys.argv = [entry, *(args or [])]
+    try:
+        if lines:
+            with collector.collecting():
+                profile.runcall(target)
+        else:
+            profile.runcall(target)
+    except TypeError as e:
+        # Cython's line tracing calls the trace function of frames it never reported a call for,
+        # which it leaves as None: the inner function of a cpdef called from Python is one
+        if not lines or str(e) != "'NoneType' object is not callable":
+            raise
+        msg = f"line tracing failed in a Cython function ({e}). profile functions only with --no-lines"
+        raise RuntimeError(msg) from e
+    finally:
+        sys.argv = argv
+
+    os.makedirs(output, exist_ok=True)
+    written = [os.path.join(output, "profile.pstats"), os.path.join(output, "functions.txt")]
+    profile.dump_stats(written[0])
+    report = ["per function:", function_report(pstats.Stats(profile), limit=limit)]
+    if lines:
+        written.append(os.path.join(output, "lines.txt"))
+        report.extend(["", "per line:", line_report(collector, limit=limit)])
+    with open(written[1], "w", encoding="utf-8") as f:
+        f.write(report[1] + "\n")
+    if lines:
+        with open(written[2], "w", encoding="utf-8") as f:
+            f.write(report[-1] + "\n")
+    return "\n".join(report), written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m hatch_cython.profiling", description=__doc__.strip().split("\n\n")[0]
+    )
+    parser.add_argument("entry", help="module:function to call, or module to run as __main__")
+    parser.add_argument("--output", default="profile", help="directory of the reports")
+    parser.add_argument("--limit", type=int, default=LIMIT, help="rows per report")
+    parser.add_argument("--no-lines", dest="lines", action="store_false", help="only profile functions")
+    # arguments after -- are passed to the entry point in sys.argv
+    argv = sys.argv[1:] if argv is None else list(argv)
+    extra = []
+    if "--" in argv:
+        extra = argv[argv.index("--") + 1 :]
+        argv = argv[: argv.index("--")]
+    args = parser.parse_args(argv)
+
+    report, written = run(args.entry, args.output, extra, lines=args.lines, limit=args.limit)
+    print(report)  # noqa: T201
+    print(f"\nreports written to {', '.join(written)}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+from Cython.Tempita import sub as render_template
+
+from hatch_cython.tracing import now
+from hatch_cython.types import DictT, ListStr, ListT, Set, UnionT
+from hatch_cython.utils import ensure_state_dir, file_digest
+
+RENDER_CACHE_VERSION = 2
+
+
+@dataclass
+class RenderEntry:
+    # digest of the template and its header, which holds the keywords and the Cython (Tempita) version
+    key: str
+    # digest of the output as written
+    output: str
+    template: str
+
+
+class RenderCache:
+    """
+    Persistent record of the rendered templates, keyed by output file. A render is
+    reused when its key is unchanged and the output on disk is the one that was written.
+    """
+
+    path: str
+    entries: DictT[str, RenderEntry]
+
+    def __init__(self, path: str, entries: DictT[str, RenderEntry] = None):
+        if entries is None:
+            entries = {}
+        self.path = path
+        self.entries = entries
+
+    @classmethod
+    def load(cls, path: str) -> "RenderCache":
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != RENDER_CACHE_VERSION:
+            return cls(path)
+        entries = {outfile: RenderEntry(**entry) for outfile, entry in data.get("entries", {}).items()}
+        return cls(path, entries)
+
+    def save(self):
+        ensure_state_dir(os.path.dirname(self.path))
+        data = {
+            "version": RENDER_CACHE_VERSION,
+            "entries": {outfile: asdict(entry) for outfile, entry in sorted(self.entries.items())},
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def is_fresh(self, outfile: str, key: str) -> bool:
+        entry = self.entries.get(outfile)
+        if entry is None or entry.key != key or not os.path.exists(outfile):
+            return False
+        return file_digest(outfile) == entry.output
+
+    def record(self, outfile: str, key: str, template: str):
+        self.entries[outfile] = RenderEntry(key=key, output=file_digest(outfile), template=template)
+
+    def prune(self, templates: ListStr, outputs: Set[str]) -> ListStr:
+        """
+        Removes the outputs that `templates` rendered before but no longer do, e.g. after a value
+        was removed from their matrix, so that they are not built as stale modules.
+        """
+        templates = set(templates)
+        removed = []
+        for outfile, entry in list(self.entries.items()):
+            if entry.template in templates and outfile not in outputs:
+                if os.path.exists(outfile):
+                    os.remove(outfile)
+                    removed.append(outfile)
+                del self.entries[outfile]
+        return removed
+
+    def clear(self):
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def write_if_changed(path: str, data: str) -> bool:
+    """Writes `data` to `path` unless it already holds it, so that its mtime is kept. Returns whether it wrote"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == data:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+    return True
+
+
+@dataclass
+class RenderJob:
+    template: str
+    outfile: str
+    source: str
+    kwds: dict
+    header: str
+    key: str
+
+
+@dataclass
+class Rendered:
+    outfile: str
+    written: bool
+    # wall clock in microseconds, as trace events are
+    start: int
+    duration: int
+    pid: int
+
+
+def render_one(job: RenderJob) -> Rendered:
+    start = now()
+    data = render_template(job.source, **job.kwds)
+    written = write_if_changed(job.outfile, job.header + "\n\n" + data)
+    return Rendered(job.outfile, written, start, now() - start, os.getpid())
+
+
+def render_all(jobs: ListT[RenderJob], workers: UnionT[int, None] = None) -> ListT[Rendered]:
+    """
+    Renders `jobs`, in a process pool of up to `workers` processes when there is more
+    than one; Tempita is pure Python, so threads would not render concurrently.
+    """
+    if workers is None or workers <= 1 or len(jobs) <= 1:
+        return [render_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(render_one, jobs))
+
+
+def slowest_renders(rendered: ListT[Rendered], count: int = 10) -> ListT[Rendered]:
+    return sorted(rendered, key=lambda r: -r.duration)[:count]
+
+
+def describe_render(result: Rendered) -> str:
+    return f"{result.duration / 1e6:8.3f}s render {result.outfile}{'' if result.written else ' (unchanged)'}"
+
+
+def describe_renders(rendered: ListT[Rendered], count: int = 10) -> str:
+    """Timing of every render by output, followed by the slowest `count` when there are more than those"""
+    lines = [describe_render(result) for result in sorted(rendered, key=lambda r: r.outfile)]
+    if len(rendered) > count:
+        lines.append(f"slowest {count} renders:")
+        lines.extend(map(describe_render, slowest_renders(rendered, count)))
+    return "\n".join(lines)
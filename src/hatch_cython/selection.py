@@ -0,0 +1,104 @@
+import json
+import os
+import pstats
+from dataclasses import dataclass, field
+
+from hatch_cython.types import DictT, ListStr, ListT, Set, TupleT, UnionT
+
+
+def load_pstats(path: str) -> DictT[str, float]:
+    """The time spent in the code of each file of a cProfile stats file, in seconds"""
+    times: DictT[str, float] = {}
+    for (filename, _, _), (_, _, tottime, _, _) in pstats.Stats(path).stats.items():
+        times[filename] = times.get(filename, 0.0) + tottime
+    return times
+
+
+def load_hotness(path: str) -> DictT[str, float]:
+    """
+    A sampled hotness file: a JSON object of module names or file paths to their time or
+    sample count, optionally under a "modules" key
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get("modules"), dict):
+        data = data["modules"]
+    if not isinstance(data, dict) or not all(isinstance(v, (int, float)) for v in data.values()):
+        msg = f"{path} is not a hotness file. use a JSON object of module names or paths to times or samples"
+        raise ValueError(msg)
+    return {key: float(value) for key, value in data.items()}
+
+
+def load_profile(path: str) -> DictT[str, float]:
+    return load_hotness(path) if path.endswith(".json") else load_pstats(path)
+
+
+def match_module(key: str, modules: DictT[str, str]) -> UnionT[str, None]:
+    """
+    The module of `modules` (name -> source path relative to the source root) that `key`, a
+    module name or the path of a file wherever the project was installed, refers to
+    """
+    if key in modules:
+        return key
+    path = key.replace("\\", "/")
+    if not path.endswith(".py"):
+        return None
+    for name, relative in modules.items():
+        if path == relative or path.endswith(f"/{relative}"):
+            return name
+    return None
+
+
+@dataclass
+class Selection:
+    """The .py modules hot enough to compile, from the profiled time of each module"""
+
+    times: DictT[str, float]
+    threshold: float
+    # module name -> source path relative to the source root
+    modules: DictT[str, str] = field(default_factory=dict)
+    selected: Set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        total = self.total
+        self.selected = {name for name, time in self.times.items() if total and time / total > self.threshold}
+
+    @property
+    def total(self) -> float:
+        return sum(self.times.values())
+
+    @property
+    def coverage(self) -> float:
+        """The share of the profiled time that is spent in compiled modules"""
+        return sum(self.times[name] for name in self.selected) / self.total if self.total else 0.0
+
+    def ranked(self) -> ListT[TupleT[str, float]]:
+        total = self.total or 1.0
+        return sorted(((name, time / total) for name, time in self.times.items()), key=lambda t: (-t[1], t[0]))
+
+
+def select_modules(profiles: ListStr, modules: DictT[str, str], threshold: float) -> Selection:
+    """
+    Selects the modules of `modules` (name -> source path relative to the source root) whose
+    share of the time `profiles` spent in any of them is above `threshold`
+    """
+    times = dict.fromkeys(modules, 0.0)
+    for path in profiles:
+        for key, time in load_profile(path).items():
+            name = match_module(key, modules)
+            if name is not None:
+                times[name] += time
+    return Selection(times, threshold, modules)
+
+
+def describe_selection(selection: Selection) -> str:
+    return (
+        f"compiling {len(selection.selected)} of {len(selection.times)} Python modules, "
+        f"{selection.coverage:.1%} of their profiled time"
+    )
+
+
+def source_module(relative: str) -> str:
+    """The module name of a source path relative to the source root"""
+    name = os.path.splitext(relative)[0].replace("/", ".")
+    return name[: -len(".__init__")] if name.endswith(".__init__") else name
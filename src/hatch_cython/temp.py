@@ -1,7 +1,10 @@
+import os
 from typing import TypedDict
 
+import hatch_cython
 from hatch_cython.config import Config
-from hatch_cython.types import ListStr, ListT
+from hatch_cython.constants import TIMINGS
+from hatch_cython.types import ListStr, ListT, UnionT
 from hatch_cython.utils import options_kws
 
 
@@ -10,15 +13,73 @@ class ExtensionArg(TypedDict):
     files: ListStr
 
 
+CYTHONIZE = """cythonize(
+            exts,
+            compiler_directives={directives!r},
+            include_path=INCLUDES,
+            {cython}
+    )"""
+
+
+def build_options(
+    options: Config,
+    sdist: bool,
+    state_dir: UnionT[str, None] = None,
+    trace: UnionT[str, None] = None,
+    resources: UnionT[str, None] = None,
+) -> dict:
+    """
+    Options consumed by `hatch_cython.command.CythonBuildExt`. An empty dict
+    means the stock setuptools command is sufficient.
+    """
+    opts = {}
+    if sdist:
+        return opts
+    if options.cache.enabled:
+        opts["cache"] = {"directory": options.cache.path, "max_size": options.cache.max_size}
+    if trace is not None:
+        opts["trace"] = trace
+    if resources is not None:
+        opts["resources"] = resources
+    if options.workers is not None:
+        opts["workers"] = options.worker_count
+    if options.workers is not None or trace is not None or resources is not None:
+        # the command cythonizes each extension itself, so its own thread pool is redundant
+        cythonize_kwargs = {k: v for k, v in options.cythonize_kwargs.items() if k != "nthreads"}
+        opts["cythonize"] = {
+            "compiler_directives": options.directives,
+            "include_path": options.includes,
+            **cythonize_kwargs,
+        }
+    if options.workers is not None and state_dir is not None:
+        opts["timings"] = os.path.join(state_dir, TIMINGS)
+    return opts
+
+
+def command_import(opts: dict):
+    # the build runs in a fresh interpreter, so make sure it resolves the same
+    # hatch_cython as the hook that generated it
+    root = os.path.dirname(os.path.dirname(os.path.abspath(hatch_cython.__file__)))
+    return f"""
+import sys
+sys.path.insert(0, {root!r})
+from hatch_cython.command import CythonBuildExt
+BUILD_OPTIONS = {opts!r}
+"""
+
+
 def setup_py(
     *files: ListT[ListStr],
     options: Config,
     sdist: bool,
+    state_dir: UnionT[str, None] = None,
+    trace: UnionT[str, None] = None,
+    resources: UnionT[str, None] = None,
 ):
     code = """
 from setuptools import Extension, setup
 from Cython.Build import cythonize
-
+{command}
 INCLUDES = {includes!r}
 EXTENSIONS = {ext_files!r}
 
@@ -35,28 +96,27 @@ if __name__ == "__main__":
                     {keywords}
         ) for ex in EXTENSIONS
     ]
-    ext_modules = cythonize(
-            exts,
-            compiler_directives={directives!r},
-            include_path=INCLUDES,
-            {cython}
-    )
+    ext_modules = {ext_modules}
 
 """
     if not sdist:
         code += """
-    setup(ext_modules=ext_modules)
+    setup(ext_modules=ext_modules{cmdclass})
         """
 
     kwds = options_kws(options.compile_kwargs)
     cython = options_kws(options.cythonize_kwargs)
+    opts = build_options(options, sdist, state_dir, trace, resources)
+    # scheduled, traced and measured builds cythonize each extension inside the build command
+    ext_modules = "exts" if "cythonize" in opts else CYTHONIZE.format(directives=options.directives, cython=cython)
     return code.format(
+        ext_modules=ext_modules,
+        command=command_import(opts) if opts else "",
+        cmdclass=', cmdclass={"build_ext": CythonBuildExt.configure(BUILD_OPTIONS)}' if opts else "",
         compile_args=options.compile_args_for_platform,
         extra_link_args=options.compile_links_for_platform,
-        directives=options.directives,
         ext_files=files,
         keywords=kwds,
-        cython=cython,
         includes=options.includes,
         libs=options.libraries,
         lib_dirs=options.library_dirs,
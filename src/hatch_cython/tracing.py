@@ -0,0 +1,115 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from hatch_cython.types import DictT, ListT, UnionT
+
+TRACE_ENV = "HATCH_CYTHON_TRACE"
+PROFILE_ENV = "HATCH_CYTHON_PROFILE"
+FALSY = ("", "0", "false", "no", "off")
+
+
+def now() -> int:
+    # wall clock, so that spans recorded by the build subprocess line up with the hook's
+    return time.time_ns() // 1000
+
+
+def output_path(setting: UnionT[bool, str, None], default: str) -> UnionT[str, None]:
+    """
+    Resolves a trace / profile setting: false disables it, true (or "1") writes to
+    `default`, any other string is the path to write to.
+    """
+    if setting is None or setting is False:
+        return None
+    if setting is True or str(setting).lower() in ("1", "true", "yes", "on"):
+        return default
+    if str(setting).lower() in FALSY:
+        return None
+    return str(setting)
+
+
+class Tracer:
+    """
+    Collects spans as Chrome trace events (https://ui.perfetto.dev or chrome://tracing).
+    Spans are only recorded when the tracer is enabled.
+    """
+
+    enabled: bool
+    events: ListT[dict]
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events = []
+
+    @contextmanager
+    def span(self, name: str, cat: str = "hook", **args):
+        if not self.enabled:
+            yield
+            return
+        start = now()
+        try:
+            yield
+        finally:
+            self.complete(name, start, now() - start, cat, **args)
+
+    def complete(self, name: str, start: int, duration: int, cat: str = "hook", pid: UnionT[int, None] = None, **args):
+        self.events.append(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start,
+                "dur": duration,
+                "pid": os.getpid() if pid is None else pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def extend(self, events: ListT[dict]):
+        self.events.extend(events)
+
+    def load_events(self, path: str):
+        """Adds the events saved by `save_events` at path, e.g. by the build subprocess"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.extend(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def save_events(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.events, f)
+
+    def export(self, path: str):
+        names: DictT[int, str] = {}
+        for event in self.events:
+            names.setdefault(event["pid"], "hatch-cython" if event["pid"] == os.getpid() else "build")
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}}
+            for pid, name in names.items()
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": metadata + sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}, f
+            )
+
+
+@contextmanager
+def profiled(path: UnionT[str, None]):
+    """Runs the block under cProfile and dumps the stats to path, if given"""
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profile.dump_stats(path)
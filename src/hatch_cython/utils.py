@@ -1,12 +1,14 @@
+import hashlib
 import os
 import platform
+import re
 from textwrap import dedent
 
 from Cython import __version__ as __cythonversion__
 
 from hatch_cython.__about__ import __version__
 from hatch_cython.constants import NORM_GLOB, UAST
-from hatch_cython.types import CallableT, P, T, UnionT
+from hatch_cython.types import CallableT, ListStr, P, T, UnionT
 
 
 def stale(src: str, dest: str):
@@ -15,6 +17,37 @@ def stale(src: str, dest: str):
     return (os.path.getmtime(src) >= os.path.getmtime(dest)) or (os.path.getctime(src) >= os.path.getctime(dest))
 
 
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def digest(*parts: UnionT[str, bytes]) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()  # noqa: PLW2901
+        h.update(part)
+        # separator so that ("ab", "c") and ("a", "bc") hash differently
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def ensure_state_dir(path: str):
+    """
+    Creates a hatch-cython state directory, ignored by version control so that
+    build records never end up in commits or vcs-derived source distributions.
+    """
+    os.makedirs(path, exist_ok=True)
+    ignore = os.path.join(path, ".gitignore")
+    if not os.path.exists(ignore):
+        with open(ignore, "w", encoding="utf-8") as f:
+            f.write("*\n")
+
+
 def memo(func: CallableT[P, T]) -> CallableT[P, T]:
     keyed = {}
 
@@ -22,18 +55,21 @@ def memo(func: CallableT[P, T]) -> CallableT[P, T]:
         nonlocal keyed
 
         # if we have a class, memo will reserve objects between
-        # instances, so we need to key this by the id of the instance
+        # instances, so we need to key this by the instance. values are kept
+        # on the instance itself, as an id may be reused by a new instance once
+        # the previous one is collected (e.g. hooks of successive builds)
         # note: dont call hasattr here because hasattr is pretty much
         # a try catch for property access - ergo we get infinite recursive
         # calls if a property is memoed
         if len(args) != 0 and func.__name__ in dir(args[0]):
-            idof = id(args[0])
-        else:
-            idof = None
+            instance = vars(args[0]).setdefault("_memo", {})
+            if func.__qualname__ not in instance:
+                instance[func.__qualname__] = func(*args, **kwargs)
+            return instance[func.__qualname__]
 
-        if idof not in keyed:
-            keyed[idof] = func(*args, **kwargs)
-        return keyed[idof]
+        if None not in keyed:
+            keyed[None] = func(*args, **kwargs)
+        return keyed[None]
 
     return wrapped
 
@@ -66,6 +102,80 @@ def parse_user_glob(
     return imd.replace(UAST, "*")
 
 
+# wildcards produced by parse_user_glob, e.g. ([^\s]*) or ([^.]*)
+WILDCARD = re.compile(r"\(\[[^\]]*\]\*\)")
+# adjacent wildcards, e.g. from "**", only add backtracking
+REPEATED_WILDCARD = re.compile(r"(\((\[[^\]]*\])\*\))(?:\(\2\*\))+")
+# group references are numbered per pattern, so these must be left untouched
+BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+REGEX_SYNTAX = frozenset("\\^$|?*+{}()[]")
+
+
+def required_literal(pattern: str, fold: bool = False) -> UnionT[str, None]:
+    """
+    The longest text that must appear in any value matched by a parsed user glob, or
+    None when the pattern uses regex syntax beyond literals, `.` and wildcards.
+    """
+    runs = []
+    for piece in WILDCARD.split(pattern):
+        if any(c in REGEX_SYNTAX for c in piece):
+            return None
+        runs.extend(piece.split("."))
+    literal = max(runs, key=len, default="")
+    if not literal or (fold and not literal.isascii()):
+        return None
+    return literal.lower() if fold else literal
+
+
+class GlobMatcher:
+    """
+    A set of parsed user globs (see `parse_user_glob`), compiled once. `match` returns
+    the index of the first pattern that matches, the same result as trying each pattern
+    with `re.match` in order. Each pattern is keyed by a literal it requires (e.g.
+    "/no_compile/" for "*/no_compile/*"), so that only patterns whose literal occurs in
+    the value reach the regex engine; a value is usually rejected by substring checks alone.
+    """
+
+    patterns: ListStr
+    flags: int
+
+    def __init__(self, patterns: ListStr, flags: int = 0):
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.fold = bool(flags & re.IGNORECASE)
+        self.compiled = [
+            re.compile(p if BACKREFERENCE.search(p) else REPEATED_WILDCARD.sub(r"\1", p), flags) for p in self.patterns
+        ]
+        self.literals = [required_literal(p, self.fold) for p in self.patterns]
+
+    @classmethod
+    def from_globs(
+        cls,
+        globs: ListStr,
+        variant: UnionT[None, str] = None,
+        modifier: UnionT[CallableT[[str], str], None] = None,
+        flags: int = 0,
+    ) -> "GlobMatcher":
+        return cls([parse_user_glob(g, variant, modifier) for g in globs], flags)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def match(self, value: str) -> UnionT[int, None]:
+        # re's case folding of non ascii text does not always agree with str.lower
+        prefilter = not self.fold or value.isascii()
+        text = value.lower() if self.fold else value
+        for i, literal in enumerate(self.literals):
+            if prefilter and literal is not None and literal not in text:
+                continue
+            if self.compiled[i].match(value):
+                return i
+        return None
+
+    def matches(self, value: str) -> bool:
+        return self.match(value) is not None
+
+
 def autogenerated(keywords: dict):
     return dedent(
         f"""# DO NOT EDIT.
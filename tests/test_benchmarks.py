@@ -0,0 +1,39 @@
+from benchmarks.common import measure, new_hook, project
+from benchmarks.compare import changes
+from benchmarks.config import bench_size
+from benchmarks.generate import ProjectSpec, generate
+from hatch_cython.temp import setup_py
+
+
+def test_generated_project(tmp_path):
+    spec = ProjectSpec(modules=50, depth=2, fanout=2, py_ratio=0.2, templates=3, excludes=2, aliases=2)
+    root = generate(spec, str(tmp_path))
+    assert len(spec.packages()) == 7
+
+    with project(root):
+        hook = new_hook(root, spec.options(), spec.name)
+        names = {e["name"] for e in hook.grouped_included_files}
+        expected = {spec.module_name(i) for i in range(spec.modules)}
+        aliased = {spec.module_name(i) for i in range(spec.aliases)}
+        templates = {e for e in names if ".tmpl_" in e}
+        assert len(templates) == spec.templates
+        assert names - templates == (expected - aliased) | {n.replace(".mod_", ".alias_") for n in aliased}
+        assert not any("skip" in f for e in hook.grouped_included_files for f in e["files"])
+        assert "ext_modules" in setup_py(*hook.grouped_included_files, options=hook.options, sdist=False)
+        hook.clean([])
+
+    stats = measure(lambda state: state.append(1), 3, setup=list)
+    assert stats["runs"] == 3
+    assert stats["min"] <= stats["median"] <= stats["max"]
+
+
+def test_compare():
+    base = {"a": {"median": 1.0}, "b": {"median": 2.0}, "c": {"median": 1.0}}
+    head = {"a": {"median": 1.5}, "b": {"median": 1.0}, "d": {"median": 1.0}}
+    assert changes(base, head) == [("a", 1.0, 1.5, 0.5), ("b", 2.0, 1.0, -0.5)]
+
+
+def test_config_benchmarks():
+    results = bench_size(8, 1)
+    assert set(results) >= {"parse_from_dict", "compile_args_for_platform", "applies", "templates_find"}
+    assert all(r["runs"] == 1 for r in results.values())
@@ -0,0 +1,53 @@
+from hatch_cython.buildlog import BuildLog
+
+EXTENSIONS = [
+    {"name": "pkg.a", "files": ["./src/pkg/a.pyx"]},
+    {"name": "pkg.b", "files": ["./src/pkg/b.py", "./src/pkg/b.pxd"]},
+    {"name": "pkg.c", "files": ["./src/pkg/c.pyx"]},
+]
+
+OUTPUT = """\
+running build_ext
+[1/1] Cythonizing ./src/pkg/a.pyx
+building 'pkg.a' extension
+gcc -Werror=format-security -c ./src/pkg/a.c -o build/a.o
+building 'pkg.b' extension
+gcc -c ./src/pkg/b.c -o build/b.o
+./src/pkg/a.c:10:5: warning: unused variable 'x'
+./src/pkg/b.c:3:1: error: expected ';' before '}' token
+compilation terminated.
+error: command '/usr/bin/gcc' failed with exit code 1
+"""
+
+
+def test_attribution():
+    progress = []
+    log = BuildLog(EXTENSIONS, on_progress=lambda *args: progress.append(args))
+    for line in OUTPUT.splitlines(keepends=True):
+        log.feed(line)
+
+    assert progress == [(1, 3, "pkg.a"), (2, 3, "pkg.b")]
+    assert list(log.modules["pkg.a"]) == [
+        "[1/1] Cythonizing ./src/pkg/a.pyx",
+        "building 'pkg.a' extension",
+        "gcc -Werror=format-security -c ./src/pkg/a.c -o build/a.o",
+        "./src/pkg/a.c:10:5: warning: unused variable 'x'",
+    ]
+    assert log.failed == ["pkg.b"]
+    [(module, lines)] = log.diagnostics()
+    assert module == "pkg.b"
+    assert "./src/pkg/b.c:3:1: error: expected ';' before '}' token" in lines
+    assert "pkg.c" not in log.modules
+
+
+def test_bounded():
+    log = BuildLog(EXTENSIONS, lines_per_module=5, tail=10)
+    log.feed("building 'pkg.c' extension")
+    for i in range(100):
+        log.feed(f"line {i}\n")
+    assert list(log.modules["pkg.c"]) == [f"line {i}" for i in range(95, 100)]
+    assert len(log.tail) == 10
+    # without an attributable error, the tail of the build is what is shown
+    [(module, lines)] = log.diagnostics()
+    assert module is None
+    assert lines[-1] == "line 99"
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.bundle import check_members
+from hatch_cython.config.files import FileArgs
+from hatch_cython.finder import loader_name
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.temp import ExtensionArg
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+IMPORTS = """
+import _example_lib_bundles
+import example_lib.mod_a.adds as adds
+import example_lib.mod_a.deep_nest.creates as creates
+print(adds.imul(3, 4), adds.__file__.rsplit("/", 1)[-1].split(".")[0], creates.__name__)
+"""
+
+
+def test_bundle_config():
+    assert FileArgs(bundle=["mypkg.parsers"]).bundle == ["mypkg.parsers"]
+    with pytest.raises(ValueError, match="bundle"):
+        FileArgs(bundle=["mypkg/parsers"])
+    with pytest.raises(ValueError, match="PyInit_util"):
+        check_members("a._bundle", [ExtensionArg(name="a.b.util", files=[]), ExtensionArg(name="a.c.util", files=[])])
+    assert loader_name("example-lib", "bundles") == "_example_lib_bundles"
+
+
+def test_bundle_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["files"]["bundle"] = ["example_lib.mod_a"]
+    package = new_src_proj / "src" / "example_lib" / "mod_a"
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        assert sorted(hook.bundled) == [
+            "example_lib.mod_a.adds",
+            "example_lib.mod_a.deep_nest.creates",
+            "example_lib.mod_a.some_defn",
+        ]
+        build_data = {"artifacts": [], "force_include": {}}
+        hook.initialize("0.1.0", build_data)
+
+        # the package's own __init__ is not bundled
+        libraries = sorted(f.split(".")[0] for f in os.listdir(package) if f.endswith((".so", ".pyd")))
+        assert libraries == ["__init__", "_bundle"]
+        assert not any(f.endswith((".so", ".pyd")) for f in os.listdir(package / "deep_nest"))
+        assert sorted(target for target in build_data["force_include"].values() if "bundles" in target) == [
+            "_example_lib_bundles.pth",
+            "_example_lib_bundles.py",
+        ]
+
+        loader = os.path.join(hook.state_dir, "bundles")
+        imported = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", IMPORTS],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join((str(new_src_proj / "src"), loader))},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert imported.stdout.split() == ["12", "_bundle", "example_lib.mod_a.deep_nest.creates"]
+        hook.clean([])
+
+    syspath.remove(str(new_src_proj))
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from hatch_cython.cache import ObjectCache, main
+from hatch_cython.config.cache import CacheArgs, parse_cache_args, parse_size
+
+
+def test_parse_size():
+    assert parse_size(10) == 10
+    assert parse_size("10") == 10
+    assert parse_size("2KB") == 2048
+    assert parse_size("1.5 mb") == int(1.5 * (1 << 20))
+    assert parse_size("2GB") == 2 << 30
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_parse_cache_args(tmp_path):
+    assert parse_cache_args(False) == CacheArgs(enabled=False)
+    parsed = parse_cache_args({"directory": str(tmp_path), "max_size": "1MB"})
+    assert parsed.enabled
+    assert parsed.path == str(tmp_path)
+    assert parsed.max_size == 1 << 20
+    with pytest.raises(ValueError):
+        parse_cache_args("yes")
+
+
+def test_fetch_store(tmp_path):
+    cache = ObjectCache(str(tmp_path / "cache"))
+    src = tmp_path / "mod.so"
+    src.write_bytes(b"\x7fELF")
+    dest = tmp_path / "out" / "mod.so"
+
+    assert not cache.fetch("abcdef", str(dest))
+    cache.store("abcdef", str(src))
+    assert cache.fetch("abcdef", str(dest))
+    assert dest.read_bytes() == b"\x7fELF"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.flush_stats()
+    cache.fetch("abcdef", str(dest))
+    cache.flush_stats()
+    assert cache.stats() == {"hits": 2, "misses": 1}
+
+
+def test_prune_lru(tmp_path):
+    cache = ObjectCache(str(tmp_path / "cache"), max_size=25)
+    src = tmp_path / "obj"
+    src.write_bytes(b"x" * 10)
+    now = time.time()
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        cache.store(key, str(src))
+        os.utime(cache.entry(key), (now - 100 + i, now - 100 + i))
+
+    # touching the oldest entry makes it the most recently used
+    assert cache.fetch("aa01", str(tmp_path / "dest"))
+
+    removed, freed = cache.prune()
+    assert (removed, freed) == (1, 10)
+    assert not os.path.exists(cache.entry("bb02"))
+    assert os.path.exists(cache.entry("aa01"))
+    assert os.path.exists(cache.entry("cc03"))
+
+    assert cache.clear() == (2, 20)
+    assert cache.entries() == []
+
+
+def test_cli(tmp_path, capsys):
+    cache = ObjectCache(str(tmp_path))
+    src = tmp_path / "obj"
+    src.write_bytes(b"x" * 10)
+    cache.store("aa01", str(src))
+
+    main(["--dir", str(tmp_path), "stats"])
+    out = capsys.readouterr().out
+    assert "entries:   1" in out
+    assert "size:      10B" in out
+
+    main(["--dir", str(tmp_path), "prune", "--max-size", "0"])
+    assert "removed 1 entries" in capsys.readouterr().out
@@ -0,0 +1,80 @@
+import json
+import os
+
+from Cython.Build import cythonize
+from setuptools import Distribution, Extension
+
+from hatch_cython.command import CythonBuildExt
+
+from .utils import override_dir
+
+
+def build(project, options: dict, modules=("mod",)):
+    with override_dir(project):
+        exts = [Extension(f"pkg.{m}", [f"pkg/{m}.pyx"]) for m in modules]
+        if "workers" not in options:
+            # cython memoizes timestamps within a process, so force regeneration
+            exts = cythonize(exts, quiet=True, force=True)
+        dist = Distribution({"ext_modules": exts, "cmdclass": {"build_ext": CythonBuildExt.configure(options)}})
+        cmd = dist.get_command_obj("build_ext")
+        cmd.build_lib = str(project / "build")
+        cmd.build_temp = str(project / "tmp")
+        dist.run_command("build_ext")
+        return cmd
+
+
+def test_object_cache(tmp_path):
+    project = tmp_path / "proj"
+    (project / "pkg").mkdir(parents=True)
+    (project / "pkg" / "mod.pyx").write_text("def add(int a, int b):\n    return a + b\n")
+    options = {"cache": {"directory": str(tmp_path / "cache"), "max_size": 1 << 30}}
+
+    first = build(project, options)
+    assert os.path.exists(first.get_ext_fullpath("pkg.mod"))
+    assert first.object_cache.stats() == {"hits": 0, "misses": 1}
+
+    os.remove(first.get_ext_fullpath("pkg.mod"))
+    second = build(project, options)
+    assert os.path.exists(second.get_ext_fullpath("pkg.mod"))
+    assert second.object_cache.stats() == {"hits": 1, "misses": 1}
+
+    (project / "pkg" / "mod.pyx").write_text("def add(int a, int b):\n    return a - b\n")
+    third = build(project, options)
+    assert third.object_cache.stats() == {"hits": 1, "misses": 2}
+
+    # the last of conflicting flags wins, so reordering them changes the build
+    [ext] = third.extensions
+    with override_dir(project):
+        ext.extra_compile_args = ["-fno-wrapv", "-fwrapv"]
+        key = third.cache_key(ext)
+        ext.extra_compile_args = ["-fwrapv", "-fno-wrapv"]
+        assert third.cache_key(ext) != key
+        ext.extra_compile_args = []
+        ext.extra_link_args = ["-Xlinker", "-O1", "-Xlinker", "--as-needed"]
+        key = third.cache_key(ext)
+        ext.extra_link_args = ["-Xlinker", "--as-needed", "-Xlinker", "-O1"]
+        assert third.cache_key(ext) != key
+
+
+def test_scheduled_build(tmp_path):
+    project = tmp_path / "proj"
+    (project / "pkg").mkdir(parents=True)
+    modules = ("fast", "slow", "new")
+    for m in modules:
+        (project / "pkg" / f"{m}.pyx").write_text(f"def {m}(int a):\n    return a\n")
+    timings = tmp_path / "state" / "timings.json"
+    timings.parent.mkdir()
+    timings.write_text(json.dumps({"modules": {"pkg.fast": {"compile": 0.1}, "pkg.slow": {"compile": 9.0}}}))
+    options = {"workers": 2, "cythonize": {"quiet": True}, "timings": str(timings)}
+
+    cmd = build(project, options, modules)
+    for m in modules:
+        assert os.path.exists(cmd.get_ext_fullpath(f"pkg.{m}"))
+
+    recorded = json.loads(timings.read_text())["modules"]
+    assert sorted(recorded) == ["pkg.fast", "pkg.new", "pkg.slow"]
+    assert set(recorded["pkg.new"]) == {"cythonize", "compile"}
+
+    history = {"pkg.fast": {"compile": 0.1}, "pkg.slow": {"compile": 9.0}}
+    assert cmd.expected_duration(Extension("pkg.slow", []), history, 9.0) == 9.0
+    assert cmd.expected_duration(Extension("pkg.new", []), history, 9.0) == 9.0
@@ -0,0 +1,53 @@
+from textwrap import dedent
+
+from hatch_cython.depgraph import DependencyGraph, parse_makefile_deps
+
+
+def write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(dedent(text))
+    return str(path).replace("\\", "/")
+
+
+def test_parse_makefile_deps():
+    text = "build/a.o: src/a.c src/a.h \\\n  include/with\\ space.h\nsrc/a.h:\n"
+    assert parse_makefile_deps(text) == ["src/a.c", "src/a.h", "include/with space.h"]
+
+
+def test_graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write(tmp_path / "include" / "util.h")
+    write(tmp_path / "pkg" / "shared.pxd", "cdef int shared(int a)\n")
+    write(tmp_path / "pkg" / "helpers.pxi", "cdef int x = 1\n")
+    write(tmp_path / "pkg" / "sub" / "leaf.pxd", "from pkg cimport shared\n")
+    write(
+        tmp_path / "pkg" / "a.pyx",
+        """
+        from pkg.shared cimport shared
+        from libc.stdlib cimport malloc
+        include "helpers.pxi"
+        cdef extern from "util.h":
+            pass
+        """,
+    )
+    write(tmp_path / "pkg" / "sub" / "b.pyx", "from . cimport leaf\ncimport numpy as cnp\n")
+    write(tmp_path / "pkg" / "c.pyx", "def f():\n    return 1\n")
+
+    graph = DependencyGraph([".", "include"])
+    assert graph.closure(["pkg/a.pyx"]) == [
+        "include/util.h",
+        "pkg/a.pyx",
+        "pkg/helpers.pxi",
+        "pkg/shared.pxd",
+    ]
+    assert graph.closure(["pkg/sub/b.pyx"]) == ["pkg/shared.pxd", "pkg/sub/b.pyx", "pkg/sub/leaf.pxd"]
+
+    assert graph.closure(["pkg/c.pyx"], "pkg.c") == ["pkg/c.pyx"]
+
+    # headers the compiler reported are dependencies of their module
+    graph.record_headers("pkg.c", ["include/util.h"])
+    assert graph.closure(["pkg/c.pyx"], "pkg.c") == ["include/util.h", "pkg/c.pyx"]
+
+    graph.save(str(tmp_path / "state" / "depgraph.json"))
+    loaded = DependencyGraph.load(str(tmp_path / "state" / "depgraph.json"), [".", "include"])
+    assert loaded.headers == {"pkg.c": {"include/util.h"}}
@@ -0,0 +1,49 @@
+import re
+
+from hatch_cython.discovery import FileIndex, prunable
+from hatch_cython.utils import parse_user_glob
+
+from .utils import override_dir
+
+
+def test_prunable():
+    assert prunable(parse_user_glob("*/no_compile/*"))
+    assert prunable(parse_user_glob("*/tests"))
+    assert not prunable(r"([^\s]*)/tests$")
+    assert not prunable(r"([^\s]*)/tests\b")
+    assert not prunable(r"([^\s]*)/tests(?!/keep)")
+
+
+def test_file_index(tmp_path):
+    for f in (
+        "pkg/a.pyx",
+        "pkg/b.py",
+        "pkg/c.pyx.in",
+        "pkg/sub/d.pyx",
+        "pkg/sub/d.cpython-311-x86_64-linux-gnu.so",
+        "pkg/.hidden/e.pyx",
+        "pkg/.f.pyx",
+        "pkg/skip/g.pyx",
+        "pkg/skip/deeper/h.pyx",
+    ):
+        (tmp_path / f).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / f).write_text("")
+
+    exclude = parse_user_glob("*/skip/*")
+    visited = []
+
+    def prune(dirname: str):
+        visited.append(dirname)
+        return re.match(exclude, dirname) is not None
+
+    with override_dir(tmp_path):
+        index = FileIndex("./pkg", prune=prune)
+        assert index.with_extensions(".pyx") == ["./pkg/a.pyx", "./pkg/sub/d.pyx"]
+        assert index.with_extensions(".py", ".so") == ["./pkg/b.py", "./pkg/sub/d.cpython-311-x86_64-linux-gnu.so"]
+        assert index.with_extensions(".pyx.in") == ["./pkg/c.pyx.in"]
+        assert "./pkg/skip/deeper/" not in visited
+
+        (tmp_path / "pkg" / "new.pyx").write_text("")
+        assert "./pkg/new.pyx" not in index.with_extensions(".pyx")
+        index.invalidate()
+        assert "./pkg/new.pyx" in index.with_extensions(".pyx")
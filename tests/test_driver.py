@@ -0,0 +1,55 @@
+import os
+from sys import path as syspath
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from toml import load
+
+from hatch_cython.config import Config
+from hatch_cython.driver import patched_environ
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def test_driver_validation():
+    assert Config().driver == "subprocess"
+    assert Config(driver="inprocess").driver == "inprocess"
+    with pytest.raises(ValueError):
+        Config(driver="thread")
+
+
+def test_patched_environ():
+    os.environ["HATCH_CYTHON_TEST_KEEP"] = "1"
+    with patched_environ({"CC": "my-cc"}):
+        assert os.environ["CC"] == "my-cc"
+        assert "HATCH_CYTHON_TEST_KEEP" not in os.environ
+    assert os.environ.pop("HATCH_CYTHON_TEST_KEEP") == "1"
+
+
+def test_inprocess_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["driver"] = "inprocess"
+
+    def no_subprocess(*_, **__):
+        msg = "setup.py should not be used"
+        raise AssertionError(msg)
+
+    with override_dir(new_src_proj), patch.object(CythonBuildHook, "run_setup_py", no_subprocess):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        build_data = {"artifacts": [], "force_include": {}}
+        hook.initialize("0.1.0", build_data)
+        assert len(build_data["force_include"]) == len(hook.grouped_included_files)
+
+    syspath.remove(str(new_src_proj))
@@ -0,0 +1,93 @@
+import ast
+import os
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.config.heuristics import HeuristicArgs, parse_heuristic_args
+from hatch_cython.heuristics import classify, score_module
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+KERNEL = """
+def dot(xs, ys):
+    total = 0
+    for i in range(len(xs)):
+        total += xs[i] * ys[i]
+    return total
+
+
+def norm(xs):
+    return sum(x * x for x in xs) ** 0.5
+"""
+
+GLUE = """
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def run(client, request):
+    log.info("sending %s", request.path)
+    response = client.session.send(request.prepare())
+    response.raise_for_status()
+    log.info("received %s", response.headers.get("content-type"))
+    return response.json()
+"""
+
+
+def test_heuristic_scores():
+    assert parse_heuristic_args({"min_score": 1}) == HeuristicArgs(enabled=True, min_score=1)
+    with pytest.raises(ValueError, match="min_statements"):
+        HeuristicArgs(min_statements=-1)
+
+    assert classify(ast.parse('"""docs"""\nfrom .core import run\n__all__ = ["run"]')) == "re-exports only"
+    assert classify(ast.parse("import os\nTIMEOUT = 30\nHOME = os.environ['HOME']")) == "constants only"
+    assert classify(ast.parse(KERNEL)) is None
+
+    kernel = score_module(ast.parse(KERNEL))
+    assert (kernel.loops, kernel.statements) == (2, 5)
+    glue = score_module(ast.parse(GLUE))
+    assert glue.loops == 0
+    assert glue.score < kernel.score
+
+
+def test_heuristics_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["heuristics"] = True
+    package = new_src_proj / "src" / "example_lib"
+    (package / "kernels.py").write_text(KERNEL)
+    (package / "glue.py").write_text(GLUE)
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        assert hook.heuristic_skips == {
+            "./src/example_lib/__about__.py": "package metadata",
+            "./src/example_lib/__init__.py": "package initializer",
+            "./src/example_lib/glue.py": hook.heuristic_skips["./src/example_lib/glue.py"],
+            "./src/example_lib/mod_a/__init__.py": "package initializer",
+            "./src/example_lib/normal.py": "small: 0 loops, 1 arithmetic, 0 attribute accesses in 1 statements",
+        }
+        assert hook.heuristic_skips["./src/example_lib/glue.py"].startswith("score ")
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+
+        libraries = {f.split(".")[0] for f in os.listdir(package) if f.endswith((".so", ".pyd"))}
+        assert "kernels" in libraries
+        assert not libraries & {"__init__", "__about__", "glue", "normal"}
+        # modules with a .pxd are always compiled
+        assert any(f.startswith("some_defn.") and f.endswith((".so", ".pyd")) for f in os.listdir(package / "mod_a"))
+        hook.clean([])
+
+    syspath.remove(str(new_src_proj))
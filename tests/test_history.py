@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import time
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.config import Config
+from hatch_cython.config.history import parse_history_args
+from hatch_cython.history import BuildHistory, Usage, measured, spawn_measured
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def record(cythonize: float, compile_: float, rss: int = 50_000):
+    return {
+        "cythonize": {"wall": cythonize, "cpu": cythonize, "rss": rss},
+        "compile": {"wall": compile_, "cpu": compile_, "rss": rss},
+        "c_size": 1000,
+    }
+
+
+def test_parse_history_args():
+    assert not Config().history.enabled
+    assert parse_history_args(True).threshold == 0.25
+    args = parse_history_args({"threshold": 0.5, "keep": 3})
+    assert args.enabled and args.threshold == 0.5 and args.keep == 3
+    with pytest.raises(ValueError):
+        parse_history_args("yes")
+    with pytest.raises(ValueError):
+        parse_history_args({"threshold": -1})
+    with pytest.raises(ValueError):
+        parse_history_args({"keep": 0})
+
+
+def test_history(tmp_path):
+    path = str(tmp_path / ".hatch_cython" / "history.json")
+    history = BuildHistory(path, keep=3)
+    assert history.estimate(["a", "b"]) == (0.0, 0)
+
+    for when in range(4):
+        history.record({"a": record(1.0, 2.0), "b": record(0.5, 0.5)}, when=when)
+    history.save()
+    history = BuildHistory(path, keep=3)
+    assert [b["time"] for b in history.builds] == [1, 2, 3]
+
+    assert history.estimate(["a", "b"]) == (4.0, 2)
+    # unknown modules count as the mean of the known ones; the slowest bounds the total
+    assert history.estimate(["a", "b", "c"], workers=2) == (3.0, 2)
+
+    regressions = history.regressions({"a": record(1.0, 2.1), "b": record(1.0, 1.0, rss=60_000)}, 0.25)
+    assert [(r.module, r.metric) for r in regressions] == [("b", "build time")]
+    assert str(regressions[0]) == "b: build time 1.00s -> 2.00s (+100%)"
+    regressions = history.regressions({"b": record(0.5, 0.5, rss=80_000)}, 0.25)
+    assert [str(r) for r in regressions] == ["b: peak memory 48.8 MiB -> 78.1 MiB (+60%)"]
+
+    with open(path, "w") as f:
+        f.write("{")
+    assert BuildHistory(path).builds == []
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="posix only")
+def test_measured():
+    usage = Usage()
+    with measured(usage):
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.1:
+            pass
+    assert usage.wall > 0 and usage.cpu > 0 and usage.rss > 0
+
+    code, usage = spawn_measured([sys.executable, "-c", "x = bytearray(64 << 20)"])
+    assert code == 0
+    assert usage.cpu > 0
+    assert usage.rss > 64 << 10
+    assert spawn_measured([sys.executable, "-c", "raise SystemExit(3)"])[0] == 3
+
+
+def test_history_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["history"] = True
+
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+        with open(hook.history.path) as f:
+            builds = json.load(f)["builds"]
+
+    syspath.remove(str(new_src_proj))
+    assert len(builds) == 1
+    modules = builds[0]["modules"]
+    assert set(modules) == {e.name for e in hook.plan.extensions}
+    for name, rec in modules.items():
+        assert rec["c_size"] > 0, name
+        assert rec["cythonize"]["wall"] > 0, name
+        assert rec["compile"]["wall"] > 0, name
+        if hasattr(os, "wait4"):
+            assert rec["compile"]["cpu"] > 0, name
+            assert rec["compile"]["rss"] > 0, name
@@ -0,0 +1,67 @@
+import json
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.config.imports import ImportBenchArgs, parse_import_bench_args
+from hatch_cython.imports import ImportResults, ImportTiming, parse_importtime
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+REPORT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   example_lib
+import time:      1500 |       2500 |   example_lib.mod_a.adds
+"""
+
+
+def test_import_bench_args(tmp_path):
+    assert not parse_import_bench_args(False).enabled
+    assert parse_import_bench_args({"runs": 3}) == ImportBenchArgs(enabled=True, runs=3)
+    with pytest.raises(ValueError, match="runs"):
+        ImportBenchArgs(runs=1)
+    with pytest.raises(ValueError, match="threshold"):
+        ImportBenchArgs(threshold=-1)
+
+    assert parse_importtime(REPORT, "example_lib.mod_a.adds") == 2.5
+    assert parse_importtime(REPORT, "example_lib.mod_b") is None
+
+    results = ImportResults(str(tmp_path / "imports.json"))
+    results.record({"a": ImportTiming(cold=5.0, warm=2.0, size=1024), "b": ImportTiming(cold=1.0, warm=0.2, size=1)})
+    results.save()
+    results = ImportResults(results.path)
+    slower = {"a": ImportTiming(cold=5.0, warm=3.0, size=1024), "b": ImportTiming(cold=1.0, warm=0.4, size=1)}
+    # b doubled, but by less than the noise floor
+    assert results.regressions(slower, 0.25) == ["a: 2.00ms -> 3.00ms (+50%)"]
+    assert results.regressions(slower, 0.5) == []
+
+
+def test_import_bench_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["import_bench"] = {"runs": 2}
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+
+        recorded = json.loads((new_src_proj / ".hatch_cython" / "imports.json").read_text())["modules"]
+        assert {"example_lib", "example_lib.mod_a.adds", "example_lib.mod_a.deep_nest.creates"} <= set(recorded)
+        adds = recorded["example_lib.mod_a.adds"]
+        assert adds["cold"] > 0
+        assert adds["size"] > 0
+        # compile_py: compared to the module imported from its Python source
+        assert recorded["example_lib"]["pure_warm"] is not None
+        hook.clean([])
+
+    syspath.remove(str(new_src_proj))
@@ -0,0 +1,64 @@
+import sys
+from sys import path as syspath
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from toml import load
+
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.temp import setup_py
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def test_incremental_skips_unchanged(new_src_proj):  # noqa: F811
+    built = []
+
+    def capture(*files, **kwargs):
+        built.append(sorted(f["name"] for f in files))
+        return setup_py(*files, **kwargs)
+
+    def new_hook():
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        config["options"]["incremental"] = True
+        return CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+
+    # include helpers imported from an earlier test project would resolve headers there
+    for name in [name for name in sys.modules if name == "scripts" or name.startswith("scripts.")]:
+        del sys.modules[name]
+
+    with override_dir(new_src_proj), patch("hatch_cython.plugin.setup_py", capture):
+        syspath.insert(0, str(new_src_proj))
+        hook = new_hook()
+        hook.clean([])
+        hook.build_ext()
+        assert len(built) == 1
+        assert (new_src_proj / ".hatch_cython" / "manifest.json").exists()
+
+        new_hook().build_ext()
+        assert len(built) == 1
+
+        adds = new_src_proj / "src" / "example_lib" / "mod_a" / "adds.pyx"
+        adds.write_text(adds.read_text() + "\n# changed\n")
+        new_hook().build_ext()
+        assert built[-1] == ["example_lib.mod_a.adds"]
+        assert (new_src_proj / ".hatch_cython" / "depgraph.json").exists()
+
+        # a header found through the includes only invalidates the extension using it
+        header = new_src_proj / "include" / "something.cc"
+        header.write_text(header.read_text() + "\n// changed\n")
+        new_hook().build_ext()
+        assert built[-1] == ["example_lib.custom_includes"]
+
+        new_hook().build_ext()
+        assert len(built) == 3
+
+    syspath.remove(str(new_src_proj))
@@ -0,0 +1,77 @@
+import json
+import os
+from sys import path as syspath
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from toml import load
+
+from hatch_cython.config.lto import FULL, OFF, THIN, LtoArgs, parse_lto_args
+from hatch_cython.lto import LtoResults, lto_flags
+from hatch_cython.pgo import CLANG, GCC, detect_compiler
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def test_lto_args(tmp_path):
+    assert parse_lto_args(True).mode == FULL
+    assert not parse_lto_args(False).enabled
+    assert parse_lto_args({"mode": "thin", "benchmark": "python -m bench"}).command == ["python", "-m", "bench"]
+    with pytest.raises(ValueError, match="mode"):
+        parse_lto_args("partial")
+    with pytest.raises(ValueError, match="repeat"):
+        LtoArgs(repeat=0)
+
+    assert lto_flags(CLANG, THIN) == (["-flto=thin"], ["-flto=thin"])
+    compile_args, link_args = lto_flags(GCC, FULL)
+    assert compile_args == ["-flto=auto"]
+    assert "-flto-partition=one" in link_args
+
+    results = LtoResults(str(tmp_path / "lto.json"))
+    results.record(OFF, {"a": 2048, "b": 2048}, 2.0)
+    results.record(THIN, {"a": 1024, "b": 2048}, 1.5)
+    results.save()
+    report = LtoResults.load(results.path).report(THIN)
+    assert report == ["lto (thin): extensions 3.0 KiB (-25.0% vs off)", "lto (thin): benchmark 1.500s (-25.0% vs off)"]
+
+
+@pytest.mark.skipif(detect_compiler(dict(os.environ)) is None, reason="gcc or clang is required")
+def test_lto_build(new_src_proj):  # noqa: F811
+    def new_hook(lto):
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        config["options"]["lto"] = lto
+        return CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+
+    results = new_src_proj / ".hatch_cython" / "lto.json"
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = new_hook("off")
+        hook.clean([])
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+        assert hook.build_options is hook.options
+
+        hook = new_hook("thin")
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+        assert hook.lto_toolchain is not None
+        assert "-flto=auto" in hook.build_options.compile_args or "-flto=thin" in hook.build_options.compile_args
+        recorded = json.loads(results.read_text())
+        assert set(recorded) == {OFF, THIN}
+        assert recorded[THIN]["sizes"].keys() == recorded[OFF]["sizes"].keys()
+
+        # toolchains without LTO support build without it
+        with patch("hatch_cython.plugin.probe", return_value="unrecognized option '-flto'"):
+            hook = new_hook("full")
+            assert hook.build_options is hook.options
+        hook.clean([])
+
+    syspath.remove(str(new_src_proj))
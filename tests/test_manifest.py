@@ -0,0 +1,32 @@
+from hatch_cython.manifest import BuildManifest, ManifestEntry
+
+
+def test_manifest_roundtrip(tmp_path):
+    artifact = tmp_path / "mod.so"
+    artifact.write_text("")
+    path = str(tmp_path / "state" / "manifest.json")
+
+    manifest = BuildManifest.load(path)
+    assert manifest.entries == {}
+    manifest.record("pkg.mod", "abc", [str(artifact)])
+    manifest.save()
+
+    assert (tmp_path / "state" / ".gitignore").read_text() == "*\n"
+
+    loaded = BuildManifest.load(path)
+    assert loaded.entries == {"pkg.mod": ManifestEntry(digest="abc", artifacts=[str(artifact)])}
+    assert loaded.is_fresh("pkg.mod", "abc")
+    assert not loaded.is_fresh("pkg.mod", "def")
+    assert not loaded.is_fresh("pkg.other", "abc")
+
+    artifact.unlink()
+    assert not loaded.is_fresh("pkg.mod", "abc")
+
+    loaded.clear()
+    assert BuildManifest.load(path).entries == {}
+
+
+def test_manifest_invalid(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{not json")
+    assert BuildManifest.load(str(path)).entries == {}
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.config.multiversion import MultiversionArgs, parse_multiversion_args
+from hatch_cython.multiversion import is_variant, variant_name
+from hatch_cython.pgo import detect_compiler
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.utils import aarch
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+IMPORT = """
+import _example_lib_isa
+import example_lib.mod_a.adds as adds
+print(adds.imul(3, 4), adds.__file__.rsplit("/", 1)[-1].split(".")[0])
+"""
+
+
+def test_multiversion_args():
+    args = parse_multiversion_args(["x86-64-v4", "x86-64-v3"])
+    assert args.levels == ["x86-64-v3", "x86-64-v4"]
+    # the baseline covers older levels
+    assert MultiversionArgs(levels=["x86-64-v2", "x86-64-v3"], baseline="x86-64-v2").levels == ["x86-64-v3"]
+    assert not MultiversionArgs().enabled
+    with pytest.raises(ValueError, match="levels"):
+        MultiversionArgs(levels=["haswell"])
+    with pytest.raises(ValueError, match="baseline"):
+        MultiversionArgs(baseline="x86-64-v5")
+
+    assert variant_name("pkg.mod", "x86-64-v3") == "pkg.mod__x86_64_v3"
+    assert is_variant("pkg.mod__x86_64_v3")
+    assert not is_variant("pkg.mod")
+
+
+@pytest.mark.skipif(aarch() not in {"x86_64", "amd64"}, reason="x86-64 only")
+@pytest.mark.skipif(detect_compiler(dict(os.environ)) is None, reason="gcc or clang is required")
+def test_multiversion_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["multiversion"] = ["x86-64-v2", "x86-64-v3"]
+    package = new_src_proj / "src" / "example_lib" / "mod_a"
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        build_data = {"artifacts": [], "force_include": {}}
+        hook.initialize("0.1.0", build_data)
+
+        assert hook.isa_levels == ["x86-64-v2", "x86-64-v3"]
+        libraries = {f.split(".")[0] for f in os.listdir(package) if f.endswith((".so", ".pyd"))}
+        assert {"adds", "adds__x86_64_v2", "adds__x86_64_v3"} <= libraries
+        # package initializers are not multiversioned
+        assert "__init____x86_64_v2" not in libraries
+        assert any("/adds__x86_64_v3." in path for path in hook.inclusion_map)
+        assert sorted(target for target in build_data["force_include"].values() if "_isa" in target) == [
+            "_example_lib_isa.pth",
+            "_example_lib_isa.py",
+        ]
+
+        loader = os.path.join(hook.state_dir, "multiversion")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join((str(new_src_proj / "src"), loader))}
+        for forced, library in (("x86-64-v2", "adds__x86_64_v2"), ("none", "adds")):
+            imported = subprocess.run(  # noqa: S603
+                [sys.executable, "-c", IMPORT],
+                env={**env, "HATCH_CYTHON_ISA": forced},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            assert imported.stdout.split() == ["12", library]
+        hook.clean([])
+        assert not any(f.endswith((".so", ".pyd")) for f in os.listdir(package))
+
+    syspath.remove(str(new_src_proj))
@@ -0,0 +1,64 @@
+import os
+import sys
+from sys import path as syspath
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from toml import load
+
+from hatch_cython.config.pgo import PgoArgs, parse_pgo_args
+from hatch_cython.pgo import CLANG, GCC, detect_compiler, use_flags
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+TRAIN = "import example_lib.mod_a.adds as adds; [adds.imul(i, 2) for i in range(10000)]"
+
+
+def test_pgo_args():
+    args = parse_pgo_args({"train": "python -m bench --quick"})
+    assert args.enabled
+    assert args.command == ["python", "-m", "bench", "--quick"]
+    assert not parse_pgo_args(False).enabled
+    with pytest.raises(ValueError, match="train"):
+        parse_pgo_args(True)
+    with pytest.raises(ValueError, match="compiler"):
+        PgoArgs(enabled=True, train=["x"], compiler="msvc")
+
+    assert use_flags(GCC, "pgo")[0][0] == "-fprofile-use=pgo"
+    assert use_flags(CLANG, "pgo")[1] == [f"-fprofile-use={os.path.join('pgo', 'default.profdata')}"]
+
+
+@pytest.mark.skipif(detect_compiler(dict(os.environ)) != GCC, reason="gcc is required")
+def test_pgo_build(new_src_proj):  # noqa: F811
+    def new_hook():
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        config["options"]["pgo"] = {"train": [sys.executable, "-c", TRAIN]}
+        return CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+
+    profiles = new_src_proj / ".hatch_cython" / "pgo"
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = new_hook()
+        hook.clean([])
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+        assert (profiles / "pgo.json").exists()
+        written = [f for _, _, files in os.walk(profiles) for f in files if f.endswith(".gcda")]
+        assert "adds.gcda" in written
+
+        # unchanged extensions reuse the profiles rather than training again
+        with patch.object(CythonBuildHook, "train") as train:
+            new_hook().initialize("0.1.0", {"artifacts": [], "force_include": {}})
+            train.assert_not_called()
+        new_hook().clean([])
+
+    syspath.remove(str(new_src_proj))
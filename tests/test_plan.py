@@ -0,0 +1,76 @@
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from hatch_cython.config import Config
+from hatch_cython.plan import BuildPlan, ExtensionPlan
+
+
+def new_plan(extensions, **flags):
+    cfg = Config(**flags)
+    return BuildPlan(
+        target="wheel",
+        project_dir="./src/pkg",
+        sources=tuple(f for e in extensions for f in e.files),
+        extensions=tuple(extensions),
+        templates=("./src/pkg/t.pyx.in",),
+        artifacts=("./src/pkg/a.*.pyx",),
+        flags=cfg.resolved_flags(),
+        fingerprint=cfg.fingerprint(),
+    )
+
+
+def test_plan_roundtrip(tmp_path):
+    plan = new_plan([ExtensionPlan("pkg.b", ("./src/pkg/b.pyx",)), ExtensionPlan("pkg.a", ("./src/pkg/a.pyx",))])
+    assert [e.name for e in plan.extensions] == ["pkg.a", "pkg.b"]
+    assert plan.extension_args() == [
+        {"name": "pkg.a", "files": ["./src/pkg/a.pyx"]},
+        {"name": "pkg.b", "files": ["./src/pkg/b.pyx"]},
+    ]
+    assert BuildPlan.from_json(plan.to_json()) == plan
+
+    with pytest.raises(FrozenInstanceError):
+        plan.target = "sdist"
+    with pytest.raises(TypeError):
+        plan.flags["includes"] = []
+
+    path = str(tmp_path / ".hatch_cython" / "plan.json")
+    assert BuildPlan.load(path) is None
+    plan.save(path)
+    assert BuildPlan.load(path) == plan
+
+
+def test_fingerprint_flag_order():
+    assert (
+        Config(compile_args=["-fno-wrapv", "-fwrapv"]).fingerprint()
+        != Config(compile_args=["-fwrapv", "-fno-wrapv"]).fingerprint()
+    )
+    assert (
+        Config(extra_link_args=["-Xlinker", "-O1", "-Xlinker", "--as-needed"]).fingerprint()
+        != Config(extra_link_args=["-Xlinker", "--as-needed", "-Xlinker", "-O1"]).fingerprint()
+    )
+
+
+def test_plan_diff():
+    before = new_plan(
+        [
+            ExtensionPlan("pkg.a", ("./src/pkg/a.pyx",)),
+            ExtensionPlan("pkg.b", ("./src/pkg/b.pyx",)),
+            ExtensionPlan("pkg.c", ("./src/pkg/c.pyx",)),
+        ]
+    )
+    after = new_plan(
+        [
+            ExtensionPlan("pkg.a", ("./src/pkg/a.pyx",)),
+            ExtensionPlan("pkg.c", ("./src/pkg/c.pyx", "./src/pkg/c.pxd")),
+            ExtensionPlan("pkg.d", ("./src/pkg/d.pyx",)),
+        ],
+        libraries=["m"],
+    )
+    assert before.diff(before).empty
+    changes = after.diff(before)
+    assert changes.added == ("pkg.d",)
+    assert changes.removed == ("pkg.b",)
+    assert changes.changed == ("pkg.c",)
+    assert changes.flags == ("libraries",)
+    assert str(changes) == "added: pkg.d; removed: pkg.b; changed: pkg.c; flags: libraries"
@@ -0,0 +1,107 @@
+import os
+from sys import path as syspath
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from hatchling.builders.wheel import WheelBuilder
+from toml import load
+
+from hatch_cython.config import parse_from_dict
+from hatch_cython.constants import PROFILE_MARKER, VARIANT_ENV
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.profiling import LineCollector, line_report, main, run
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def parse(options: dict):
+    return parse_from_dict(SimpleNamespace(config={"options": options}, app=SimpleNamespace(display_warning=print)))
+
+
+def test_variant():
+    release = parse({"define_macros": [["CYTHON_TRACE", "0"]]})
+    assert "linetrace" not in release.directives
+
+    profile = parse({"variant": "profile", "define_macros": [["CYTHON_TRACE", "0"]], "directives": {"profile": False}})
+    assert profile.directives["profile"] is True
+    assert profile.directives["linetrace"] is True
+    assert ("CYTHON_TRACE", "1") in profile.define_macros
+    assert ("CYTHON_TRACE", "0") not in profile.define_macros
+    assert ("CYTHON_TRACE_NOGIL", "1") in profile.define_macros
+    assert profile.resolved_flags() != release.resolved_flags()
+
+    with patch.dict(os.environ, {VARIANT_ENV: "profile"}):
+        assert parse({}).variant == "profile"
+
+    with pytest.raises(ValueError, match="variant"):
+        parse({"variant": "debug"})
+
+
+def test_profile_build(new_src_proj, tmp_path):  # noqa: F811
+    (tmp_path / "profile_driver.py").write_text(
+        "from example_lib.mod_a.adds import imul\n\ndef main():\n    for i in range(1000):\n        imul(i, 2)\n"
+    )
+
+    def new_hook(version: str):
+        about = new_src_proj / "src" / "example_lib" / "__about__.py"
+        about.write_text(f'__version__ = "{version}"\n')
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        config["options"]["variant"] = "profile"
+        builder = WheelBuilder(str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            builder.metadata,
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        return builder, hook
+
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        # a profile wheel must not carry the name of a release
+        _, hook = new_hook("0.1.0")
+        with pytest.raises(ValueError, match=r"0\.1\.0\+profile"):
+            hook.initialize("standard", {"artifacts": [], "force_include": {}})
+
+        builder, hook = new_hook("0.1.0+profile")
+        hook.clean([])
+        build_data = {"artifacts": [], "force_include": {}}
+        hook.initialize("standard", build_data)
+        assert builder.artifact_project_id == "example_lib-0.1.0+profile"
+        [(marker, name)] = build_data["extra_metadata"].items()
+        assert name == PROFILE_MARKER
+        assert os.path.exists(marker)
+
+        syspath[:0] = [str(new_src_proj / "src"), str(tmp_path)]
+        report, written = run("profile_driver:main", str(tmp_path / "profile"), lines=False)
+        assert "adds.pyx:4(imul)" in report
+        assert all(os.path.exists(f) for f in written)
+
+        main(["profile_driver:main", "--no-lines", "--output", str(tmp_path / "functions"), "--", "-x"])
+        assert sorted(os.listdir(tmp_path / "functions")) == ["functions.txt", "profile.pstats"]
+        hook.clean([])
+
+    for p in (str(tmp_path), str(new_src_proj / "src"), str(new_src_proj)):
+        syspath.remove(p)
+
+
+def squares(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def test_line_collector():
+    collector = LineCollector(sources=(__file__,))
+    with collector.collecting():
+        squares(100)
+    hits = {line: count for (_, line), (count, _) in collector.hits.items()}
+    first = squares.__code__.co_firstlineno
+    assert hits[first + 3] == 100
+    assert hits[first + 4] == 1
+    assert "total += i * i" in line_report(collector)
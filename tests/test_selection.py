@@ -0,0 +1,85 @@
+import cProfile
+import json
+import os
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.config.selection import SelectArgs, parse_select_args
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.selection import match_module, select_modules
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+MODULES = {
+    "example_lib": "example_lib/__init__.py",
+    "example_lib.normal": "example_lib/normal.py",
+    "example_lib.__about__": "example_lib/__about__.py",
+}
+
+
+def test_select_args(tmp_path):
+    assert parse_select_args("profile.pstats") == SelectArgs(profiles=["profile.pstats"])
+    assert not SelectArgs().enabled
+    with pytest.raises(ValueError, match="threshold"):
+        SelectArgs(profiles=["a.pstats"], threshold=1)
+
+    assert match_module("/venv/site-packages/example_lib/normal.py", MODULES) == "example_lib.normal"
+    assert match_module("/venv/site-packages/other_lib/normal.py", MODULES) is None
+
+    hotness = tmp_path / "hot.json"
+    hotness.write_text(json.dumps({"modules": {"example_lib.normal": 90, "example_lib": 9.5, "json": 100}}))
+    selection = select_modules([str(hotness)], MODULES, 0.1)
+    assert selection.selected == {"example_lib.normal"}
+    assert selection.coverage == pytest.approx(90 / 99.5)
+
+    profile = cProfile.Profile()
+    profile.runcall(json.dumps, list(range(1000)))
+    profile.dump_stats(tmp_path / "run.pstats")
+    encoder = {"json.encoder": "json/encoder.py"}
+    assert select_modules([str(tmp_path / "run.pstats")], encoder, 0.5).selected == {"json.encoder"}
+
+
+def test_select_build(new_src_proj):  # noqa: F811
+    def new_hook():
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        config["options"]["select"] = {"profiles": ["*.json"], "threshold": 0.05}
+        return CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+
+    (new_src_proj / "hotness.json").write_text(json.dumps({"example_lib/normal.py": 10, "example_lib.__about__": 0.1}))
+    package = new_src_proj / "src" / "example_lib"
+
+    def compiled(stem):
+        return any(f.startswith(f"{stem}.") and f.endswith((".so", ".pyd")) for f in os.listdir(package))
+
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = new_hook()
+        hook.clean([])
+        assert hook.selection.selected == {"example_lib.normal"}
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+
+        assert compiled("normal")
+        assert not compiled("__about__")
+        # .pyx modules are always compiled
+        assert compiled("test")
+
+        # a module that is no longer hot ships as Python
+        (new_src_proj / "hotness.json").write_text(json.dumps({"example_lib.__about__": 10, "example_lib.normal": 0.1}))
+        new_hook().initialize("0.1.0", {"artifacts": [], "force_include": {}})
+        assert compiled("__about__")
+        assert not compiled("normal")
+        assert not (package / "normal.c").exists()
+        hook.clean([])
+
+    syspath.remove(str(new_src_proj))
@@ -103,3 +103,30 @@ def test_solo_ext_type_validations():
 
     if not tested:
         raise ValueError(setup, tested, "missed test")
+
+
+def test_scheduled_setup_py():
+    cfg = Config(cythonize_kwargs={"nthreads": 4, "annotate": True}, workers=3)
+    setup = setup_py({"name": "abc.def", "files": ["./abc/def.pyx"]}, options=cfg, sdist=False, state_dir="/state")
+    assert "ext_modules = exts" in setup
+    assert "cythonize(" not in setup.split("__main__")[1]
+    assert 'cmdclass={"build_ext": CythonBuildExt.configure(BUILD_OPTIONS)}' in setup
+    opts = ast.literal_eval(next(ln for ln in setup.splitlines() if ln.startswith("BUILD_OPTIONS")).split("=", 1)[1])
+    assert opts["workers"] == 3
+    assert opts["cythonize"]["annotate"]
+    assert "nthreads" not in opts["cythonize"]
+
+    # source distributions only generate C, so the stock flow is kept
+    sdist = setup_py({"name": "abc.def", "files": ["./abc/def.pyx"]}, options=cfg, sdist=True)
+    assert "BUILD_OPTIONS" not in sdist
+    assert "cythonize(" in sdist
+
+
+def test_traced_setup_py():
+    cfg = Config(cythonize_kwargs={"nthreads": 4})
+    setup = setup_py({"name": "abc.def", "files": ["./abc/def.pyx"]}, options=cfg, sdist=False, trace="./events.json")
+    opts = ast.literal_eval(next(ln for ln in setup.splitlines() if ln.startswith("BUILD_OPTIONS")).split("=", 1)[1])
+    assert opts["trace"] == "./events.json"
+    assert "nthreads" not in opts["cythonize"]
+    assert "workers" not in opts
+    assert "ext_modules = exts" in setup
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from sys import path as syspath
+from types import SimpleNamespace
+
+import pytest
+from toml import load
+
+from hatch_cython.config import Config
+from hatch_cython.plugin import CythonBuildHook
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def test_shared_utility_option():
+    assert Config(shared_utility="mypkg._util").shared_utility == "mypkg._util"
+    with pytest.raises(ValueError, match="shared_utility"):
+        Config(shared_utility="mypkg.not-a-module")
+    with pytest.raises(ValueError, match="shared_utility"):
+        Config(shared_utility=1)
+
+
+def test_shared_utility_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["shared_utility"] = True
+    package = new_src_proj / "src" / "example_lib"
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        assert hook.shared_utility["name"] == "example_lib._cyutility"
+        build_data = {"artifacts": [], "force_include": {}}
+        hook.initialize("0.1.0", build_data)
+
+        assert (package / "_cyutility.c").exists()
+        assert any(f.startswith("_cyutility.") and f.endswith((".so", ".pyd")) for f in os.listdir(package))
+        assert any("_cyutility." in path for path in build_data["force_include"])
+        # extensions import the utility code rather than embedding it
+        with open(package / "mod_a" / "adds.c") as f:
+            assert "example_lib._cyutility" in f.read()
+        imported = subprocess.run(
+            [sys.executable, "-c", "import example_lib.mod_a.adds as adds; print(adds.imul(3, 4))"],
+            env={**os.environ, "PYTHONPATH": str(new_src_proj / "src")},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert imported.stdout.strip() == "12"
+        hook.clean([])
+        assert not (package / "_cyutility.c").exists()
+
+    syspath.remove(str(new_src_proj))
@@ -1,6 +1,17 @@
-from hatch_cython.config.templates import Templates, parse_template_kwds
+import os
+from sys import path as syspath
+from types import SimpleNamespace
+from unittest.mock import patch
 
-from .utils import arch_platform
+import pytest
+from toml import load
+
+from hatch_cython.config.templates import Templates, expand_matrix, parse_template_kwds
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.render import RenderJob, describe_renders, render_all
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import arch_platform, override_dir
 
 
 def test_templates():
@@ -43,8 +54,129 @@ def test_templates():
     }
     test(form2)
 
+    with arch_platform("x86_64", "darwin"):
+        parsed = parse_template_kwds(kwds.copy())
+        files = ["abc/templated.pyx.in", "./abc/templated.pyi.in", "abc/other.pyx.in"]
+        assert parsed.resolve(None, files) == {f: [(f[:-3], parsed.find(None, f[:-3], f))] for f in files}
+
 
 def test_defaults():
     parsed = parse_template_kwds({})
     assert parsed == Templates(index=[])
     assert repr(parsed) == "Templates(index=[], kwargs={})"
+
+
+def test_render_cache(new_src_proj):  # noqa: F811
+    def new_hook():
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        return CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+
+    template = new_src_proj / "src" / "example_lib" / "templated.pyx.in"
+    output = new_src_proj / "src" / "example_lib" / "templated.pyx"
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        new_hook().render_templates()
+        assert (new_src_proj / ".hatch_cython" / "renders.json").exists()
+        rendered = output.read_text()
+        os.utime(output, ns=(0, 0))
+
+        # unchanged templates are neither rendered nor written again
+        with patch("hatch_cython.render.render_template") as render:
+            new_hook().render_templates()
+            render.assert_not_called()
+        assert output.stat().st_mtime_ns == 0
+
+        # a template change that renders to the same output does not touch it
+        template.write_text(template.read_text() + "{{py: unused = 1}}")
+        new_hook().render_templates()
+        assert output.stat().st_mtime_ns == 0
+
+        template.write_text(template.read_text() + "\n# changed\n")
+        new_hook().render_templates()
+        assert output.read_text().startswith(rendered.rstrip())
+        assert output.read_text().endswith("# changed\n")
+        assert output.stat().st_mtime_ns != 0
+
+        hook = new_hook()
+        hook.clean([])
+        assert not (new_src_proj / ".hatch_cython" / "renders.json").exists()
+
+    syspath.remove(str(new_src_proj))
+
+
+def test_render_pool(tmp_path):
+    jobs = [
+        RenderJob(
+            f"kernel_{i}.pyx.in",
+            str(tmp_path / f"kernel_{i}.pyx"),
+            "{{for t in supported}}{{t}}\n{{endfor}}",
+            kw,
+            "# header",
+            "",
+        )
+        for i, kw in enumerate([{"supported": ["int"]}, {"supported": ["int", "float"]}, {"supported": []}])
+    ]
+    rendered = render_all(jobs, workers=2)
+    assert [r.outfile for r in rendered] == [j.outfile for j in jobs]
+    assert all(r.written and r.duration >= 0 for r in rendered)
+    assert (tmp_path / "kernel_1.pyx").read_text() == "# header\n\nint\nfloat\n"
+    assert not any(r.written for r in render_all(jobs))
+
+    # every render is reported, the slowest are summarized when there are more of them
+    report = describe_renders(rendered).splitlines()
+    assert len(report) == len(jobs)
+    assert all(r.outfile in report[i] for i, r in enumerate(rendered))
+    report = describe_renders(rendered, count=1).splitlines()
+    assert report[len(jobs)] == "slowest 1 renders:"
+    assert len(report) == len(jobs) + 2
+
+
+def test_matrix(new_src_proj):  # noqa: F811
+    assert expand_matrix("pkg/kernel.pyx", {"a": 1}, {"dtype": ["int", "long long"], "n": [2]}) == [
+        ("pkg/kernel_int_2.pyx", {"a": 1, "dtype": "int", "n": 2}),
+        ("pkg/kernel_long_long_2.pyx", {"a": 1, "dtype": "long long", "n": 2}),
+    ]
+    with pytest.raises(ValueError, match=r"'a-b'.*'a\.b'.*kernel_a_b\.pyx"):
+        expand_matrix("pkg/kernel.pyx", {}, {"dtype": ["a-b", "a.b"]})
+
+    def new_hook(dtypes):
+        config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+        config["options"]["templates"]["index"].append(
+            {"keyword": "kernel", "matches": "kernel.*.in", "matrix": {"dtype": dtypes}}
+        )
+        return CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+
+    lib = new_src_proj / "src" / "example_lib"
+    (lib / "kernel.pyx.in").write_text("cpdef {{dtype}} twice({{dtype}} a):\n    return a * 2\n")
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = new_hook(["int", "double"])
+        names = {e["name"] for e in hook.grouped_included_files}
+        assert {"example_lib.kernel_int", "example_lib.kernel_double"} <= names
+        assert "example_lib.kernel" not in names
+        assert "cpdef double twice(double a)" in (lib / "kernel_double.pyx").read_text()
+
+        # outputs of values removed from the matrix are removed, and not built
+        hook = new_hook(["int"])
+        names = {e["name"] for e in hook.grouped_included_files}
+        assert "example_lib.kernel_double" not in names
+        assert not (lib / "kernel_double.pyx").exists()
+
+        hook.clean([])
+        assert not (lib / "kernel_int.pyx").exists()
+
+    syspath.remove(str(new_src_proj))
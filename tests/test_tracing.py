@@ -0,0 +1,83 @@
+import json
+import os
+import pstats
+from sys import path as syspath
+from types import SimpleNamespace
+
+from toml import load
+
+from hatch_cython.plugin import CythonBuildHook
+from hatch_cython.tracing import Tracer, output_path, profiled
+
+from .test_plugin import new_src_proj  # noqa: F401
+from .utils import override_dir
+
+
+def test_output_path():
+    assert output_path(None, "default.json") is None
+    assert output_path(False, "default.json") is None
+    assert output_path("0", "default.json") is None
+    assert output_path(True, "default.json") == "default.json"
+    assert output_path("1", "default.json") == "default.json"
+    assert output_path("out/trace.json", "default.json") == "out/trace.json"
+
+
+def test_tracer(tmp_path):
+    disabled = Tracer()
+    with disabled.span("nothing"):
+        pass
+    assert disabled.events == []
+
+    tracer = Tracer(enabled=True)
+    with tracer.span("outer"), tracer.span("inner", cat="build", module="a"):
+        pass
+    child = Tracer(enabled=True)
+    child.complete("compile", 0, 10, cat="build", pid=-1)
+    child.save_events(str(tmp_path / "events.json"))
+    tracer.load_events(str(tmp_path / "events.json"))
+    tracer.load_events(str(tmp_path / "missing.json"))
+
+    path = tmp_path / "trace" / "trace.json"
+    tracer.export(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert names == {"hatch-cython", "build"}
+    spans = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in spans] == ["compile", "outer", "inner"]
+    outer, inner = spans[1], spans[2]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["args"] == {"module": "a"}
+
+    with profiled(str(tmp_path / "hook.pstats")):
+        sorted(range(100))
+    assert pstats.Stats(str(tmp_path / "hook.pstats")).total_calls > 0
+
+
+def test_traced_build(new_src_proj):  # noqa: F811
+    config = load(new_src_proj / "hatch.toml")["build"]["hooks"]["custom"]
+    config["options"]["trace"] = True
+    config["options"]["profile_hook"] = "hook.pstats"
+
+    with override_dir(new_src_proj):
+        syspath.insert(0, str(new_src_proj))
+        hook = CythonBuildHook(
+            new_src_proj,
+            config,
+            {},
+            SimpleNamespace(name="example_lib"),
+            directory=new_src_proj,
+            target_name="wheel",
+        )
+        hook.clean([])
+        hook.initialize("0.1.0", {"artifacts": [], "force_include": {}})
+
+        assert os.path.exists("hook.pstats")
+        with open(hook.trace_path) as f:
+            events = [e for e in json.load(f)["traceEvents"] if e["ph"] == "X"]
+
+    syspath.remove(str(new_src_proj))
+    names = {e["name"] for e in events}
+    assert {"initialize", "parse options", "render templates", "discover", "build", "record"} <= names
+    modules = {e["name"] for e in events if e["cat"] == "module"}
+    assert modules == {e.name for e in hook.plan.extensions}
+    assert {"cythonize", "compile", "link"} <= {e["name"] for e in events if e["cat"] == "build"}
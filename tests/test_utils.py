@@ -1,8 +1,9 @@
+import re
 from time import sleep
 
 import pytest
 
-from hatch_cython.utils import memo, stale
+from hatch_cython.utils import GlobMatcher, memo, stale
 
 
 def test_memo():
@@ -35,6 +36,9 @@ def test_memo():
 
     assert tc.ok_property == "OK"
 
+    # collected instances must not leak their values to new ones reusing the id
+    assert TestC().do() != TestC().do()
+
 
 @pytest.fixture
 def new_tmp_dir(tmp_path):
@@ -81,3 +85,27 @@ def test_stale(new_tmp_dir):
         str(src),
         str(dest),
     )
+
+
+def test_glob_matcher():
+    patterns = ["*/no_compile/*", "*/tests/**", "*.pyx", "*/no_compile/keep.py"]
+    m = GlobMatcher.from_globs(patterns)
+    assert m.literals == ["/no_compile/", "/tests/", "pyx", "/no_compile/keep"]
+    assert m.match("./src/lib/no_compile/keep.py") == 0
+    assert m.match("./src/lib/tests/a/b.py") == 1
+    assert m.match("./src/lib/a.pyx") == 2
+    assert m.match("./src/lib/a.py") is None
+    assert len(m) == len(patterns)
+    # the combined expression agrees with matching each pattern in order
+    for value in ("./a/no_compile/x", "./a/tests/", "b.pyx", "c.c", "./t/tests"):
+        first = next((i for i, p in enumerate(m.patterns) if re.match(p, value)), None)
+        assert m.match(value) == first
+
+    assert GlobMatcher.from_globs(["*/ABC/*"], flags=re.IGNORECASE).matches("./x/abc/y")
+    assert not GlobMatcher([]).matches("anything")
+
+    # patterns using regex syntax have no literal and are always tried
+    regex = GlobMatcher([r"(a)\1", r"([^.]\*).(pyd$|pytempl$)"])
+    assert regex.literals == [None, None]
+    assert regex.match("aa") == 0
+    assert regex.match("x*.pyd") == 1